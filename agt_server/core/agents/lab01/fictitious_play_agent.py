@@ -1,5 +1,7 @@
 import numpy as np
 from core.agents.common.base_agent import BaseAgent
+from core.game.RPSGame import RPSGame
+from core.solvers import matrix_solver
 
 
 class FictitiousPlayAgent(BaseAgent):
@@ -9,6 +11,7 @@ class FictitiousPlayAgent(BaseAgent):
         super().__init__(name)
         self.actions = [0, 1, 2]  # Rock, Paper, Scissors
         self.opponent_action_counts = [0, 0, 0]  # Count of each action by opponent
+        self.solver = matrix_solver(RPSGame().payoff_tensor)  # shared by every agent playing rps
     
     def get_action(self, obs):
         """Return the best response to predicted opponent action."""
@@ -20,24 +23,8 @@ class FictitiousPlayAgent(BaseAgent):
             # Use fictitious play to predict opponent's mixed strategy
             opponent_dist = np.array(self.opponent_action_counts) / sum(self.opponent_action_counts)
             
-            # Calculate expected payoff for each action
-            expected_payoffs = np.zeros(3)
-            for my_action in self.actions:
-                for opp_action in self.actions:
-                    # RPS payoff matrix: my_action vs opp_action
-                    if my_action == opp_action:
-                        payoff = 0
-                    elif (my_action == 0 and opp_action == 2) or \
-                         (my_action == 1 and opp_action == 0) or \
-                         (my_action == 2 and opp_action == 1):
-                        payoff = 1  # Win
-                    else:
-                        payoff = -1  # Lose
-                    
-                    expected_payoffs[my_action] += opponent_dist[opp_action] * payoff
-            
             # Choose action with highest expected payoff
-            action = np.argmax(expected_payoffs)
+            action = self.solver.best_response(opponent_dist)
         
         self.action_history.append(action)
         return action
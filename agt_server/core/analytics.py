@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+exact expected payoffs in the two player matrix games, no simulation.
+
+"does this mixed strategy beat a uniform opponent?" doesn't need 1000 noisy rounds
+through the engine, it's a couple of sums over the payoff tensor:
+
+    expected_payoff(RPSGame(), {0: 0.5, 1: 0.5}, [1/3, 1/3, 1/3])      # (0.0, 0.0) per round
+    markov_payoff(BOSGame(), punitive, tit_for_tat, rounds=1000)          # totals over a game
+    population_payoffs(BOSGame(), strategies)                             # every pair at once
+
+a strategy is one of
+- an action (a pure strategy)
+- a {action: probability} dict or a sequence of probabilities (a mixed strategy)
+- a list of dicts or probability lists, one per hidden state, for a player who sees the
+  hidden state (the column player's mood in bosii): [good_mood_strategy, bad_mood_strategy]
+- a TablePolicy (core/policy.py), a markov strategy reacting to the opponent's last action
+
+markov strategies are evaluated on the joint chain over both players' states: exactly
+over a finite number of rounds, or over the long run through the stationary
+distribution of the chain started from both initial states.
+"""
+
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.policy import TablePolicy
+
+
+def hidden_payoffs(game) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (weights, payoffs) of a matrix game: the chance of each hidden state and its payoff
+    tensor, shape (hidden states, row actions, column actions, 2).
+    """
+    if hasattr(game, "good_mood_prob"):
+        # bosii draws the column player's mood every round
+        from core.game.BOSIIGame import BOSIIStage
+        stage = BOSIIStage()
+        payoffs = np.stack([stage.payoffs[stage.GOOD_MOOD], stage.payoffs[stage.BAD_MOOD]]).astype(float)
+        return np.array([game.good_mood_prob, game.bad_mood_prob], dtype=float), payoffs
+    tensor = getattr(game, "payoff_tensor", None)
+    if tensor is None or np.ndim(tensor) != 4 or np.shape(tensor)[-1] != 2:
+        raise ValueError(f"{type(game).__name__} is not a two player matrix game")
+    # MatrixGame always plays hidden state 0 (see MatrixStage)
+    return np.ones(1), np.asarray(tensor, dtype=float)[:1]
+
+
+def mixed_strategy(strategy: Any, num_actions: int) -> np.ndarray:
+    """a pure or mixed strategy as a probability vector over the actions."""
+    if isinstance(strategy, (int, np.integer)) and not isinstance(strategy, bool):
+        if not 0 <= strategy < num_actions:
+            raise ValueError(f"{strategy} is not one of the actions 0..{num_actions - 1}")
+        probabilities = np.zeros(num_actions)
+        probabilities[strategy] = 1.0
+        return probabilities
+    if isinstance(strategy, dict):
+        probabilities = np.zeros(num_actions)
+        for action, probability in strategy.items():
+            action = int(action)
+            if not 0 <= action < num_actions:
+                raise ValueError(f"{action} is not one of the actions 0..{num_actions - 1}")
+            probabilities[action] += float(probability)
+    else:
+        probabilities = np.asarray(strategy, dtype=float)
+        if probabilities.shape != (num_actions,):
+            raise ValueError(f"expected {num_actions} probabilities, got shape {probabilities.shape}")
+    if (probabilities < 0).any() or abs(probabilities.sum() - 1.0) > 1e-6:
+        raise ValueError(f"{strategy!r} is not a probability distribution")
+    return probabilities
+
+
+def _per_hidden_state(strategy: Any, num_actions: int, num_hidden: int) -> np.ndarray:
+    """(hidden states, actions), the same strategy in every hidden state unless one is given per state."""
+    # a list of probabilities is one strategy, a list of dicts or of probability lists is one per hidden state
+    if isinstance(strategy, (list, tuple, np.ndarray)) and len(strategy) and not np.isscalar(strategy[0]):
+        if len(strategy) != num_hidden:
+            raise ValueError(f"expected a strategy for each of the {num_hidden} hidden states, got {len(strategy)}")
+        return np.stack([mixed_strategy(s, num_actions) for s in strategy])
+    return np.tile(mixed_strategy(strategy, num_actions), (num_hidden, 1))
+
+
+def expected_payoff(game, row: Any, col: Any) -> Tuple[float, float]:
+    """expected (row, column) payoff of one round between two stationary strategies."""
+    weights, payoffs = hidden_payoffs(game)
+    num_hidden, rows, cols, _ = payoffs.shape
+    x = _per_hidden_state(row, rows, num_hidden)
+    y = _per_hidden_state(col, cols, num_hidden)
+    r0, r1 = np.einsum("h,ha,habp,hb->p", weights, x, payoffs, y)
+    return float(r0), float(r1)
+
+
+def _chain(strategy: Any, num_actions: int, opponent_actions: int, num_hidden: int):
+    """(probabilities per state and hidden state, next state per opponent action, initial state) of a strategy."""
+    if not isinstance(strategy, TablePolicy):
+        # a stationary strategy is a one state chain
+        return _per_hidden_state(strategy, num_actions, num_hidden)[None], np.zeros((1, opponent_actions), int), 0
+    probabilities = np.zeros((strategy.num_states, num_hidden, num_actions))
+    following = np.zeros((strategy.num_states, opponent_actions), int)
+    for state, (moves, cumulative) in enumerate(strategy.choices):
+        if cumulative is None:
+            probabilities[state, :, moves[0]] = 1.0
+        else:
+            for move, low, high in zip(moves, [0.0] + cumulative[:-1], cumulative):
+                probabilities[state, :, move] += high - low
+        for action in range(opponent_actions):
+            following[state, action] = strategy.transitions[state].get((action,), strategy.defaults[state])
+    if probabilities.shape[2] != num_actions or (probabilities.sum(axis=2) == 0).any():
+        raise ValueError("the policy's actions don't match the game")
+    return probabilities, following, strategy.initial
+
+
+def joint_chain(game, row: Any, col: Any) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    the markov chain both players' states follow: (transitions, rewards, start) where
+    transitions[i, j] is the chance of going from joint state i to j in a round and
+    rewards[i] the expected (row, column) payoff of a round played in state i.
+    joint state i is (row state i // column states, column state i % column states).
+    """
+    weights, payoffs = hidden_payoffs(game)
+    num_hidden, rows, cols, _ = payoffs.shape
+    x, next_row, start_row = _chain(row, rows, cols, num_hidden)
+    y, next_col, start_col = _chain(col, cols, rows, num_hidden)
+    row_states, col_states = len(x), len(y)
+
+    # chance of every joint action in every joint state, the hidden state summed out
+    joint = np.einsum("h,xha,yhb->xyab", weights, x, y)
+    rewards = np.einsum("h,xha,habp,yhb->xyp", weights, x, payoffs, y).reshape(-1, 2)
+
+    # where each joint action leads: the row player reacts to b, the column player to a
+    targets = next_row[:, None, None, :] * col_states + next_col[None, :, :, None]
+    targets = np.broadcast_to(targets, joint.shape)
+    sources = np.broadcast_to(np.arange(row_states * col_states).reshape(row_states, col_states, 1, 1), joint.shape)
+    transitions = np.zeros((row_states * col_states, row_states * col_states))
+    np.add.at(transitions, (sources.ravel(), targets.ravel()), joint.ravel())
+    return transitions, rewards, start_row * col_states + start_col
+
+
+def _reachable(transitions: np.ndarray, start: int) -> np.ndarray:
+    seen = np.zeros(len(transitions), bool)
+    seen[start] = True
+    frontier = [start]
+    while frontier:
+        following = np.nonzero((transitions[frontier] > 0).any(axis=0) & ~seen)[0]
+        seen[following] = True
+        frontier = list(following)
+    return np.nonzero(seen)[0]
+
+
+def long_run_distribution(transitions: np.ndarray, start: int) -> np.ndarray:
+    """
+    the average share of rounds spent in each state, over an infinite game started in `start`.
+
+    the chain can be reducible (a punitive agent that never forgives) or periodic (two
+    agents alternating), so this is the cesaro limit: the chance of ending up in each
+    closed class times that class's stationary distribution.
+    """
+    n = len(transitions)
+    reach = (transitions > 0) | np.eye(n, dtype=bool)
+    while True:
+        closure = (reach.astype(float) @ reach.astype(float)) > 0
+        if (closure == reach).all():
+            break
+        reach = closure
+    # recurrent states reach back from everywhere they can go
+    recurrent = (~reach | reach.T).all(axis=1)
+    transient = ~recurrent
+
+    if recurrent[start]:
+        arrival = np.zeros(n)
+        arrival[start] = 1.0
+    else:
+        # chance of first entering each recurrent state, through the transient states
+        t = np.nonzero(transient)[0]
+        fundamental = np.linalg.solve(np.eye(len(t)) - transitions[np.ix_(t, t)], transitions[np.ix_(t, recurrent)])
+        arrival = np.zeros(n)
+        arrival[recurrent] = fundamental[list(t).index(start)]
+
+    distribution = np.zeros(n)
+    done = np.zeros(n, bool)
+    for state in np.nonzero(recurrent)[0]:
+        if done[state]:
+            continue
+        members = np.nonzero(recurrent & reach[state])[0]
+        done[members] = True
+        chance = arrival[members].sum()
+        if chance <= 0:
+            continue
+        block = transitions[np.ix_(members, members)]
+        system = np.vstack([block.T - np.eye(len(members)), np.ones(len(members))])
+        target = np.zeros(len(members) + 1)
+        target[-1] = 1.0
+        stationary = np.linalg.lstsq(system, target, rcond=None)[0]
+        distribution[members] = chance * stationary
+    return distribution
+
+
+def markov_payoff(game, row: Any, col: Any, rounds: Optional[int] = None) -> Tuple[float, float]:
+    """
+    expected (row, column) payoff between two strategies, markov or stationary.
+
+    with rounds, the expected totals over a game of that many rounds. without, the
+    long-run payoff per round.
+    """
+    transitions, rewards, start = joint_chain(game, row, col)
+    states = _reachable(transitions, start)
+    transitions = transitions[np.ix_(states, states)]
+    rewards = rewards[states]
+    start = int(np.searchsorted(states, start))
+
+    if rounds is None:
+        r0, r1 = long_run_distribution(transitions, start) @ rewards
+        return float(r0), float(r1)
+    distribution = np.zeros(len(states))
+    distribution[start] = 1.0
+    totals = np.zeros(2)
+    for _ in range(rounds):
+        totals += distribution @ rewards
+        distribution = distribution @ transitions
+    return float(totals[0]), float(totals[1])
+
+
+def population_payoffs(game, rows: Sequence[Any], cols: Optional[Sequence[Any]] = None,
+                       rounds: Optional[int] = None) -> np.ndarray:
+    """
+    expected payoffs of every row strategy against every column strategy, shape
+    (len(rows), len(cols), 2). per round, or totals over `rounds` rounds.
+
+    stationary populations are a single einsum, markov strategies are evaluated pair by pair.
+    """
+    cols = rows if cols is None else cols
+    if any(isinstance(s, TablePolicy) for s in list(rows) + list(cols)):
+        return np.array([[markov_payoff(game, row, col, rounds) for col in cols] for row in rows]).reshape(
+            len(rows), len(cols), 2)
+    weights, payoffs = hidden_payoffs(game)
+    num_hidden, num_rows, num_cols, _ = payoffs.shape
+    x = np.stack([_per_hidden_state(s, num_rows, num_hidden) for s in rows]) if len(rows) else np.zeros((0, num_hidden, num_rows))
+    y = np.stack([_per_hidden_state(s, num_cols, num_hidden) for s in cols]) if len(cols) else np.zeros((0, num_hidden, num_cols))
+    result = np.einsum("h,nha,habp,mhb->nmp", weights, x, payoffs, y)
+    return result if rounds is None else result * rounds
@@ -10,13 +10,18 @@ this module provides the main engine for running games between multiple agents.
 
 import time
 import threading
-from typing import Any, Callable, Dict, Hashable, List, Tuple
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 import random
 import asyncio
 from core.game import ObsDict, ActionDict, RewardDict, BaseGame
 from core.agents.common.base_agent import BaseAgent
+from core.log import get_logger
+from core.fast_forward import CycleDetector, supports_fast_forward
+from core.rng import player_sequences
 
 
+logger = get_logger("engine")
+
 PlayerId = Hashable
 
 
@@ -27,7 +32,8 @@ class MoveTimeout(Exception):
 class Engine:
     """main engine for running games between agents."""
     
-    def __init__(self, game: BaseGame, agents: List[BaseAgent], rounds: int = 100, game_title: str = None):
+    def __init__(self, game: BaseGame, agents: List[BaseAgent], rounds: int = 100, game_title: str = None,
+                 metrics=None, spectator=None, fast_forward: bool = False, seed=None):
         """
         initialize the engine.
         
@@ -35,12 +41,24 @@ class Engine:
             game: the game to run
             agents: list of agents to play the game
             rounds: number of rounds to run
+            metrics: optional server metrics to report rounds, action latency and timeouts to
+            spectator: optional spectator hub (server/spectator.py) to stream every round to
+            fast_forward: skip repeated cycles when the game and all agents declare their state (core/fast_forward.py)
+            seed: passed to game.reset, an int or a SeedSequence/Generator for the game's own random stream (core/rng.py).
+                an int or SeedSequence also seeds the agents that have a reseed method, one child stream per seat
         """
         self.game_title = game_title
         self.game = game
         self.agents = agents
         self.rounds = rounds
         self.cumulative_reward = [0] * len(agents)
+        self.forfeited: List[int] = []  # indices of connected players whose game was forfeited
+        self.metrics = metrics
+        self.spectator = spectator
+        self.spectator_game: Optional[int] = None  # id of this game on the spectator feed
+        self.fast_forward = fast_forward
+        self.seed = seed
+        self.cycles: Optional[CycleDetector] = None  # set per run when fast_forward applies to this game
         
     # async def _get_agent_action(self, agent: BaseAgent, obs: Dict[str, Any]) -> Any:
     #     if hasattr(agent, 'get_action') and asyncio.iscoroutinefunction(agent.get_action):
@@ -92,7 +110,7 @@ class Engine:
             num_rounds = self.rounds
             
         # reset the game
-        obs = self.game.reset()
+        obs = self._reset_game()
         
         # reset all agents and call setup
         for i, agent in enumerate(self.agents):
@@ -105,7 +123,7 @@ class Engine:
                 agent.setup()
         
         # run the game
-        for round_num in range(num_rounds):
+        for round_num in self._rounds(num_rounds):
             # For auction games, generate valuations BEFORE getting actions
             if hasattr(self.game, 'generate_valuations_for_round'):
                 self.game.generate_valuations_for_round()
@@ -126,7 +144,7 @@ class Engine:
                             agent.set_valuations(valuations)
                         except (IndexError, KeyError) as e:
                             # Log error but continue - agent might not need valuations
-                            print(f"Warning: Could not set valuations for agent {i}: {e}")
+                            logger.warning("Could not set valuations for agent %d: %s", i, e)
                             pass
 
 
@@ -191,6 +209,11 @@ class Engine:
                     if opponent_action is not None and hasattr(agent, 'add_opponent_action'):
                         agent.add_opponent_action(opponent_action)
                         agent.add_opponent_reward(opponent_reward)
+                if hasattr(agent, 'observe_actions'):
+                    # table policies (core/policy.py) step their state machine on everyone's actions
+                    agent.observe_actions(i, actions)
+            if self.cycles is not None:
+                self.cycles.record(actions, rewards)
             
             # check if game is done
             if done:
@@ -227,7 +250,7 @@ class Engine:
                         agent.set_valuations(valuations)
                     except (IndexError, KeyError) as e:
                         # Log error but continue - agent might not need valuations
-                        print(f"Warning: Could not set valuations for agent {i}: {e}")
+                        logger.warning("Could not set valuations for agent %d: %s", i, e)
                         pass
         
 
@@ -260,9 +283,35 @@ class Engine:
                 if opponent_action is not None and hasattr(agent, 'add_opponent_action'):
                     agent.add_opponent_action(opponent_action)
                     agent.add_opponent_reward(opponent_reward)
+            if hasattr(agent, 'observe_actions'):
+                # table policies (core/policy.py) step their state machine on everyone's actions
+                agent.observe_actions(i, actions)
         
         return rewards, info
     
+    def _reset_game(self):
+        # agents that draw at random themselves (table policies) get a stream per seat, derived from the game's
+        for agent, seed in zip(self.agents, player_sequences(self.seed, len(self.agents))):
+            if hasattr(agent, 'reseed'):
+                agent.reseed(seed)
+        if self.seed is None:
+            return self.game.reset()
+        return self.game.reset(seed=self.seed)
+
+    def _rounds(self, num_rounds: int):
+        """round numbers for a run, jumping over repeated cycles when fast_forward applies."""
+        self.cycles = None
+        if self.fast_forward and supports_fast_forward(self.game, self.agents):
+            self.cycles = CycleDetector(self.game, self.agents, self.cumulative_reward)
+            return self.cycles.rounds(num_rounds)
+        return range(num_rounds)
+
+    def round_history(self):
+        """(round, actions, rewards) of every round of the last run, only recorded when fast_forward applied."""
+        if self.cycles is None:
+            raise RuntimeError("round history is only recorded for fast-forwarded games")
+        return self.cycles.round_history()
+
     def get_statistics(self) -> Dict[str, Any]:
         """
         get statistics about the current game state.
@@ -295,38 +344,105 @@ class Engine:
         # For server use, agent is a PlayerConnection object
         if hasattr(agent, 'writer') and hasattr(agent, 'reader'):
             # This is a PlayerConnection - send request and wait for response
-            import json
-            import time
-            
-            # Clear any pending action
-            agent.pending_action = None
-            
-            # Send request to client
-            message = {
-                "message": "request_action",
-                "observation": obs
-            }
-            message_str = json.dumps(message) + "\n"
-            agent.writer.write(message_str.encode())
-            await agent.writer.drain()
-            
-            # Wait for response with timeout
-            timeout = 5.0
-            start_time = time.time()
-            while agent.pending_action is None and (time.time() - start_time) < timeout:
-                await asyncio.sleep(0.1)
-            
-            if agent.pending_action is not None:
-                action = agent.pending_action
-                agent.pending_action = None
-                return action
-            else:
-                # Timeout - use default action
-                return self._get_default_action()
+            await self._send_action_request(agent, obs)
+            await self._flush_agents([agent])
+            return await self._await_agent_action(agent)
         else:
             # This is a regular BaseAgent - use synchronous method
             return self._get_agent_action(agent, obs)
-    
+
+    async def _send_action_request(self, agent, obs: Dict[str, Any]):
+        """Queue a request_action message for a connected player."""
+        # Clear any pending action
+        agent.pending_action = None
+        agent.action_received_at = None
+        agent.action_request_id = getattr(agent, 'action_request_id', 0) + 1
+        arrived = getattr(agent, 'action_arrived', None)
+        if arrived is not None:
+            arrived.clear()
+
+        message = {
+            "message": "request_action",
+            "observation": obs,
+            "request_id": agent.action_request_id
+        }
+        agent.action_requested_at = time.monotonic()
+        await self._send_to_agent(agent, message)
+
+    async def _await_agent_action(self, agent) -> Any:
+        """Wait for a connected player's answer to a request_action, default on timeout."""
+        # Wait for response with timeout, give up early if the player got evicted or dropped.
+        # Connections with an action_arrived event are woken by the server, anything else is polled
+        timeout = 5.0
+        deadline = time.monotonic() + timeout
+        arrived = getattr(agent, 'action_arrived', None)
+        while (agent.pending_action is None and getattr(agent, 'alive', True)
+               and getattr(agent, 'connected', True)):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if arrived is None:
+                await asyncio.sleep(min(0.1, remaining))
+                continue
+            try:
+                await asyncio.wait_for(arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+            arrived.clear()
+
+        if agent.pending_action is not None:
+            action = agent.pending_action
+            agent.pending_action = None
+            agent.missed_actions = 0
+            if self.metrics is not None:
+                # time the answer arrived rather than when the poll noticed it
+                received_at = getattr(agent, 'action_received_at', None) or time.monotonic()
+                self.metrics.record_action(received_at - agent.action_requested_at,
+                                           decision_time=getattr(agent, 'decision_time', None),
+                                           client_time=getattr(agent, 'client_time', None))
+            return action
+        elif not getattr(agent, 'connected', True):
+            # connection is down but the session is held open, play the default until they resume
+            if self.metrics is not None:
+                self.metrics.record_action(None, defaulted=True)
+            return self._get_default_action()
+        else:
+            # Timeout - use default action, the server evicts players that keep missing
+            agent.missed_actions = getattr(agent, 'missed_actions', 0) + 1
+            if self.metrics is not None:
+                self.metrics.record_action(None, defaulted=True, timed_out=True)
+            return self._get_default_action()
+
+    async def _get_actions_async(self, obs: Dict[Any, Any]) -> Dict[int, Any]:
+        """
+        Get actions from all agents for one round.
+
+        Requests to connected players are written in one flush per player and
+        answered concurrently, local agents are called directly.
+        """
+        actions = {}
+        connected = []
+        for i, agent in enumerate(self.agents):
+            # get agent-specific observation
+            agent_obs = obs.get(i, {})
+            if hasattr(agent, 'writer') and hasattr(agent, 'reader'):
+                await self._send_action_request(agent, agent_obs)
+                connected.append(i)
+            else:
+                actions[i] = self._get_agent_action(agent, agent_obs)
+
+        if connected:
+            await self._flush_agents([self.agents[i] for i in connected])
+            answers = await asyncio.gather(*(self._await_agent_action(self.agents[i]) for i in connected))
+            actions.update(zip(connected, answers))
+
+        # keep player order
+        actions = {i: actions[i] for i in range(len(self.agents))}
+        for i, agent in enumerate(self.agents):
+            if hasattr(agent, 'action_history'):
+                agent.action_history.append(actions[i])
+        return actions
+
     def _get_default_action(self):
         """Get default action for timeout cases."""
         # Simple default actions based on game type
@@ -347,9 +463,26 @@ class Engine:
         """
         if num_rounds is None:
             num_rounds = self.rounds
-            
+
+        if self.metrics is not None:
+            self.metrics.game_started()
+        if self.spectator is not None:
+            self.spectator_game = self.spectator.game_started(
+                self.game_title, [getattr(agent, 'name', f"player_{i}") for i, agent in enumerate(self.agents)], num_rounds)
+        outcome = "aborted"
+        try:
+            rewards = await self._run_async(num_rounds)
+            outcome = "forfeited" if self.forfeited else "completed"
+            return rewards
+        finally:
+            if self.metrics is not None:
+                self.metrics.game_finished(outcome)
+            if self.spectator is not None:
+                self.spectator.game_finished(self.spectator_game, self.cumulative_reward, self.forfeited)
+
+    async def _run_async(self, num_rounds: int) -> List[float]:
         # reset the game
-        obs = self.game.reset()
+        obs = self._reset_game()
         
         # reset all agents and call setup
         for i, agent in enumerate(self.agents):
@@ -370,7 +503,7 @@ class Engine:
                         agent.setup()
         
         # run the game
-        for round_num in range(num_rounds):
+        for round_num in self._rounds(num_rounds):
             # For auction games, generate valuations BEFORE getting actions
             if hasattr(self.game, 'generate_valuations_for_round'):
                 self.game.generate_valuations_for_round()
@@ -394,7 +527,7 @@ class Engine:
                                 await self._send_agent_valuations(agent, valuations)
                             except (IndexError, KeyError) as e:
                                 # Log error but continue - agent might not need valuations
-                                print(f"Warning: Could not set valuations for agent {i}: {e}")
+                                logger.warning("Could not set valuations for agent %d: %s", i, e)
                                 pass
                     else:
                         # This is a regular BaseAgent - call method directly
@@ -411,18 +544,16 @@ class Engine:
                                 agent.set_valuations(valuations)
                             except (IndexError, KeyError) as e:
                                 # Log error but continue - agent might not need valuations
-                                print(f"Warning: Could not set valuations for agent {i}: {e}")
+                                logger.warning("Could not set valuations for agent %d: %s", i, e)
                                 pass
             
             # get actions from all agents (async for server connections)
-            actions = {}
-            for i, agent in enumerate(self.agents):
-                # get agent-specific observation
-                agent_obs = obs.get(i, {})
-                action = await self._get_agent_action_async(agent, agent_obs)
-                actions[i] = action
-                if hasattr(agent, 'action_history'):
-                    agent.action_history.append(action)
+            actions = await self._get_actions_async(obs)
+
+            # a player evicted mid-game forfeits it, the rest keep what they earned so far
+            self.forfeited = [i for i, agent in enumerate(self.agents) if getattr(agent, 'alive', True) is False]
+            if self.forfeited:
+                break
             
 
 
@@ -452,6 +583,8 @@ class Engine:
             
             # step the game
             obs, rewards, done, info = self.game.step(converted_actions)
+            if self.metrics is not None:
+                self.metrics.round_played()
             
             # update agents with results and track opponent actions
             for i, agent in enumerate(self.agents):
@@ -477,49 +610,75 @@ class Engine:
                     if opponent_action is not None and hasattr(agent, 'add_opponent_action'):
                         agent.add_opponent_action(opponent_action)
                         agent.add_opponent_reward(opponent_reward)
+                if hasattr(agent, 'observe_actions'):
+                    # table policies (core/policy.py) step their state machine on everyone's actions
+                    agent.observe_actions(i, actions)
+
+            if self.cycles is not None:
+                self.cycles.record(actions, rewards)
+
+            if self.spectator is not None:
+                n = len(self.agents)
+                self.spectator.round_played(self.spectator_game, round_num, [actions.get(i) for i in range(n)],
+                                            [rewards.get(i, 0) for i in range(n)], self.cumulative_reward)
             
             # check if game is done
             if done:
                 break
         
+        # updates are buffered until the next action request, push out the last round's
+        await self._flush_agents(self.agents)
+        
         return self.cumulative_reward.copy()
     
+    async def _send_to_agent(self, agent, message: Dict[str, Any]):
+        """
+        Send a message to a connected player.
+
+        Players with a buffered transport get the message on the next flush,
+        anything else is written and drained immediately.
+        """
+        transport = getattr(agent, 'transport', None)
+        if transport is not None:
+            await transport.send(message)
+        else:
+            import json
+            message_str = json.dumps(message) + "\n"
+            agent.writer.write(message_str.encode())
+            await agent.writer.drain()
+
+    async def _flush_agents(self, agents):
+        """Flush buffered messages for connected players, concurrently so one slow socket doesn't hold up the rest."""
+        transports = [agent.transport for agent in agents if getattr(agent, 'transport', None) is not None]
+        if transports:
+            await asyncio.gather(*(transport.flush() for transport in transports), return_exceptions=True)
+
     async def _send_agent_setup(self, agent):
         """Send setup message to connected player."""
-        import json
-        
         message = {
             "message": "agent_setup",
             "game_type": self.game_title
         }
         
         try:
-            message_str = json.dumps(message) + "\n"
-            agent.writer.write(message_str.encode())
-            await agent.writer.drain()
+            await self._send_to_agent(agent, message)
         except Exception as e:
-            print(f"Error sending setup to {agent.name}: {e}")
+            logger.error("Error sending setup to %s: %s", agent.name, e)
     
     async def _send_agent_valuations(self, agent, valuations):
         """Send valuations message to connected player."""
-        import json
-        
         message = {
             "message": "agent_valuations",
             "valuations": valuations
         }
         
         try:
-            message_str = json.dumps(message) + "\n"
-            agent.writer.write(message_str.encode())
-            await agent.writer.drain()
+            await self._send_to_agent(agent, message)
         except Exception as e:
-            print(f"Error sending valuations to {agent.name}: {e}")
+            logger.error("Error sending valuations to %s: %s", agent.name, e)
     
     async def _send_agent_update(self, agent, obs: Dict[str, Any], action: Any, reward: float, done: bool, info: Dict[str, Any]):
         """Send update message to connected player."""
-        import json
-        
         message = {
             "message": "agent_update",
             "observation": obs,
@@ -530,11 +689,9 @@ class Engine:
         }
         
         try:
-            message_str = json.dumps(message) + "\n"
-            agent.writer.write(message_str.encode())
-            await agent.writer.drain()
+            await self._send_to_agent(agent, message)
         except Exception as e:
-            print(f"Error sending update to {agent.name}: {e}")
+            logger.error("Error sending update to %s: %s", agent.name, e)
     
     async def run_single_round_async(self) -> Tuple[List[float], Dict[str, Any]]:
         """
@@ -565,7 +722,7 @@ class Engine:
                             await self._send_agent_valuations(agent, valuations)
                         except (IndexError, KeyError) as e:
                             # Log error but continue - agent might not need valuations
-                            print(f"Warning: Could not set valuations for agent {i}: {e}")
+                            logger.warning("Could not set valuations for agent %d: %s", i, e)
                             pass
                 else:
                     # This is a regular BaseAgent - call method directly
@@ -582,17 +739,11 @@ class Engine:
                             agent.set_valuations(valuations)
                         except (IndexError, KeyError) as e:
                             # Log error but continue - agent might not need valuations
-                            print(f"Warning: Could not set valuations for agent {i}: {e}")
+                            logger.warning("Could not set valuations for agent %d: %s", i, e)
                             pass
         
         # get actions from all agents (async for server connections)
-        actions = {}
-        for i, agent in enumerate(self.agents):
-            agent_obs = obs.get(i, {})
-            action = await self._get_agent_action_async(agent, agent_obs)
-            actions[i] = action
-            if hasattr(agent, 'action_history'):
-                agent.action_history.append(action)
+        actions = await self._get_actions_async(obs)
         
         # step the game
         obs, rewards, done, info = self.game.step(actions)
@@ -619,5 +770,10 @@ class Engine:
                 if opponent_action is not None and hasattr(agent, 'add_opponent_action'):
                     agent.add_opponent_action(opponent_action)
                     agent.add_opponent_reward(opponent_reward)
+            if hasattr(agent, 'observe_actions'):
+                # table policies (core/policy.py) step their state machine on everyone's actions
+                agent.observe_actions(i, actions)
+        
+        await self._flush_agents(self.agents)
         
         return rewards, info
\ No newline at end of file
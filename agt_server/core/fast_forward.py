@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+cycle-detection fast-forward for deterministic repeated games.
+
+a game between deterministic finite-state agents (stubborn vs tit-for-tat, two table
+policies, ...) falls into a cycle within a few rounds, and every round after that is
+a repeat. agents and games opt in by declaring a hashable state:
+
+- agent.state_key(): everything the agent's next action and next state depend on,
+  besides what the game's state_key covers. None means "can't promise right now"
+  (e.g. the agent is about to randomize), detection then starts over from the next round
+- game.state_key(), game.rounds_left() and game.skip_rounds(n, rewards)
+
+before every round the engine looks up (game state, agent states). when a joint state
+comes back, the rounds between the two visits are a cycle: whole repeats of it are
+skipped, their payoff added in one go, and the last partial cycle is played normally
+so the final round (done, last updates) goes through the usual path. O(rounds)
+becomes O(cycle length).
+
+skipped rounds never reach the agents (no update calls, no action_history entries),
+engine.round_history() rebuilds them lazily from the recorded cycle.
+"""
+
+import itertools
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def supports_fast_forward(game, agents) -> bool:
+    """whether the game and every agent declare their state."""
+    return (all(hasattr(game, name) for name in ("state_key", "rounds_left", "skip_rounds"))
+            and all(hasattr(agent, "state_key") for agent in agents))
+
+
+class CycleDetector:
+    """drives the engine's round loop and jumps over repeated cycles."""
+
+    def __init__(self, game, agents: List[Any], totals: List[float]):
+        self.game = game
+        self.agents = agents
+        self.totals = totals  # the engine's cumulative rewards, updated in place on a skip
+        self.active = True
+        self.seen: Dict[Any, int] = {}
+        self.history: List[Tuple[Dict[int, Any], Dict[int, float]]] = []  # (actions, rewards) of played rounds
+        self.skip: Optional[Tuple[int, int, int]] = None  # (round skipped at, cycle start, repeats)
+
+    def _key(self) -> Optional[Tuple]:
+        game_key = self.game.state_key()
+        if game_key is None:
+            return None
+        keys = [game_key]
+        for agent in self.agents:
+            key = agent.state_key()
+            if key is None:
+                return None
+            keys.append(key)
+        return tuple(keys)
+
+    def rounds(self, num_rounds: int) -> Iterator[int]:
+        """the round numbers to play, with any cycle already jumped over."""
+        round_num = 0
+        while round_num < num_rounds:
+            if self.active:
+                round_num += self._check(round_num, num_rounds)
+            yield round_num
+            round_num += 1
+
+    def record(self, actions: Dict[int, Any], rewards: Dict[int, float]):
+        """called by the engine after every round it plays."""
+        self.history.append((actions, rewards))
+
+    def _check(self, round_num: int, num_rounds: int) -> int:
+        try:
+            key = self._key()
+            start = self.seen.get(key) if key is not None else None
+        except TypeError:  # an unhashable state, don't try again
+            self.active = False
+            return 0
+        if key is None:
+            # a random step, nothing before it can be part of a deterministic cycle
+            self.seen.clear()
+            return 0
+        if start is None:
+            self.seen[key] = round_num
+            return 0
+
+        # the same joint state as at round `start`, so rounds start..round_num-1 repeat forever
+        self.active = False
+        length = round_num - start
+        remaining = min(num_rounds - round_num, self.game.rounds_left())
+        repeats = (remaining - 1) // length  # leave at least the last round to play normally
+        if repeats <= 0:
+            return 0
+        cycle = [0.0] * len(self.agents)
+        for _, rewards in self.history[start:round_num]:
+            for i in range(len(cycle)):
+                cycle[i] += rewards.get(i, 0)
+        skipped = [total * repeats for total in cycle]
+        for i, reward in enumerate(skipped):
+            self.totals[i] += reward
+        self.game.skip_rounds(length * repeats, skipped)
+        self.skip = (round_num, start, repeats)
+        return length * repeats
+
+    def round_history(self) -> Iterator[Tuple[int, Dict[int, Any], Dict[int, float]]]:
+        """(round, actions, rewards) for every round, skipped ones rebuilt from the cycle."""
+        if self.skip is None:
+            played = iter(self.history)
+        else:
+            at, start, repeats = self.skip
+            played = itertools.chain(self.history[:at],
+                                     itertools.chain.from_iterable(itertools.repeat(self.history[start:at], repeats)),
+                                     self.history[at:])
+        for round_num, (actions, rewards) in enumerate(played):
+            yield round_num, actions, rewards
@@ -1,12 +1,12 @@
 # games/adx_one_day.py
 from typing import Dict, List, Optional, Tuple, Any
-import random
 from core.game.market_segment import MarketSegment
 from core.game.campaign import Campaign
 from core.game.bid_entry import SimpleBidEntry
 from dataclasses import dataclass, field
 from core.game.base_game import BaseGame
 from core.game import ObsDict, ActionDict, RewardDict, InfoDict
+from core.rng import BlockSampler, make_rng, choice, shuffled
 
 # --- OneDayBidBundle ---
 @dataclass
@@ -109,12 +109,17 @@ class AdxOneDayGame(BaseGame):
         self.bid_bundles: Dict[int, OneDayBidBundle] = {}
         self.user_arrivals: List[MarketSegment] = [] #the actual user segments that will arrive that agents can bid on
         self.agent_campaigns: Dict[int, Campaign] = {} #the campaign of each agent, which will determine the market segment they want to bid on
+        self._seed_rng(None)
         self._generate_user_arrivals()
         self.metadata = {"num_players": num_agents}
 
-    def reset(self, seed: Optional[int] = None) -> Dict[int, Dict]:
-        if seed is not None:
-            random.seed(seed)
+    def _seed_rng(self, seed) -> None:
+        self.rng = make_rng(seed) #per-game random stream
+        self._tie_breaks = BlockSampler(self.rng.random, block=4096)
+
+    def reset(self, seed=None) -> Dict[int, Dict]:
+        #seed is anything core.rng.make_rng takes
+        self._seed_rng(seed)
         self.campaigns.clear()
         self.bid_bundles.clear()
         self.agent_campaigns.clear()
@@ -248,17 +253,17 @@ class AdxOneDayGame(BaseGame):
     def _generate_campaign(self, agent_id: int) -> Campaign:
         # Pick a random segment with at least two attributes
         eligible_segments = [s for s in MarketSegment if len(s.value.split('_')) >= 2]
-        segment = random.choice(eligible_segments)
+        segment = choice(self.rng, eligible_segments)
         avg_users = self.USER_FREQUENCIES.get(segment, 1000)
-        reach = int(avg_users * random.choice(self.REACH_FACTORS))
+        reach = int(avg_users * choice(self.rng, self.REACH_FACTORS))
         budget = float(reach)  # $1 per impression
         return Campaign(id=agent_id, market_segment=segment, reach=reach, budget=budget)
 
     def _generate_user_arrivals(self):
-        self.user_arrivals = []
+        arrivals = []
         for segment, count in self.USER_FREQUENCIES.items():
-            self.user_arrivals.extend([segment] * count)
-        random.shuffle(self.user_arrivals)
+            arrivals.extend([segment] * count)
+        self.user_arrivals = shuffled(self.rng, arrivals)
 
     def _validate_actions(self, actions: Dict[int, OneDayBidBundle]):
         if set(actions.keys()) != set(range(self.num_agents)):
@@ -295,7 +300,8 @@ class AdxOneDayGame(BaseGame):
                 continue
             # Find highest and second-highest bid
             # Sort by bid amount (descending), then randomly for ties
-            bids.sort(key=lambda x: (x[1], random.random()), reverse=True)
+            tie_breaks = self._tie_breaks
+            bids.sort(key=lambda x: (x[1], tie_breaks()), reverse=True)
             winner_id, win_bid, win_segment = bids[0]
             price = bids[1][1] if len(bids) > 1 else 0.0
             
@@ -4,7 +4,7 @@ from core.game import ObsDict, ActionDict, RewardDict, InfoDict
 from core.game.base_game import BaseGame
 from core.stage.AdxTwoDayStage import AdxTwoDayStage, TwoDaysBidBundle
 from core.game.campaign import Campaign
-import random
+from core.rng import make_rng
 
 
 class AdxTwoDayGame(BaseGame):
@@ -22,16 +22,16 @@ class AdxTwoDayGame(BaseGame):
         super().__init__()
         self._num_players = num_players
         self.rival_sampler = rival_sampler
-        self.stage = AdxTwoDayStage(num_players, rival_sampler)
+        self.rng = make_rng(None)
+        self.stage = AdxTwoDayStage(num_players, rival_sampler, rng=self.rng)
         self.metadata = {"num_players": num_players}
 
-    def reset(self, seed: Optional[int] = None) -> ObsDict:
-        """Reset the game for a new tournament."""
-        if seed is not None:
-            random.seed(seed)
+    def reset(self, seed=None) -> ObsDict:
+        """Reset the game for a new tournament, seed is anything core.rng.make_rng takes."""
+        self.rng = make_rng(seed)
         
-        # Create new stage instance
-        self.stage = AdxTwoDayStage(self._num_players, self.rival_sampler)
+        # Create new stage instance, it draws from the game's random stream
+        self.stage = AdxTwoDayStage(self._num_players, self.rival_sampler, rng=self.rng)
         
         # Prepare initial observations for day 1
         obs = {}
@@ -1,7 +1,7 @@
 from typing import Dict, Set, Callable, List, Tuple, Any
-import random
 import itertools
 from .base_game import BaseGame, PlayerId, ObsDict, ActionDict, RewardDict, InfoDict
+from core.rng import BlockSampler, make_rng
 
 
 class AuctionGame(BaseGame):
@@ -53,6 +53,18 @@ class AuctionGame(BaseGame):
         
         # Current valuations for each player (set each round)
         self.current_valuations = {player: [0] * len(goods) for player in self.players}
+
+        # per-game random stream, valuations are drawn a block of rounds at a time
+        self._seed_rng(None)
+
+    def _seed_rng(self, seed) -> None:
+        self.rng = make_rng(seed)
+        # goods in a fixed order, set iteration order changes between processes
+        self._valuation_goods = sorted(self.goods)
+        low, high = self.value_range
+        shape = (self._num_players, len(self._valuation_goods))
+        self._valuation_draws = BlockSampler(lambda n: self.rng.integers(low, high + 1, size=(n,) + shape),
+                                             block=min(max(self.num_rounds, 1), 1024))
         
     def roundwise_reset(self) -> None:
         """
@@ -68,11 +80,10 @@ class AuctionGame(BaseGame):
         """
         from itertools import combinations
         
-        for player in self.players:
+        draws = self._valuation_draws()
+        for player, values in zip(self.players, draws):
             # Generate individual good valuations
-            valuations = {}
-            for good in self.goods:
-                valuations[good] = random.randint(self.value_range[0], self.value_range[1])
+            valuations = dict(zip(self._valuation_goods, values))
             
             # Store valuations in the format expected by agents
             for good, value in valuations.items():
@@ -270,9 +281,8 @@ class AuctionGame(BaseGame):
         }
     
     def reset(self, seed: int | None = None) -> ObsDict:
-        """Reset the game state."""
-        if seed is not None:
-            random.seed(seed)
+        """Reset the game state, seed is anything core.rng.make_rng takes."""
+        self._seed_rng(seed)
         
         self.current_round = 0
         self.bid_history = []
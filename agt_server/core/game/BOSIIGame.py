@@ -1,36 +1,48 @@
 import numpy as np
+from core.rng import make_rng
 from core.game.base_game import BaseGame, ObsDict, ActionDict, RewardDict, InfoDict
 from core.stage.BaseStage import BaseStage
 
 
+GOOD_MOOD, BAD_MOOD = 0, 1
+
+# Payoff matrices for different moods, built once and shared by every stage
+PAYOFFS = {
+    GOOD_MOOD: np.array([
+        # Compromise vs Compromise, Stubborn
+        [[0.0, 0.0], [3.0, 7.0]],
+        # Stubborn vs Compromise, Stubborn
+        [[7.0, 3.0], [0.0, 0.0]]
+    ]),
+    BAD_MOOD: np.array([
+        # Compromise vs Compromise, Stubborn
+        [[0.0, 3.0], [3.0, 0.0]],
+        # Stubborn vs Compromise, Stubborn
+        [[7.0, 0.0], [0.0, 7.0]]
+    ])
+}
+for _payoffs in PAYOFFS.values():
+    _payoffs.setflags(write=False)
+
+# the same payoffs as nested tuples of python floats, TABLES[mood][row][col] == (r0, r1)
+TABLES = tuple(tuple(tuple(tuple(cell) for cell in row) for row in PAYOFFS[mood].tolist())
+               for mood in (GOOD_MOOD, BAD_MOOD))
+
+
 class BOSIIStage(BaseStage):
     """
     Single stage of Battle of the Sexes with Incomplete Information.
     
     The column player has a mood (GOOD_MOOD or BAD_MOOD) that affects payoffs.
     Row player doesn't know the column player's mood.
+
+    The payoff tables are static, so one stage can be played every round with a new mood.
     """
     
     def __init__(self):
         super().__init__(num_players=2)
-        self.GOOD_MOOD, self.BAD_MOOD = 0, 1
-        
-        # Payoff matrices for different moods
-        self.payoffs = {
-            self.GOOD_MOOD: np.array([
-                # Compromise vs Compromise, Stubborn
-                [[0.0, 0.0], [3.0, 7.0]],
-                # Stubborn vs Compromise, Stubborn  
-                [[7.0, 3.0], [0.0, 0.0]]
-            ]),
-            self.BAD_MOOD: np.array([
-                # Compromise vs Compromise, Stubborn
-                [[0.0, 3.0], [3.0, 0.0]],
-                # Stubborn vs Compromise, Stubborn
-                [[7.0, 0.0], [0.0, 7.0]]
-            ])
-        }
-        
+        self.GOOD_MOOD, self.BAD_MOOD = GOOD_MOOD, BAD_MOOD
+        self.payoffs = PAYOFFS
         self.action_labels = ["Compromise", "Stubborn"]
         self.column_mood = None  # Will be set when stage starts
     
@@ -42,15 +54,17 @@ class BOSIIStage(BaseStage):
         self.column_mood = mood
     
     def step(self, actions: ActionDict) -> tuple[ObsDict, RewardDict, bool, InfoDict]:
-        # Validate actions
-        self._validate_actions(actions, expected_players=[0, 1])
-        row_action, col_action = actions[0], actions[1]
-        
         # Get payoffs based on column player's mood
-        payoffs = self.payoffs[self.column_mood]  # type: ignore
-        row_reward, col_reward = payoffs[row_action, col_action]
+        try:
+            if len(actions) != 2:
+                raise KeyError
+            row_reward, col_reward = TABLES[self.column_mood][actions[0]][actions[1]]  # type: ignore
+        except (KeyError, IndexError, TypeError):
+            # only the error path pays for the full check
+            self._validate_actions(actions, expected_players=[0, 1])
+            raise ValueError(f"illegal actions {actions!r}, legal actions are [0, 1]")
         
-        reward: RewardDict = {0: float(row_reward), 1: float(col_reward)}
+        reward: RewardDict = {0: row_reward, 1: col_reward}
         
         # Stage ends immediately
         self._done = True
@@ -72,26 +86,39 @@ class BOSIIGame(BaseGame):
     - BAD_MOOD (probability 1/3): Modified payoffs
     
     The row player (player 0) doesn't know the column player's mood.
+
+    The whole mood sequence is drawn at reset from a per-game numpy Generator and kept
+    in `self.moods` (one entry per round) for replays and analysis. reset(seed) takes
+    anything core.rng.make_rng does.
     """
     
     def __init__(self, rounds: int = 1000):
         self.rounds = rounds
         self.t = 0
-        self.stage = None
+        self.stage = BOSIIStage()
         self.metadata = {"num_players": 2}
-        self.GOOD_MOOD, self.BAD_MOOD = 0, 1
+        self.GOOD_MOOD, self.BAD_MOOD = GOOD_MOOD, BAD_MOOD
         
         # Column player mood probabilities
         self.good_mood_prob = 2/3
         self.bad_mood_prob = 1/3
         
+        self.rng = make_rng(None)
+        self.moods = np.zeros(0, dtype=np.int8)  # column mood of every round, drawn at reset
+        self._moods = []
+
         # Track action history for observations
         self.last_actions = {0: None, 1: None}
     
+    def _draw_moods(self, rounds: int) -> np.ndarray:
+        # one uniform draw per round, bad mood below bad_mood_prob
+        return (self.rng.random(rounds) < self.bad_mood_prob).astype(np.int8)
+
     def reset(self, seed=None) -> ObsDict:
         self.t = 0
-        if seed is not None:
-            np.random.seed(seed)
+        self.rng = make_rng(seed)
+        self.moods = self._draw_moods(self.rounds)
+        self._moods = self.moods.tolist()
         # Reset action history
         self.last_actions = {0: None, 1: None}
         # Provide initial observations with no opponent action yet
@@ -104,13 +131,13 @@ class BOSIIGame(BaseGame):
         # Store current actions for next round's observations
         self.last_actions = actions.copy()
         
-        # Create new stage with random column mood
-        self.stage = BOSIIStage()
-        column_mood = np.random.choice(
-            [self.GOOD_MOOD, self.BAD_MOOD], 
-            p=[self.good_mood_prob, self.bad_mood_prob]
-        )
-        self.stage.set_column_mood(column_mood)
+        # Play the stage in this round's mood
+        if self.t >= len(self._moods):
+            # played past the rounds (or without a reset), draw more moods
+            extra = self._draw_moods(max(self.rounds, 1))
+            self.moods = np.concatenate([self.moods, extra])
+            self._moods.extend(extra.tolist())
+        self.stage.set_column_mood(self._moods[self.t])
         
         # Run the stage
         obs, reward, _, info = self.stage.step(actions)
@@ -1,7 +1,69 @@
 from .base_game import BaseGame, ObsDict, ActionDict, RewardDict, InfoDict, PlayerId
+from functools import lru_cache
 from typing import List, Tuple, cast
 import numpy as np
 
+# largest number of joint positions (M ** K) that gets a payoff table, bigger games compute utilities as they go
+TABLE_LIMIT = 10 ** 6
+# joint positions evaluated at once by joint_utils, bounds its (joints, K, M) intermediates
+_CHUNK = 4096
+
+
+def payoff_table(num_players: int = 3, num_positions: int = 12) -> np.ndarray:
+    """
+    the cups every player sells for every joint position, shape (M,) * K + (K,) for K
+    players on M positions, so payoff_table()[a1, a2, a3] are the three utilities.
+
+    built once per process and shared (read only). it is dense, M ** K joint positions,
+    which is 1728 for the lab game. games over TABLE_LIMIT raise ValueError, use
+    joint_utils for those.
+    """
+    num_players, num_positions = int(num_players), int(num_positions)
+    if not has_table(num_players, num_positions):
+        raise ValueError(f"{num_positions} ** {num_players} joint positions is over the payoff table limit of {TABLE_LIMIT}")
+    return _build_table(num_players, num_positions)
+
+
+def has_table(num_players: int, num_positions: int) -> bool:
+    """whether payoff_table builds a table for this many players and positions."""
+    return num_positions ** num_players <= TABLE_LIMIT
+
+
+def joint_utils(joints, num_positions: int) -> np.ndarray:
+    """
+    utilities for an (N, K) array of valid joint positions, straight from the rules.
+
+    the same numbers the payoff table holds, worked out _CHUNK joint positions at a time.
+    """
+    joints = np.asarray(joints, dtype=np.intp)
+    m = num_positions
+    utils = np.zeros(joints.shape, dtype=float)
+    beachgoers = np.arange(m)[None, None, :]
+    for start in range(0, len(joints), _CHUNK):
+        chunk = joints[start:start + _CHUNK]
+        diff = (beachgoers - chunk[:, :, None]) % m
+        dists = np.minimum(diff, m - diff)  # (joint, player, beachgoer)
+        closest = dists == dists.min(axis=1, keepdims=True)
+        shares = closest * (2.0 / closest.sum(axis=1, keepdims=True))
+        # beachgoer by beachgoer, the same order of additions as the one at a time rules, so the floats match exactly
+        for beachgoer in range(m):
+            utils[start:start + _CHUNK] += shares[:, :, beachgoer]
+    return utils
+
+
+@lru_cache(maxsize=None)
+def _build_table(k: int, m: int) -> np.ndarray:
+    joints = np.indices((m,) * k).reshape(k, -1).T  # every joint position, one per row
+    table = joint_utils(joints, m).reshape((m,) * k + (k,))
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def _payoff_rows(k: int, m: int) -> List[Tuple[float, ...]]:
+    # the table as python tuples by flat joint position, for one step at a time
+    return [tuple(row) for row in _build_table(k, m).reshape(-1, k).tolist()]
+
 
 class LemonadeGame(BaseGame):
     """
@@ -11,20 +73,34 @@ class LemonadeGame(BaseGame):
     - If all three players choose the same position: each gets 8 points
     - If two players choose the same position: they each get 6, the third gets 12
     - If all choose different positions: the player in the middle gets the most points
+
+    num_players and num_positions play the same rules with K stands on a beach of M
+    positions. payoffs are looked up in payoff_table(K, M), or computed with joint_utils
+    when M ** K is over TABLE_LIMIT (payoff_table is None then).
     """
     
-    def __init__(self, rounds: int = 1000):
-        self.valid_actions = list(range(12))  # Positions 0-11
+    def __init__(self, rounds: int = 1000, num_players: int = 3, num_positions: int = 12):
+        self.valid_actions = list(range(num_positions))  # Positions 0-11
         self.game_name = "Lemonade Stand"
         self.rounds = rounds
         self.current_round = 0
-        self.cumulative_rewards = {0: 0.0, 1: 0.0, 2: 0.0}
+        self.n = num_players
+        self.num_positions = num_positions
+        self.cumulative_rewards = {i: 0.0 for i in range(num_players)}
         self.metadata = {
-            "num_players": 3,
+            "num_players": num_players,
             "num_rounds": rounds,
             "game_name": self.game_name,
             "valid_actions": self.valid_actions
         }
+        if has_table(num_players, num_positions):
+            self.payoff_table = payoff_table(num_players, num_positions)
+            self._rows = _payoff_rows(num_players, num_positions)
+        else:
+            self.payoff_table = None
+            self._rows = None
+        self._strides = [num_positions ** (num_players - 1 - i) for i in range(num_players)]
+        self._positions = {p: p for p in self.valid_actions}  # also maps 5.0 or np.int64(5) to 5
         
     def calculate_utils(self, actions):
         """
@@ -33,40 +109,60 @@ class LemonadeGame(BaseGame):
         - Each beachgoer buys 2 cups, split among the closest stand(s).
         - Each player's utility is the sum of cups they receive from all positions.
         """
-        if len(actions) != 3:
-            raise ValueError("Lemonade Stand requires exactly 3 players")
-        
-        # Handle invalid actions (as before)
-        a1, a2, a3 = actions
-        if a1 not in self.valid_actions and a2 not in self.valid_actions and a3 not in self.valid_actions:
-            return [0, 0, 0]
-        elif a1 not in self.valid_actions and a2 not in self.valid_actions:
-            return [0, 0, 24]
-        elif a1 not in self.valid_actions and a3 not in self.valid_actions:
-            return [0, 24, 0]
-        elif a2 not in self.valid_actions and a3 not in self.valid_actions:
-            return [24, 0, 0]
-        elif a1 not in self.valid_actions:
-            return [0, 12, 12]
-        elif a2 not in self.valid_actions:
-            return [12, 0, 12]
-        elif a3 not in self.valid_actions:
-            return [12, 12, 0]
-
-        # Simulate the 12 beachgoers
-        player_positions = [a1, a2, a3]
-        utils = [0.0, 0.0, 0.0]
-        for beachgoer in range(12):
-            # Compute distances to each stand
-            dists = [min((beachgoer - pos) % 12, (pos - beachgoer) % 12) for pos in player_positions]
-            min_dist = min(dists)
-            # Find all players at min_dist
-            closest = [i for i, d in enumerate(dists) if d == min_dist]
-            # Split 2 cups among closest
-            for i in closest:
-                utils[i] += 2.0 / len(closest)
+        if len(actions) != self.n:
+            raise ValueError(f"Lemonade Stand requires exactly {self.n} players")
+
+        flat = 0
+        try:
+            for action, stride in zip(actions, self._strides):
+                flat += self._positions[action] * stride
+        except (KeyError, TypeError):
+            return self._forfeit_utils(actions)
+        if self._rows is None:
+            return joint_utils([[self._positions[action] for action in actions]], self.num_positions)[0].tolist()
+        return list(self._rows[flat])
+
+    def _forfeit_utils(self, actions):
+        # players with invalid actions get nothing, the others split all the cups evenly
+        valid = []
+        for action in actions:
+            try:
+                valid.append(action in self._positions)
+            except TypeError:
+                valid.append(False)
+        if not any(valid):
+            return [0.0] * self.n
+        share = 2.0 * self.num_positions / sum(valid)
+        return [share if ok else 0.0 for ok in valid]
+
+    def calculate_utils_batch(self, actions_array) -> np.ndarray:
+        """
+        utilities for many joint actions at once: an (N, num_players) array of positions
+        in, an (N, num_players) array of utilities out, with the same rules as calculate_utils.
+        """
+        actions = np.asarray(actions_array)
+        if actions.ndim != 2 or actions.shape[1] != self.n:
+            raise ValueError(f"expected an (N, {self.n}) array of positions, got shape {actions.shape}")
+        valid = (actions >= 0) & (actions < self.num_positions)
+        if not np.issubdtype(actions.dtype, np.integer):
+            valid &= actions == np.floor(actions)
+        if valid.all():
+            # the usual case, no forfeits to patch
+            return self._lookup(actions.astype(np.intp))
+
+        utils = self._lookup(np.where(valid, actions, 0).astype(np.intp))
+        forfeits = ~valid.all(axis=1)
+        ok = valid[forfeits]
+        count = ok.sum(axis=1, keepdims=True)
+        utils[forfeits] = np.where(ok, 2.0 * self.num_positions / np.maximum(count, 1), 0.0)
         return utils
     
+    def _lookup(self, positions: np.ndarray) -> np.ndarray:
+        # utilities of valid joint positions, from the table if the game has one
+        if self.payoff_table is None:
+            return joint_utils(positions, self.num_positions)
+        return np.take(self.payoff_table.reshape(-1, self.n), positions @ self._strides, axis=0)
+
     def get_valid_actions(self):
         """Return the list of valid actions (positions 0-11)."""
         return self.valid_actions.copy()
@@ -77,52 +173,49 @@ class LemonadeGame(BaseGame):
             "name": self.game_name,
             "num_players": self.num_players(),
             "valid_actions": self.valid_actions,
-            "description": "3-player game where players choose positions 0-11 on a circular board"
+            "description": f"{self.n}-player game where players choose positions 0-{self.num_positions - 1} on a circular board"
         }
     
     def reset(self, seed: int | None = None) -> ObsDict:
         """Reset the game to initial state."""
-        if seed is not None:
-            import random
-            random.seed(seed)
-        
+        # lemonade is deterministic, there is nothing to seed
         self.current_round = 0
-        self.cumulative_rewards = {0: 0.0, 1: 0.0, 2: 0.0}
+        self.cumulative_rewards = {i: 0.0 for i in range(self.n)}
         
         # Initialize empty observations for all players
-        obs = {i: {"valid_actions": self.valid_actions} for i in range(3)}
+        obs = {i: {"valid_actions": self.valid_actions} for i in range(self.n)}
         return cast(ObsDict, obs)
     
     def players_to_move(self) -> List[PlayerId]:
         """Return the list of players who need to move (all players in simultaneous game)."""
-        return cast(List[PlayerId], list(range(3)))
+        return cast(List[PlayerId], list(range(self.n)))
     
     def step(self, actions: ActionDict) -> Tuple[ObsDict, RewardDict, bool, InfoDict]:
         """Execute one step of the game."""
         # Extract actions in order
-        action_list = [actions[i] for i in range(3)]
+        action_list = [actions[i] for i in range(self.n)]
         
         # Calculate utilities
         utils = self.calculate_utils(action_list)
         
         # Create reward dict
-        rewards = {i: float(utils[i]) for i in range(3)}
+        rewards = {i: float(utils[i]) for i in range(self.n)}
         
         # Accumulate rewards
-        for i in range(3):
+        for i in range(self.n):
             self.cumulative_rewards[i] += rewards[i]
         
         # Increment round counter
         self.current_round += 1
         
         # Create observations (same for all players in this simple game)
-        obs = {i: {"valid_actions": self.valid_actions} for i in range(3)}
+        obs = {i: {"valid_actions": self.valid_actions} for i in range(self.n)}
         
         # Check if game is done
         done = self.current_round >= self.rounds
         
         # Create info dict
-        info = {i: {"actions": action_list, "utilities": utils, "round": self.current_round} for i in range(3)}
+        info = {i: {"actions": action_list, "utilities": utils, "round": self.current_round} for i in range(self.n)}
         
         # Return cumulative rewards if done, individual rewards otherwise
         if done:
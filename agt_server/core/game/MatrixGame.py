@@ -29,7 +29,9 @@ class MatrixGame(BaseGame):
     def reset(self, seed=None) -> ObsDict:
         self.t = 0
         self.cumulative_rewards = {0: 0.0, 1: 0.0}
-        self.stage = MatrixStage(self.payoff_tensor)
+        #the stage is stateless between rounds, so one per game is enough
+        if self.stage is None:
+            self.stage = self._init_stage()
         self.metadata["num_players"] = self.stage.n
         # Reset action history
         self.last_actions = {0: None, 1: None}
@@ -39,30 +41,50 @@ class MatrixGame(BaseGame):
     def players_to_move(self):
         return [0,1]
 
+    # fast-forward hooks (core/fast_forward.py), the observations only depend on the last actions and the round
+
+    def state_key(self):
+        return (self.last_actions[0], self.last_actions[1])
+
+    def rounds_left(self) -> int:
+        return self.rounds - self.t
+
+    def skip_rounds(self, rounds: int, rewards):
+        self.t += rounds
+        self.cumulative_rewards[0] += rewards[0]
+        self.cumulative_rewards[1] += rewards[1]
+
     def step(
         self,
         actions: ActionDict
     ) -> Tuple[ObsDict, RewardDict, bool, InfoDict]:
+        # one lookup in the stage's payoff table, this runs millions of times in training loops
+        r0, r1 = self.stage.play(actions)
+        a0 = actions[0]
+        a1 = actions[1]
+
         # Store current actions for next round's observations
-        self.last_actions = actions.copy()
-        
-        obs, rew, _, info = self.stage.step(actions)
-        
+        last_actions = self.last_actions
+        last_actions[0] = a0
+        last_actions[1] = a1
+
         # accumulate rewards
-        for player in [0, 1]:
-            self.cumulative_rewards[player] += rew[player]
-        
+        cumulative = self.cumulative_rewards
+        cumulative[0] += r0
+        cumulative[1] += r1
+
         self.t += 1
         done = self.t >= self.rounds
-        
-        if not done:
-            # Create new stage for next round
-            self.stage = MatrixStage(self.payoff_tensor)
+
+        # observations are fresh dicts, agents keep them in their observation history
+        if done:
+            obs = {0: {"round_complete": True}, 1: {"round_complete": True}}
+        else:
             # observations with opponent's last action for next round
             obs = {
-                0: {"round": self.t, "opponent_last_action": self.last_actions[1]},
-                1: {"round": self.t, "opponent_last_action": self.last_actions[0]}
+                0: {"round": self.t, "opponent_last_action": a1},
+                1: {"round": self.t, "opponent_last_action": a0}
             }
-        
+
         # return awards and actions oflast opponent
-        return obs, rew, done, info
+        return obs, {0: r0, 1: r1}, done, {}
@@ -0,0 +1,94 @@
+from typing import List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from core.game.base_game import BaseGame, ObsDict, ActionDict, RewardDict, InfoDict
+from core.stage.NormalFormStage import NormalFormStage
+
+
+class NormalFormGame(BaseGame):
+    """
+    Run the same n player NormalFormStage for `rounds` iterations and sum payoffs.
+
+    the general version of MatrixGame: any number of players, any number of actions
+    each, a dense (hidden_states, A1, ..., An, n) tensor or sparse payoffs. a new lab
+    is a payoff tensor instead of a new game class:
+
+        NormalFormGame(tensor, rounds=1000)
+        NormalFormGame(sparse_payoffs={(0, 0, 3): (1, 2, 0), ...}, num_actions=[10] * 3)
+
+    every player observes the round and the last joint action as one tuple in seat
+    order, {"round": t, "last_actions": (a0, ..., an-1)}. the tuple is shared between
+    the players and never modified.
+    """
+
+    def __init__(
+        self,
+        payoff_tensor: np.ndarray | None = None,
+        rounds: int = 1000,
+        sparse_payoffs: Mapping[Tuple[int, ...], Sequence[float]] | None = None,
+        num_actions: Sequence[int] | None = None,
+        default_payoff: float | Sequence[float] = 0.0,
+        hidden_idx: int = 0,
+        action_labels: Sequence[Sequence[str]] | None = None,
+    ):
+        self.stage = NormalFormStage(payoff_tensor, hidden_idx, action_labels, sparse_payoffs, num_actions,
+                                     default_payoff)
+        if payoff_tensor is not None:
+            self.payoff_tensor = payoff_tensor
+        self.rounds = rounds
+        self.t = 0
+        self.n = self.stage.n
+        self.num_actions = list(self.stage.num_actions)
+        self._players = list(range(self.n))
+        self.metadata = {"num_players": self.n, "num_actions": self.num_actions, "num_rounds": rounds}
+        self.cumulative_rewards = dict.fromkeys(self._players, 0.0)
+        self.last_actions: Tuple[int, ...] | None = None
+
+    # overrides
+
+    def reset(self, seed=None) -> ObsDict:
+        self.t = 0
+        self.cumulative_rewards = dict.fromkeys(self._players, 0.0)
+        self.last_actions = None
+        self.metadata["num_players"] = self.n
+        return {i: {"round": 0, "last_actions": None} for i in self._players}
+
+    def players_to_move(self) -> List[int]:
+        return self._players
+
+    # fast-forward hooks (core/fast_forward.py), the observations only depend on the last joint action and the round
+
+    def state_key(self):
+        return self.last_actions
+
+    def rounds_left(self) -> int:
+        return self.rounds - self.t
+
+    def skip_rounds(self, rounds: int, rewards):
+        self.t += rounds
+        for i in self._players:
+            self.cumulative_rewards[i] += rewards[i]
+
+    def step(self, actions: ActionDict) -> Tuple[ObsDict, RewardDict, bool, InfoDict]:
+        try:
+            joint = tuple([actions[i] for i in self._players])
+        except KeyError:
+            raise ValueError(f"expected actions for players {self._players}, got {sorted(actions)}")
+        if len(actions) != self.n:
+            raise ValueError(f"expected actions for players {self._players}, got {sorted(actions)}")
+        payoffs = self.stage.play(joint)
+        self.last_actions = joint
+
+        rewards = dict(zip(self._players, payoffs))
+        cumulative = self.cumulative_rewards
+        for i, reward in enumerate(payoffs):
+            cumulative[i] += reward
+
+        self.t += 1
+        done = self.t >= self.rounds
+        if done:
+            obs = {i: {"round_complete": True} for i in self._players}
+        else:
+            obs = {i: {"round": self.t, "last_actions": joint} for i in self._players}
+        return obs, rewards, done, {}
@@ -3,34 +3,25 @@ from __future__ import annotations
 import time
 import threading
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 from itertools import combinations
 import numpy as np
 import pandas as pd
 from pathlib import Path
 import inspect
-import random
 
 from core.engine import Engine, MoveTimeout
+from core.rng import SeedBank, sample
 from core.game.base_game import BaseGame
 from core.agents.common.base_agent import BaseAgent
-from core.utils import server_print
+from core.log import get_logger
+
+_logger = get_logger("arena")
 
 
 def arena_print(message: str):
-    """
-    Smart print function that detects context:
-    - If running on server: use server_print() for dashboard capture
-    - If running locally: use regular print() for student testing
-    """
-    # Check if we're running in a server context by looking for server-specific attributes
-    # or by checking if we're in a subprocess
-    try:
-        # Try to use server_print if available (server context)
-        server_print(message)
-    except:
-        # Fall back to regular print (local context)
-        print(f"[ARENA] {message}")
+    """arena progress output, goes through the agt.arena logger (see core/log.py)."""
+    _logger.info(message)
 
 
 class LocalArena:
@@ -53,7 +44,11 @@ class LocalArena:
         timeout: float = 1.0,
         save_results: bool = True,
         results_path: Optional[str] = None,
-        verbose: bool = True
+        verbose: bool = True,
+        metrics=None,
+        spectator=None,
+        fast_forward: bool = False,
+        seed: Optional[int] = None
     ):
         self.game_title = game_title
         self.game_class = game_class
@@ -64,6 +59,13 @@ class LocalArena:
         self.save_results = save_results
         self.results_path = results_path or "results"
         self.verbose = verbose
+        self.metrics = metrics  # optional server metrics, passed on to each engine
+        self.spectator = spectator  # optional spectator hub, passed on to each engine
+        self.fast_forward = fast_forward  # skip repeated cycles between deterministic agents (core/fast_forward.py)
+        # game i always draws from the same random stream, whatever order the games run in (core/rng.py)
+        self.seeds = SeedBank(seed)
+        self.schedule = self.seeds.schedule()  # who plays whom
+        self._next_game_id = 0
         
         # results tracking
         self.game_results: Dict[str, Dict[str, float]] = {}
@@ -78,6 +80,27 @@ class LocalArena:
 
 
 
+    def _make_game(self, num_players: int) -> BaseGame:
+        """
+        create the game for one grouping.
+
+        game classes take different arguments (num_players, num_agents, rounds or
+        nothing at all), so only pass the ones the constructor accepts.
+        """
+        try:
+            params = inspect.signature(self.game_class).parameters
+        except (TypeError, ValueError):
+            return self.game_class(num_players=num_players)
+
+        kwargs = {}
+        if 'num_players' in params:
+            kwargs['num_players'] = num_players
+        elif 'num_agents' in params:
+            kwargs['num_agents'] = num_players
+        if 'rounds' in params:
+            kwargs['rounds'] = self.num_rounds
+        return self.game_class(**kwargs)
+
     def run_tournament(self) -> pd.DataFrame:
         """run a full tournament of num_rounds rounds between num_agents_per_game agents"""
 
@@ -103,17 +126,18 @@ class LocalArena:
 
         for grouping in range(num_groupings):
             #we'll create a pairing of num_agents_per_game agents each
-            grouping = random.sample(self.agents, min(self.num_agents_per_game, len(self.agents)))
+            grouping = sample(self.schedule, self.agents, min(self.num_agents_per_game, len(self.agents)))
 
             # if self.verbose:
             #     debug_print(f"grouping: {grouping}")
             for g in grouping: g.reset() #initialize
             
             #we'll run a game between the pairing
-            game = self.game_class(num_players=len(grouping)) 
+            game = self._make_game(len(grouping))
 
             try:
-                engine = Engine(game, grouping, rounds=self.num_rounds, game_title=self.game_title)
+                engine = Engine(game, grouping, rounds=self.num_rounds, game_title=self.game_title,
+                                fast_forward=self.fast_forward, seed=self._game_seed(game_num - 1))
                 final_rewards = engine.run()
 
 
@@ -235,6 +259,39 @@ class LocalArena:
         
         arena_print("\n" + "=" * 50)
     
+    def _game_seed(self, game_id: Optional[int] = None):
+        """the random stream of a game, by default the next game id."""
+        if game_id is None:
+            game_id = self._next_game_id
+        self._next_game_id = max(self._next_game_id, game_id + 1)
+        return self.seeds.sequence(game_id)
+
+    async def run_game_async(self, grouping: List[BaseAgent], game_id: Optional[int] = None) -> Tuple[List[float], Set[int]]:
+        """play one game between the grouping, returns the rewards and the indices of players who forfeited."""
+        # players who uploaded a table policy are played here, with no network round-trips
+        grouping = [agent.policy.agent(agent.name, owner=agent) if getattr(agent, 'policy', None) is not None else agent
+                    for agent in grouping]
+        for g in grouping: 
+            if hasattr(g, 'reset'):
+                g.reset()  # initialize
+        
+        # create engine for this game
+        from core.engine import Engine
+        # Create game with the correct number of agents
+        game = self._make_game(len(grouping))
+        engine = Engine(
+            game=game,
+            agents=grouping,
+            rounds=self.num_rounds,
+            game_title=self.game_title,
+            metrics=self.metrics,
+            spectator=self.spectator,
+            fast_forward=self.fast_forward,
+            seed=self._game_seed(game_id)
+        )
+        rewards = await engine.run_async(self.num_rounds)
+        return rewards, set(engine.forfeited)
+
     async def run_tournament_async(self) -> pd.DataFrame:
         """Async version of run_tournament for server use."""
         arena_print(f"starting async tournament with {len(self.agents)} agents")
@@ -250,33 +307,30 @@ class LocalArena:
         game_num = 1
         num_groupings = 10
 
+        group_size = min(self.num_agents_per_game, len(self.agents))
+
         for grouping in range(num_groupings):
-            # create a grouping of agents
-            grouping = random.sample(self.agents, min(self.num_agents_per_game, len(self.agents)))
-            
-            for g in grouping: 
-                if hasattr(g, 'reset'):
-                    g.reset()  # initialize
-            
-            # create engine for this game
-            from core.engine import Engine
-            # Create game with the correct number of agents
-            game = self.game_class(num_players=len(grouping))
-            engine = Engine(
-                game=game,
-                agents=grouping,
-                rounds=self.num_rounds,
-                game_title=self.game_title
-            )
+            # create a grouping of agents, skipping players the server has evicted
+            available = [agent for agent in self.agents if getattr(agent, 'alive', True)]
+            if len(available) < group_size:
+                arena_print(f"only {len(available)} players left, stopping after {game_num - 1} games")
+                break
+            grouping = sample(self.schedule, available, group_size)
             
             # run the game asynchronously
             arena_print(f"game {game_num}: {[g.name for g in grouping]}")
 
-            rewards = await engine.run_async(self.num_rounds)
+            rewards, forfeited = await self.run_game_async(grouping, game_id=game_num - 1)
             arena_print(f"game {game_num} completed: {rewards}")
             
             # update results
             for i, agent in enumerate(grouping):
+                if i in forfeited:
+                    # forfeited games count as a loss and not towards the score
+                    arena_print(f"game {game_num}: {agent.name} forfeited")
+                    self.agent_stats[agent.name]['forfeits'] = self.agent_stats[agent.name].get('forfeits', 0) + 1
+                    continue
+
                 # Store the reward for this agent in this game
                 self.agent_stats[agent.name][f"game_{game_num}"] = rewards[i]
                 
@@ -300,8 +354,9 @@ class LocalArena:
             
             # Calculate wins/losses/ties based on individual game scores
             game_scores = [self.agent_stats[agent_name][k] for k in self.agent_stats[agent_name].keys() if k.startswith('game_')]
+            forfeits = self.agent_stats[agent_name].get('forfeits', 0)
             wins = sum(1 for score in game_scores if score > 0)
-            losses = sum(1 for score in game_scores if score < 0)
+            losses = sum(1 for score in game_scores if score < 0) + forfeits
             ties = sum(1 for score in game_scores if score == 0)
             
             results_data.append({
@@ -312,6 +367,7 @@ class LocalArena:
                 'wins': wins,
                 'losses': losses,
                 'ties': ties,
+                'forfeits': forfeits,
                 'win rate': wins / max(wins + losses + ties, 1)
             })
         
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+logging for the server, client and engine.
+
+every component logs through a logger under "agt" (agt.server, agt.client, agt.engine,
+agt.arena, ...). records go through a QueueHandler into a queue, and a QueueListener
+thread formats them and writes them to stdout, so the event loop never blocks on the
+terminal. the encoded dashboard lines go through the same writer (dashboard_event) so
+they are never interleaved with log lines. levels are set per component, e.g. from the cli with
+
+    --log-level info --log server=debug,engine=warning
+
+log with %-style arguments (logger.debug("got %s", message)) rather than f-strings so
+messages below the level are never formatted at all.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Dict, Optional, Union
+
+
+ROOT = "agt"
+COMPONENTS = ("server", "client", "engine", "arena", "shard", "dashboard")
+DEFAULT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """queue handler that leaves formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the stock handler formats the message here, on the caller's thread. the
+        # listener lives in the same process, so the record can go over as it is.
+        return record
+
+
+class _Formatter(logging.Formatter):
+    """the usual format, except dashboard lines are written as they are."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "raw", False):
+            return record.getMessage()
+        return super().format(record)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """writes to whatever sys.stdout is at the time, so redirected output still gets the logs."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def parse_levels(spec: Optional[str]) -> Dict[str, str]:
+    """parse "server=debug,engine=warning" into {"server": "DEBUG", "engine": "WARNING"}."""
+    levels = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" not in part:
+            raise ValueError(f"expected component=level, got {part!r}")
+        component, level = (x.strip() for x in part.split("=", 1))
+        levels[component] = _level_name(level)
+    return levels
+
+
+def _level_name(level: Union[str, int]) -> str:
+    if isinstance(level, int):
+        return logging.getLevelName(level)
+    name = level.upper()
+    if not isinstance(logging.getLevelName(name), int):
+        raise ValueError(f"unknown log level: {level}")
+    return name
+
+
+def setup_logging(level: Union[str, int] = "INFO", component_levels: Optional[Dict[str, str]] = None,
+                  stream=None, fmt: str = DEFAULT_FORMAT) -> logging.Logger:
+    """
+    route all agt loggers through a queue to a background writer thread.
+
+    safe to call again, e.g. to change levels from the cli after a module already
+    logged with the defaults.
+    """
+    global _listener
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(_level_name(level))
+    root.propagate = False
+    # dashboard lines are a protocol, not chatter, keep them unless asked explicitly
+    logging.getLogger(f"{ROOT}.dashboard").setLevel("INFO")
+    for component, component_level in (component_levels or {}).items():
+        logging.getLogger(f"{ROOT}.{component}").setLevel(_level_name(component_level))
+
+    if _listener is not None and stream is None:
+        return root
+
+    if _listener is not None:
+        _listener.stop()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream) if stream is not None else _StdoutHandler()
+    output.setFormatter(_Formatter(fmt))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    return root
+
+
+def flush_logging():
+    """write out everything still queued, stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for handler in list(logging.getLogger(ROOT).handlers):
+            logging.getLogger(ROOT).removeHandler(handler)
+
+
+atexit.register(flush_logging)
+
+
+def _restart_after_fork():
+    # the writer thread doesn't survive fork (server shards), start a new one with the same levels
+    global _listener
+    if _listener is not None:
+        _listener = None
+        setup_logging(logging.getLogger(ROOT).level or "INFO")
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def get_logger(component: str) -> logging.Logger:
+    """logger for one component, sets up the default pipeline on first use."""
+    if _listener is None:
+        setup_logging()
+    return logging.getLogger(f"{ROOT}.{component}")
+
+
+def dashboard_event(line: str):
+    """write an encoded dashboard line (see dashboard/binary_encoding.py) to stdout as is."""
+    get_logger("dashboard").info(line, extra={"raw": True})
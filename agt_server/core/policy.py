@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+table-driven policies the server can play on a player's behalf.
+
+many lab submissions are finite-state machines or stationary mixed strategies (rock,
+stubborn, tit-for-tat, the bos punitive and reluctant agents). a client can upload
+one of those as a declarative table once, and the engine then plays it locally
+instead of asking over the network every round:
+
+    {
+      "initial": "start",
+      "states": {
+        "start":  {"action": 1, "next": {"1": "punish", "*": "start"}},
+        "punish": {"action": {"0": 0.5, "1": 0.5}, "next": {"0": "start"}}
+      }
+    }
+
+- "action" is an action, or a distribution {action: probability} summing to 1
+- "next" maps what the other players just played to the next state. the key is their
+  actions in seat order joined with commas ("1" in a two player game, "3,7" in
+  lemonade), "*" matches anything else, and with no match the state stays the same
+- "initial" defaults to the first state
+- a stationary strategy can skip the states: {"action": {"0": 0.34, "1": 0.33, "2": 0.33}}
+
+TablePolicy.from_spec validates a table against the game's actions and compiles it,
+policy.agent(name) gives a fresh agent that plays it for one game.
+"""
+
+import bisect
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.agents.common.base_agent import BaseAgent
+from core.rng import BlockSampler, SeedLike, make_rng
+
+
+MAX_STATES = 1024
+WILDCARD = "*"
+
+
+class PolicyError(ValueError):
+    """an uploaded policy that doesn't describe a valid strategy for the game."""
+
+
+def action_space(game) -> Optional[List[List[int]]]:
+    """the actions each player can take in a game instance, None if they aren't a small finite set."""
+    num_actions = getattr(game, "num_actions", None)
+    if isinstance(num_actions, (list, tuple)):
+        # NormalFormGame, any number of actions per player
+        return [list(range(n)) for n in num_actions]
+    num_players = getattr(game, "metadata", {}).get("num_players") or 2
+    valid_actions = getattr(game, "valid_actions", None)
+    if valid_actions is not None:
+        if hasattr(game, "num_players"):
+            num_players = game.num_players()
+        return [list(valid_actions) for _ in range(num_players)]
+    payoff_tensor = getattr(game, "payoff_tensor", None)
+    if payoff_tensor is not None:
+        # (hidden states, actions of player 0, ..., actions of player n-1, players)
+        shape = getattr(payoff_tensor, "shape", None)
+        if shape is None or len(shape) < 3:
+            return None
+        return [list(range(n)) for n in shape[1:-1]]
+    return None
+
+
+def _parse_action(value: Any, actions: Sequence[int], where: str) -> int:
+    try:
+        action = int(value)
+    except (TypeError, ValueError):
+        raise PolicyError(f"{where}: {value!r} is not an action")
+    if action not in actions or isinstance(value, bool) or (isinstance(value, float) and value != action):
+        raise PolicyError(f"{where}: {value!r} is not one of the actions {list(actions)}")
+    return action
+
+
+class TablePolicy:
+    """a validated, compiled state machine over the game's actions."""
+
+    def __init__(self, names: List[str], choices: List[Tuple[List[int], Optional[List[float]]]],
+                 transitions: List[Dict[Tuple[int, ...], int]], defaults: List[int], initial: int):
+        self.names = names
+        self.choices = choices  # per state: (actions, cumulative weights), weights None for a pure action
+        self.transitions = transitions  # per state: other players' actions -> next state
+        self.defaults = defaults  # per state: next state when nothing in transitions matches
+        self.initial = initial
+
+    @property
+    def num_states(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_spec(cls, spec: Any, actions: Sequence[Sequence[int]], seat: Optional[int] = None) -> "TablePolicy":
+        """
+        validate and compile an uploaded policy.
+
+        actions holds each seat's actions. a policy isn't tied to a seat, so its actions
+        must be legal in every seat (all the lab games are symmetric) unless seat is given.
+        """
+        if not isinstance(spec, dict):
+            raise PolicyError("a policy is a json object")
+        if "states" not in spec:
+            if "action" not in spec:
+                raise PolicyError("a policy needs \"states\", or an \"action\" for a stationary strategy")
+            spec = {"states": {"play": {"action": spec["action"]}}}
+        states = spec["states"]
+        if not isinstance(states, dict) or not states:
+            raise PolicyError("\"states\" must be a non-empty object")
+        if len(states) > MAX_STATES:
+            raise PolicyError(f"at most {MAX_STATES} states, got {len(states)}")
+
+        seats = range(len(actions)) if seat is None else [seat]
+        own = [a for a in actions[0] if all(a in actions[s] for s in seats)]
+        others = len(actions) - 1
+        other_actions = set().union(*actions) if actions else set()
+
+        names = [str(name) for name in states]
+        index = {name: i for i, name in enumerate(names)}
+        initial = spec.get("initial", names[0])
+        if str(initial) not in index:
+            raise PolicyError(f"initial state {initial!r} is not one of the states")
+
+        choices, transitions, defaults = [], [], []
+        for i, (name, state) in enumerate(zip(names, states.values())):
+            if not isinstance(state, dict) or "action" not in state:
+                raise PolicyError(f"state {name!r} needs an \"action\"")
+            choices.append(cls._parse_choice(state["action"], own, f"state {name!r}"))
+
+            table, default = {}, i
+            transitions_spec = state.get("next", {})
+            if not isinstance(transitions_spec, dict):
+                raise PolicyError(f"state {name!r}: \"next\" must be an object")
+            for key, target in transitions_spec.items():
+                if str(target) not in index:
+                    raise PolicyError(f"state {name!r}: next state {target!r} doesn't exist")
+                if key == WILDCARD:
+                    default = index[str(target)]
+                    continue
+                parts = str(key).split(",")
+                if len(parts) != others:
+                    raise PolicyError(f"state {name!r}: {key!r} should list the actions of {others} other player(s)")
+                move = tuple(_parse_action(part.strip(), sorted(other_actions), f"state {name!r}") for part in parts)
+                table[move] = index[str(target)]
+            transitions.append(table)
+            defaults.append(default)
+
+        return cls(names, choices, transitions, defaults, index[str(initial)])
+
+    @staticmethod
+    def _parse_choice(value: Any, actions: Sequence[int], where: str) -> Tuple[List[int], Optional[List[float]]]:
+        if not isinstance(value, dict):
+            return [_parse_action(value, actions, where)], None
+        if not value:
+            raise PolicyError(f"{where}: empty distribution")
+        moves, weights = [], []
+        for action, probability in value.items():
+            moves.append(_parse_action(action, actions, where))
+            try:
+                probability = float(probability)
+            except (TypeError, ValueError):
+                raise PolicyError(f"{where}: probability {probability!r} is not a number")
+            if not 0.0 <= probability <= 1.0:
+                raise PolicyError(f"{where}: probability {probability} is not between 0 and 1")
+            weights.append(probability)
+        if abs(sum(weights) - 1.0) > 1e-6:
+            raise PolicyError(f"{where}: probabilities sum to {sum(weights)}, not 1")
+        cumulative, total = [], 0.0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return moves, cumulative
+
+    def agent(self, name: str, owner: Any = None, seed: SeedLike = None) -> "PolicyAgent":
+        """a fresh agent playing this policy, for one game."""
+        return PolicyAgent(self, name, owner, seed)
+
+
+class PolicyAgent(BaseAgent):
+    """plays a TablePolicy. the engine tells it everyone's actions through observe_actions."""
+
+    def __init__(self, policy: TablePolicy, name: str, owner: Any = None, seed: SeedLike = None):
+        super().__init__(name)
+        self.policy = policy
+        self.owner = owner  # the player who uploaded the policy, they forfeit if they leave
+        self.state = policy.initial
+        self.reseed(seed)
+
+    def reseed(self, seed: SeedLike = None):
+        """draw mixed actions from a new random stream, the engine passes each seat's own (core/rng.py)."""
+        self.rng = make_rng(seed)
+        self._draw = BlockSampler(self.rng.random)
+
+    @property
+    def alive(self) -> bool:
+        return getattr(self.owner, "alive", True)
+
+    def reset(self):
+        super().reset()
+        self.state = self.policy.initial
+
+    def get_action(self, observation: Dict[str, Any] = None) -> int:
+        moves, cumulative = self.policy.choices[self.state]
+        if cumulative is None:
+            return moves[0]
+        return moves[bisect.bisect(cumulative, self._draw() * cumulative[-1], 0, len(moves) - 1)]
+
+    def update(self, observation=None, action=None, reward=None, done=None, info=None):
+        if reward is not None:
+            self.reward_history.append(reward)
+
+    def state_key(self) -> Optional[int]:
+        """for fast-forwarding (core/fast_forward.py): deterministic while the current state plays a pure action."""
+        return self.state if self.policy.choices[self.state][1] is None else None
+
+    def observe_actions(self, index: int, actions: Dict[int, Any]):
+        """move to the next state given what everyone played this round."""
+        try:
+            move = tuple(actions[i] for i in sorted(actions) if i != index)
+            self.state = self.policy.transitions[self.state].get(move, self.policy.defaults[self.state])
+        except TypeError:
+            self.state = self.policy.defaults[self.state]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+per-game random streams.
+
+every stochastic game draws from its own numpy Generator instead of the global
+random / np.random state, so games can run in any order, in parallel or on other
+machines and still see exactly the same numbers:
+
+    bank = SeedBank(1234)                # one per tournament, bank.entropy reproduces it
+    game.reset(seed=bank.sequence(7))    # game 7 always gets the same stream
+
+SeedBank derives game i's SeedSequence from (entropy, i) directly, without spawning
+the earlier ones, so a worker can build any game's stream from the tournament seed
+and the game id alone. LocalArena(seed=...) does this for every game it plays, and
+the engine gives every seat of a game its own child stream (player_sequences) for
+agents that draw at random themselves, like table policies.
+
+games take the usual reset(seed) argument and pass it to make_rng, which accepts
+an int, a SeedSequence, a Generator or None. None seeds from python's global random
+module, the one these games used before, so random.seed at the top of a script
+still reproduces a run.
+
+BlockSampler hands out single draws from blocks sampled in one vectorized call,
+for the per-round and per-impression draws where calling the generator once per
+value would dominate.
+"""
+
+import random
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+SeedLike = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+
+def make_rng(seed: SeedLike = None) -> np.random.Generator:
+    """a Generator for one game. a Generator is used as is, None is seeded from the global random module."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    if seed is None:
+        seed = random.getrandbits(128)
+    return np.random.default_rng(seed)
+
+
+class SeedBank:
+    """the seeds of every game in a tournament, derived from one root seed and the game id."""
+
+    def __init__(self, seed: Optional[int] = None):
+        # with no seed the entropy comes from the global random module, and is kept so the run can be repeated
+        self.entropy = np.random.SeedSequence(random.getrandbits(128) if seed is None else seed).entropy
+
+    def schedule(self) -> np.random.Generator:
+        """a stream for the tournament itself (who plays whom), separate from every game's."""
+        return np.random.default_rng(np.random.SeedSequence(self.entropy))
+
+    def sequence(self, game_id: int) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self.entropy, spawn_key=(game_id,))
+
+    def generator(self, game_id: int) -> np.random.Generator:
+        return np.random.default_rng(self.sequence(game_id))
+
+
+def player_sequences(seed: SeedLike, count: int) -> List[np.random.SeedSequence]:
+    """
+    one stream per player of a game, the children seed.spawn(count) would give without
+    advancing seed's spawn counter, so they stay apart from the game's own stream and
+    replaying the game gets them again. empty for None or a Generator, which have no
+    sequence to derive them from.
+    """
+    if seed is None or isinstance(seed, np.random.Generator):
+        return []
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.SeedSequence(sequence.entropy, spawn_key=sequence.spawn_key + (i,), pool_size=sequence.pool_size)
+            for i in range(count)]
+
+
+class BlockSampler:
+    """one draw at a time, from blocks of `block` draws made with a single call to draw(n)."""
+
+    def __init__(self, draw: Callable[[int], np.ndarray], block: int = 1024):
+        self.draw = draw
+        self.block = max(1, int(block))
+        self._values: List[Any] = []
+        self._next = 0
+
+    def __call__(self) -> Any:
+        if self._next >= len(self._values):
+            # python values, a list index is much cheaper than pulling numpy scalars out one by one
+            self._values = self.draw(self.block).tolist()
+            self._next = 0
+        value = self._values[self._next]
+        self._next += 1
+        return value
+
+
+def sample(rng: np.random.Generator, population: Sequence[Any], k: int) -> List[Any]:
+    """k distinct elements of population, like random.sample."""
+    return [population[i] for i in rng.choice(len(population), k, replace=False).tolist()]
+
+
+def choice(rng: np.random.Generator, options: Sequence[Any]) -> Any:
+    """one element of options, rng.choice would turn them into a numpy array first."""
+    return options[int(rng.integers(len(options)))]
+
+
+def shuffled(rng: np.random.Generator, items: Sequence[Any]) -> List[Any]:
+    """a shuffled copy of items."""
+    return [items[i] for i in rng.permutation(len(items)).tolist()]
+
+
+def seed_globals(seed: Union[int, np.random.SeedSequence]) -> None:
+    """reseed python's random and numpy's legacy global state from a game's seed, for agents that draw from them."""
+    sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    words = sequence.generate_state(4)
+    random.seed(int.from_bytes(words.tobytes(), "little"))
+    np.random.seed(words)
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+best responses and equilibria of the two player matrix games, straight from payoff_tensor.
+
+    solver = matrix_solver(RPSGame().payoff_tensor)
+    solver.best_response([0.5, 0.3, 0.2])          # 1, paper
+    solver.nash_equilibria()                        # [(x, y), ...]
+    solver.correlated_equilibrium()                 # joint distribution, welfare maximizing
+
+matrix_solver is cached by the tensor's contents and every solver caches its
+equilibria, so agents can ask for them every round. best responses are one matrix
+product and take a batch of opponent strategies at once.
+
+equilibria:
+- pure_equilibria: every pure nash equilibrium
+- nash_equilibria: support enumeration up to SUPPORT_ENUMERATION_MAX actions, which
+  finds them all in nondegenerate games (all the lab games). past that, zero-sum games
+  are solved by linear programming (maximin) and others by lemke-howson from every
+  starting label
+- correlated_equilibrium: the correlated equilibrium maximizing a weighted sum of
+  payoffs, by linear programming
+
+numpy has no linear program solver, so a small dense simplex is included.
+"""
+
+import itertools
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SUPPORT_ENUMERATION_MAX = 4  # actions per player, support enumeration is exponential past that
+MAX_CACHED_SOLVERS = 256
+EPS = 1e-9
+TOLERANCE = 1e-7  # slack allowed when checking an equilibrium
+PIVOT_TOLERANCE = 1e-7  # smallest pivot, relative to the largest entry of its column
+ROUND_OFF = 1e-12  # tableau entries this small are zeroed after every pivot
+STALL_LIMIT = 20  # degenerate pivots in a row before falling back to bland's rule
+PERTURBATION = 1e-6  # added to the inequalities' right hand sides while pivoting
+REFACTOR_ROUNDS = 5  # fresh tableaus to polish the final basis on
+HARRIS_SLACK = 1e-9  # infeasibility a ratio test may allow to pivot on a larger entry
+
+
+def _simplex_pivot(tableau: np.ndarray, basis: List[int], row: int, col: int):
+    tableau[row] /= tableau[row, col]
+    factors = tableau[:, col].copy()
+    factors[row] = 0.0
+    tableau -= np.outer(factors, tableau[row])
+    # flush round-off, a degenerate right hand side of 1e-17 would otherwise turn into a negative ratio
+    tableau[np.abs(tableau) < ROUND_OFF] = 0.0
+    # and the tiny infeasibility left by leaving on a near tie instead of the exact minimum ratio
+    rhs = tableau[:-1, -1]
+    rhs[(rhs < 0.0) & (rhs > -EPS)] = 0.0
+    basis[row] = col
+
+
+def _simplex_run(tableau: np.ndarray, basis: List[int], num_cols: int):
+    # steepest edge pricing (the tableau has every column at hand), leaving on the largest pivot
+    # among the tied ratios. after STALL_LIMIT pivots without progress it switches to bland's
+    # rule, which can't cycle, until the objective moves again
+    stalled = 0
+    for _ in range(50 * (tableau.shape[0] + num_cols) + 1000):
+        costs = tableau[-1, :num_cols]
+        entering = np.nonzero(costs < -EPS)[0]
+        if not len(entering):
+            return
+        bland = stalled >= STALL_LIMIT
+        if bland:
+            col = entering[0]
+        else:
+            norms = np.sqrt(1.0 + (tableau[:-1, entering] ** 2).sum(axis=0))
+            col = entering[np.argmin(costs[entering] / norms)]
+        column = tableau[:-1, col]
+        # pivots that are tiny next to the rest of the column only amplify round-off
+        positive = column > PIVOT_TOLERANCE * np.abs(column).max(initial=1.0)
+        if not positive.any():
+            raise ValueError("the linear program is unbounded")
+        rhs = np.maximum(tableau[:-1, -1], 0.0)
+        ratios = np.full(len(column), np.inf)
+        ratios[positive] = rhs[positive] / column[positive]
+        step = ratios.min()
+        # harris' ratio test: any row within HARRIS_SLACK of blocking may leave, the largest pivot does
+        bound = ((rhs[positive] + HARRIS_SLACK) / column[positive]).min()
+        ties = np.nonzero(ratios <= bound)[0]
+        if bland:
+            row = min(ties, key=lambda i: basis[i])
+        else:
+            row = ties[np.argmax(column[ties])]
+        # progress is the objective moving, not a step of round-off size
+        stalled = stalled + 1 if -costs[col] * step <= EPS else 0
+        _simplex_pivot(tableau, basis, row, col)
+    raise RuntimeError("simplex didn't converge")
+
+
+def _dual_simplex_run(tableau: np.ndarray, basis: List[int], num_cols: int):
+    # back to a feasible basis after the right hand sides changed, the reduced costs stay >= 0
+    for _ in range(50 * (tableau.shape[0] + num_cols) + 1000):
+        rhs = tableau[:-1, -1]
+        row = int(np.argmin(rhs))
+        if rhs[row] >= -EPS:
+            return
+        entries = tableau[row, :num_cols]
+        negative = entries < -PIVOT_TOLERANCE * np.abs(entries).max(initial=1.0)
+        if not negative.any():
+            raise ValueError("the linear program is infeasible")
+        costs = np.maximum(tableau[-1, :num_cols], 0.0)
+        ratios = np.full(num_cols, np.inf)
+        ratios[negative] = costs[negative] / -entries[negative]
+        bound = ((costs[negative] + HARRIS_SLACK) / -entries[negative]).min()
+        ties = np.nonzero(ratios <= bound)[0]
+        _simplex_pivot(tableau, basis, row, ties[np.argmax(-entries[ties])])
+    raise RuntimeError("simplex didn't converge")
+
+
+def _refactor(A: np.ndarray, b: np.ndarray, cost: np.ndarray, basis: List[int]) -> np.ndarray:
+    # the tableau of a basis computed afresh from the original rows, without the pivots' round-off
+    rows = np.linalg.lstsq(A[:, basis], np.column_stack([A, b]), rcond=None)[0]
+    tableau = np.vstack([rows, np.append(cost, 0.0)])
+    tableau[-1] -= cost[basis] @ rows
+    tableau[np.abs(tableau) < ROUND_OFF] = 0.0
+    return tableau
+
+
+def linprog(c: Sequence[float], A_ub=None, b_ub=None, A_eq=None, b_eq=None) -> Tuple[np.ndarray, float]:
+    """
+    minimize c @ x subject to A_ub @ x <= b_ub, A_eq @ x == b_eq and x >= 0.
+
+    returns (x, c @ x), raises ValueError when the program is infeasible or unbounded.
+    a two phase dense simplex, meant for the few dozen variables a matrix game needs.
+    """
+    c = np.asarray(c, dtype=float)
+    n = len(c)
+    A_ub = np.zeros((0, n)) if A_ub is None else np.asarray(A_ub, dtype=float).reshape(-1, n)
+    b_ub = np.zeros(0) if b_ub is None else np.asarray(b_ub, dtype=float)
+    A_eq = np.zeros((0, n)) if A_eq is None else np.asarray(A_eq, dtype=float).reshape(-1, n)
+    b_eq = np.zeros(0) if b_eq is None else np.asarray(b_eq, dtype=float)
+    m_ub, m = len(A_ub), len(A_ub) + len(A_eq)
+
+    # every row scaled to a largest coefficient of 1, so one tolerance fits all of them (a game
+    # with tiny payoffs for one player has tiny incentive constraints), then slack variables
+    # for the inequalities and rows flipped so every right hand side is >= 0
+    cols = n + m_ub
+    A = np.zeros((m, cols))
+    A[:m_ub, :n] = A_ub
+    A[m_ub:, :n] = A_eq
+    b = np.concatenate([b_ub, b_eq])
+    scale = np.abs(A).max(axis=1)
+    scale[scale == 0] = 1.0
+    A /= scale[:, None]
+    b = b / scale
+    A[:m_ub, n:] = np.eye(m_ub)
+    # the games' programs are very degenerate, every incentive constraint has a right hand side
+    # of 0. the simplex runs on slightly loosened inequalities, where ties are rare and it can't
+    # stall, and the solution of its final basis is computed with the exact right hand sides
+    solve_b = b.copy()
+    solve_b[:m_ub] += PERTURBATION * (1.0 + np.arange(m_ub) / max(m_ub, 1))
+    negative = solve_b < 0
+    solve_b[negative] *= -1
+    A[negative] *= -1
+    b[negative] *= -1
+
+    # phase one: inequalities start from their slack, every other row gets an artificial
+    # variable, and minimizing the artificials' sum finds a feasible basis
+    artificial = [i for i in range(m) if i >= m_ub or negative[i]]
+    k = len(artificial)
+    tableau = np.zeros((m + 1, cols + k + 1))
+    tableau[:m, :cols] = A
+    tableau[:m, -1] = solve_b
+    basis = [n + i for i in range(m)]
+    for j, row in enumerate(artificial):
+        tableau[row, cols + j] = 1.0
+        basis[row] = cols + j
+    tableau[-1, cols:cols + k] = 1.0
+    tableau[-1] -= tableau[artificial].sum(axis=0)
+    _simplex_run(tableau, basis, cols + k)
+    if -tableau[-1, -1] > TOLERANCE:
+        raise ValueError("the linear program is infeasible")
+
+    # drive the artificial variables out, rows where that's impossible are redundant
+    for row, var in enumerate(basis):
+        if var >= cols:
+            entries = np.abs(tableau[row, :cols])
+            if entries.max(initial=0.0) > PIVOT_TOLERANCE:
+                _simplex_pivot(tableau, basis, row, int(np.argmax(entries)))
+    rows = [i for i, var in enumerate(basis) if var < cols]
+    tableau = np.vstack([tableau[rows][:, list(range(cols)) + [-1]], np.zeros(cols + 1)])
+    basis = [basis[i] for i in rows]
+
+    # phase two on the real objective
+    cost = np.zeros(cols)
+    cost[:n] = c / max(1.0, np.abs(c).max(initial=0.0))
+    tableau[-1, :cols] = cost
+    for row, var in enumerate(basis):
+        tableau[-1] -= cost[var] * tableau[row]
+    _simplex_run(tableau, basis, cols)
+
+    # hundreds of pivots add up round-off, and the loosening can leave a basis that is slightly
+    # infeasible for the exact right hand sides. the final basis is checked on a fresh tableau,
+    # and polished with a few more pivots until it is both feasible and optimal there
+    for _ in range(REFACTOR_ROUNDS):
+        tableau = _refactor(A, b, cost, basis)
+        if tableau[:-1, -1].min(initial=0.0) < -EPS:
+            _dual_simplex_run(tableau, basis, cols)
+        elif tableau[-1, :cols].min(initial=0.0) < -EPS:
+            _simplex_run(tableau, basis, cols)
+        else:
+            break
+    x = np.zeros(cols)
+    x[basis] = np.linalg.lstsq(A[:, basis], b, rcond=None)[0]
+    x = np.maximum(x[:n], 0.0)
+    return x, float(c @ x)
+
+
+def payoff_matrices(payoff: Any, hidden_idx: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    the row and column player's payoff matrices from a payoff tensor (hidden states, A, A, 2),
+    a single (A, A, 2) matrix, or a game with a payoff_tensor.
+    """
+    tensor = getattr(payoff, "payoff_tensor", payoff)
+    tensor = np.asarray(tensor, dtype=float)
+    if tensor.ndim == 4:
+        tensor = tensor[hidden_idx]
+    if tensor.ndim != 3 or tensor.shape[-1] != 2:
+        raise ValueError(f"expected a (hidden_states, A, A, 2) payoff tensor, got shape {tensor.shape}")
+    return tensor[..., 0], tensor[..., 1]
+
+
+class MatrixSolver:
+    """best responses and equilibria of one bimatrix game, equilibria are computed once."""
+
+    def __init__(self, row_payoffs: np.ndarray, col_payoffs: np.ndarray):
+        self.A = np.array(row_payoffs, dtype=float)
+        self.B = np.array(col_payoffs, dtype=float)
+        if self.A.shape != self.B.shape or self.A.ndim != 2:
+            raise ValueError(f"payoff matrices must have the same 2d shape, got {self.A.shape} and {self.B.shape}")
+        self.A.setflags(write=False)
+        self.B.setflags(write=False)
+        self.shape = self.A.shape
+        self._cache: Dict[Any, Any] = {}
+
+    @property
+    def zero_sum(self) -> bool:
+        """whether the payoffs always add up to the same constant."""
+        total = self.A + self.B
+        return bool(np.allclose(total, total.flat[0]))
+
+    def _own(self, player: int) -> np.ndarray:
+        """the player's payoffs with their own actions on the rows."""
+        return self.A if player == 0 else self.B.T
+
+    # best responses
+
+    def expected_payoffs(self, opponent: Any, player: int = 0) -> np.ndarray:
+        """
+        the player's expected payoff for each of their actions against an opponent strategy,
+        or against each strategy in a batch (shape (..., opponent actions) -> (..., actions)).
+        """
+        return np.asarray(opponent, dtype=float) @ self._own(player).T
+
+    def best_response(self, opponent: Any, player: int = 0):
+        """the player's best action (the lowest one on ties) against an opponent strategy or a batch of them."""
+        payoffs = self.expected_payoffs(opponent, player)
+        best = np.argmax(payoffs, axis=-1)
+        return int(best) if np.ndim(best) == 0 else best
+
+    def best_responses(self, opponent: Any, player: int = 0) -> List[int]:
+        """every action that is a best response against one opponent strategy."""
+        payoffs = self.expected_payoffs(opponent, player)
+        return list(np.nonzero(payoffs >= payoffs.max() - TOLERANCE)[0])
+
+    def regret(self, x: Any, y: Any) -> Tuple[float, float]:
+        """how much each player would gain by deviating from (x, y), both 0 at an equilibrium."""
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        row = self.A @ y
+        col = x @ self.B
+        return float(row.max() - x @ row), float(col.max() - col @ y)
+
+    def is_equilibrium(self, x: Any, y: Any, tolerance: float = TOLERANCE) -> bool:
+        return all(r <= tolerance for r in self.regret(x, y))
+
+    # equilibria
+
+    def pure_equilibria(self) -> List[Tuple[int, int]]:
+        """every (row action, column action) where both play a best response."""
+        if "pure" not in self._cache:
+            row_best = self.A >= self.A.max(axis=0, keepdims=True) - TOLERANCE
+            col_best = self.B >= self.B.max(axis=1, keepdims=True) - TOLERANCE
+            self._cache["pure"] = [(int(i), int(j)) for i, j in zip(*np.nonzero(row_best & col_best))]
+        return self._cache["pure"]
+
+    def nash_equilibria(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """nash equilibria as (row strategy, column strategy) pairs, pure ones first."""
+        if "nash" not in self._cache:
+            if max(self.shape) <= SUPPORT_ENUMERATION_MAX:
+                found = self._support_enumeration()
+            elif self.zero_sum:
+                found = [(self.maximin(0)[0], self.maximin(1)[0])]
+            else:
+                found = self._lemke_howson_all()
+            self._cache["nash"] = _distinct(sorted(found, key=lambda eq: (np.count_nonzero(eq[0] > EPS) + np.count_nonzero(eq[1] > EPS))))
+        return self._cache["nash"]
+
+    def maximin(self, player: int = 0) -> Tuple[np.ndarray, float]:
+        """
+        the player's maximin (security) strategy and the payoff it guarantees. in a
+        zero-sum game both players' maximin strategies form an equilibrium.
+        """
+        key = ("maximin", player)
+        if key not in self._cache:
+            own = self._own(player)
+            shift = 1.0 - own.min()  # keeps the value positive, it's a nonnegative variable below
+            shifted = own + shift
+            rows, cols = own.shape
+            # variables (x, v): maximize v subject to x @ shifted[:, j] >= v for every j, sum(x) == 1
+            c = np.zeros(rows + 1)
+            c[-1] = -1.0
+            A_ub = np.hstack([-shifted.T, np.ones((cols, 1))])
+            A_eq = np.append(np.ones(rows), 0.0)[None]
+            solution, value = linprog(c, A_ub, np.zeros(cols), A_eq, [1.0])
+            strategy = solution[:rows] / solution[:rows].sum()
+            self._cache[key] = (strategy, float(-value - shift))
+        return self._cache[key]
+
+    def correlated_equilibrium(self, weights: Sequence[float] = (1.0, 1.0)) -> np.ndarray:
+        """
+        a correlated equilibrium maximizing weights[0] * row payoff + weights[1] * column
+        payoff, as a joint distribution over (row action, column action).
+        """
+        key = ("correlated", tuple(float(w) for w in weights))
+        if key not in self._cache:
+            rows, cols = self.shape
+            constraints = []
+            # told to play i, the row player can't gain by playing k instead
+            for i, k in itertools.permutations(range(rows), 2):
+                gain = np.zeros((rows, cols))
+                gain[i] = self.A[k] - self.A[i]
+                constraints.append(gain.ravel())
+            for j, k in itertools.permutations(range(cols), 2):
+                gain = np.zeros((rows, cols))
+                gain[:, j] = self.B[:, k] - self.B[:, j]
+                constraints.append(gain.ravel())
+            objective = -(weights[0] * self.A + weights[1] * self.B).ravel()
+            A_ub = np.array(constraints) if constraints else None
+            b_ub = np.zeros(len(constraints)) if constraints else None
+            solution, _ = linprog(objective, A_ub, b_ub, np.ones((1, rows * cols)), [1.0])
+            self._cache[key] = (solution / solution.sum()).reshape(rows, cols)
+        return self._cache[key]
+
+    def _support_enumeration(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        rows, cols = self.shape
+        found = []
+        for row_size in range(1, rows + 1):
+            for row_support in itertools.combinations(range(rows), row_size):
+                for col_size in range(1, cols + 1):
+                    for col_support in itertools.combinations(range(cols), col_size):
+                        # y makes the row player indifferent over row_support, x does the same for the column player
+                        y = _indifferent(self.A[np.ix_(row_support, col_support)], col_support, cols)
+                        x = _indifferent(self.B[np.ix_(row_support, col_support)].T, row_support, rows)
+                        if x is not None and y is not None and self.is_equilibrium(x, y):
+                            found.append((x, y))
+        return found
+
+    def _lemke_howson_all(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        found = []
+        for label in range(sum(self.shape)):
+            equilibrium = _lemke_howson(self.A, self.B, label)
+            if equilibrium is not None and self.is_equilibrium(*equilibrium):
+                found.append(equilibrium)
+        return found
+
+
+def _indifferent(payoffs: np.ndarray, support: Tuple[int, ...], size: int) -> Optional[np.ndarray]:
+    """a strategy on support making the opponent indifferent between all rows of payoffs, None if there's none."""
+    k = len(support)
+    # unknowns (p_1..p_k, v): payoffs @ p == v for every row, sum(p) == 1
+    system = np.zeros((payoffs.shape[0] + 1, k + 1))
+    system[:-1, :k] = payoffs
+    system[:-1, k] = -1.0
+    system[-1, :k] = 1.0
+    target = np.zeros(payoffs.shape[0] + 1)
+    target[-1] = 1.0
+    solution, *_ = np.linalg.lstsq(system, target, rcond=None)
+    if not np.allclose(system @ solution, target, atol=TOLERANCE) or (solution[:k] < -TOLERANCE).any():
+        return None
+    strategy = np.zeros(size)
+    strategy[list(support)] = np.maximum(solution[:k], 0.0)
+    return strategy / strategy.sum()
+
+
+def _lemke_howson(A: np.ndarray, B: np.ndarray, dropped: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    follow the lemke-howson path from the artificial equilibrium dropping one label.
+
+    labels 0..m-1 are the row player's actions, m..m+n-1 the column player's. the row
+    tableau holds B^T x <= 1 (x and the column slacks), the column tableau A y <= 1.
+    """
+    m, n = A.shape
+    A = A - A.min() + 1.0
+    B = B - B.min() + 1.0
+    row_tableau = np.hstack([B.T, np.eye(n), np.ones((n, 1))])  # columns by label
+    col_tableau = np.hstack([np.eye(m), A, np.ones((m, 1))])
+    row_basis = list(range(m, m + n))
+    col_basis = list(range(m))
+
+    entering = dropped
+    for _ in range(10 * (m + n) ** 2):
+        if entering < m:
+            tableau, basis = row_tableau, row_basis
+        else:
+            tableau, basis = col_tableau, col_basis
+        column = tableau[:, entering]
+        positive = column > EPS
+        if not positive.any():
+            return None
+        ratios = np.full(len(column), np.inf)
+        ratios[positive] = tableau[positive, -1] / column[positive]
+        row = int(np.argmin(ratios))
+        leaving = basis[row]
+        _simplex_pivot(tableau, basis, row, entering)
+        if leaving == dropped:
+            break
+        entering = leaving
+    else:
+        return None
+
+    x, y = np.zeros(m), np.zeros(n)
+    for row, label in enumerate(row_basis):
+        if label < m:
+            x[label] = row_tableau[row, -1]
+    for row, label in enumerate(col_basis):
+        if label >= m:
+            y[label - m] = col_tableau[row, -1]
+    if x.sum() <= 0 or y.sum() <= 0:
+        return None
+    return x / x.sum(), y / y.sum()
+
+
+def _distinct(equilibria: List[Tuple[np.ndarray, np.ndarray]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+    distinct = []
+    for x, y in equilibria:
+        if not any(np.allclose(x, a, atol=1e-6) and np.allclose(y, b, atol=1e-6) for a, b in distinct):
+            distinct.append((x, y))
+    return distinct
+
+
+_solvers: Dict[Tuple, MatrixSolver] = {}
+
+
+def matrix_solver(payoff: Any, hidden_idx: int = 0) -> MatrixSolver:
+    """
+    the solver for a payoff tensor (or a game with one), cached by the tensor's contents
+    so repeated calls with the same game share the equilibria already computed.
+    """
+    tensor = getattr(payoff, "payoff_tensor", payoff)
+    if not isinstance(tensor, np.ndarray):
+        tensor = np.asarray(tensor, dtype=float)
+    # keyed on the raw bytes, a lookup costs about a microsecond
+    key = (tensor.shape, tensor.dtype.str, hidden_idx, tensor.tobytes())
+    solver = _solvers.get(key)
+    if solver is None:
+        if len(_solvers) >= MAX_CACHED_SOLVERS:
+            _solvers.clear()
+        solver = _solvers[key] = MatrixSolver(*payoff_matrices(tensor, hidden_idx))
+    return solver
@@ -2,7 +2,6 @@
 from __future__ import annotations
 import math
 import numpy as np
-import random
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Any, Optional
 
@@ -12,6 +11,7 @@ from core.game.market_segment import MarketSegment
 from core.game.bid_entry import SimpleBidEntry
 from core.game.campaign import Campaign
 from collections import defaultdict
+from core.rng import BlockSampler, make_rng, choice, shuffled
 
 @dataclass
 class TwoDaysBidBundle:
@@ -93,6 +93,8 @@ class AdxTwoDayStage(BaseStage):
         Function: seg_id → rival CPM bid distribution sampler
     n_auctions : int
         Number of impression auctions per day (default: 10,000)
+    rng : seed or numpy Generator, optional
+        The game's random stream (see core/rng.py), seeded from the global random module if omitted
     """
 
     # User arrival frequencies for each market segment
@@ -114,8 +116,12 @@ class AdxTwoDayStage(BaseStage):
         num_players: int,
         rival_sampler=None,
         n_auctions: int = 10_000,
+        rng=None,
     ):
         super().__init__(num_players)
+        self.rng = make_rng(rng)
+        # the default rival prices are drawn a day's worth of auctions at a time
+        self._rival_prices = BlockSampler(lambda n: self.rng.uniform(0.0, 10.0, n), block=n_auctions)
         self.rival_sampler = rival_sampler or self._default_rival_sampler
         self.n_auctions = n_auctions
         
@@ -192,19 +198,19 @@ class AdxTwoDayStage(BaseStage):
         """Generate a campaign for a specific player and day."""
         # Pick a random segment with at least two attributes
         eligible_segments = [s for s in MarketSegment if len(s.value.split('_')) >= 2]
-        segment = random.choice(eligible_segments)
+        segment = choice(self.rng, eligible_segments)
         avg_users = self.USER_FREQUENCIES.get(segment, 1000)
-        reach = int(avg_users * random.choice(self.REACH_FACTORS))
+        reach = int(avg_users * choice(self.rng, self.REACH_FACTORS))
         
         budget = float(reach) if day == 1 else float(reach) * self.qc_multiplier
         return Campaign(id=player_id * 10 + day, market_segment=segment, reach=reach, budget=budget)
 
     def _generate_user_arrivals(self):
         """Generate user arrival sequence for the day."""
-        self.user_arrivals = []
+        arrivals = []
         for segment, count in self.USER_FREQUENCIES.items():
-            self.user_arrivals.extend([segment] * count)
-        random.shuffle(self.user_arrivals)
+            arrivals.extend([segment] * count)
+        self.user_arrivals = shuffled(self.rng, arrivals)
 
     def _run_auctions(self):
         """Run the auction simulation for the current day."""
@@ -329,7 +335,7 @@ class AdxTwoDayStage(BaseStage):
     def _default_rival_sampler(self, segment: MarketSegment) -> float:
         """Default rival price sampler."""
         # Simple uniform distribution for now
-        return random.uniform(0.0, 10.0)
+        return self._rival_prices()
 
     def get_campaigns_day1(self) -> Dict[int, Campaign]:
         """Get day 1 campaigns."""
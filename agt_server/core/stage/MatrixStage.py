@@ -1,15 +1,27 @@
 # stages/matrix_stage.py
 import numpy as np
-from typing import Sequence
+from typing import Sequence, Tuple
 
 from core.stage.BaseStage import BaseStage, ObsDict, RewardDict, InfoDict, ActionDict, PlayerId
 
 
+def payoff_table(payoff_tensor: np.ndarray) -> Tuple:
+    """
+    the payoff tensor as nested tuples of python floats, table[h][a0][a1] == (r0, r1).
+
+    a tuple lookup is much cheaper than indexing numpy and converting the scalars with
+    float() every round.
+    """
+    return tuple(tuple(tuple(tuple(cell) for cell in row) for row in hidden) for hidden in payoff_tensor.tolist())
+
+
 class MatrixStage(BaseStage):
     """
     Payoff tensor shape:  (hidden_states, A, A, num_players)
       - For PD/RPS hidden_states = 1  (use shape (1, A, A, 2))
       - Pass `hidden_idx` at instantiation if you want a mood-specific matrix.
+
+    The stage can be played any number of times (see `play`), MatrixGame keeps one per game.
     """
 
     def __init__(
@@ -19,9 +31,13 @@ class MatrixStage(BaseStage):
         action_labels: Sequence[str] | None = None, #all actions in an easily readable form
     ):
         super().__init__(num_players=2) # there are 2 expected players in a matrix game (row and column player)
+        if np.ndim(payoff_tensor) != 4 or np.shape(payoff_tensor)[-1] != 2:
+            raise ValueError(f"expected a (hidden_states, A, A, 2) payoff tensor, got shape {np.shape(payoff_tensor)}")
         self.tensor = payoff_tensor #payoff matrix
         self.h = hidden_idx
         self.action_labels = action_labels or list(range(payoff_tensor.shape[1]))
+        #validated once here, every round is then a plain lookup
+        self.payoffs = payoff_table(payoff_tensor)[hidden_idx]
 
 
 
@@ -31,15 +47,20 @@ class MatrixStage(BaseStage):
         #we don't need a player id here because the legal actions are the same for both players
         return self.action_labels
 
+    def play(self, actions: ActionDict) -> Tuple[float, float]:
+        """rewards (r0, r1) for one round, without building any of the step() dicts."""
+        try:
+            if len(actions) == 2:
+                return self.payoffs[actions[0]][actions[1]]
+        except (KeyError, IndexError, TypeError):
+            pass
+        # only the error path pays for the full check
+        self._validate_actions(actions, expected_players=[0, 1])
+        raise ValueError(f"illegal actions {actions!r}, legal actions are {list(range(len(self.payoffs)))}")
+
     def step(self, actions: ActionDict):
-        # Validate and unpack
-        # there are 2 expected players in a matrix game (row and column player)
-        self._validate_actions(actions, expected_players=[0,1]) 
-        a0, a1 = actions[0], actions[1]
-
-        # Payoffs from tensor
-        r0, r1 = self.tensor[self.h, a0, a1]
-        reward: RewardDict = {0: float(r0), 1: float(r1)}
+        r0, r1 = self.play(actions)
+        reward: RewardDict = {0: r0, 1: r1}
 
         # One-shot stage ends immediately
         self._done = True
@@ -0,0 +1,115 @@
+import operator
+from typing import Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from core.stage.BaseStage import BaseStage, ObsDict, RewardDict, InfoDict, ActionDict
+
+
+class NormalFormStage(BaseStage):
+    """
+    one round of an n player normal form game.
+
+    Payoff tensor shape:  (hidden_states, A1, ..., An, n)
+      - player i picks one of Ai actions, entry [h, a1, ..., an] holds every player's payoff
+      - Pass `hidden_idx` at instantiation if you want a hidden-state-specific tensor.
+
+    a joint action is looked up by its flat index sum(a_i * strides[i]), so a round is
+    a handful of integer operations whatever the number of players. large action spaces
+    can skip the dense tensor: pass sparse_payoffs {joint action: payoffs} and
+    num_actions instead, every joint action not listed pays default_payoff.
+    """
+
+    def __init__(
+        self,
+        payoff_tensor: np.ndarray | None = None, #dense payoffs, (hidden_states, A1, ..., An, n)
+        hidden_idx: int = 0, #which hidden state to play
+        action_labels: Sequence[Sequence[str]] | None = None, #per player, readable names of the actions
+        sparse_payoffs: Mapping[Tuple[int, ...], Sequence[float]] | None = None, #instead of the tensor
+        num_actions: Sequence[int] | None = None, #actions per player, needed with sparse_payoffs
+        default_payoff: float | Sequence[float] = 0.0, #payoffs of joint actions missing from sparse_payoffs
+    ):
+        if (payoff_tensor is None) == (sparse_payoffs is None):
+            raise ValueError("pass either a payoff tensor or sparse payoffs")
+
+        if payoff_tensor is not None:
+            tensor = np.asarray(payoff_tensor, dtype=float)
+            if tensor.ndim < 3 or tensor.shape[-1] != tensor.ndim - 2:
+                raise ValueError(f"expected a (hidden_states, A1, ..., An, n) payoff tensor, got shape {tensor.shape}")
+            num_actions = tensor.shape[1:-1]
+        elif num_actions is None:
+            raise ValueError("sparse payoffs need num_actions")
+        num_players = len(num_actions)
+        super().__init__(num_players=num_players)
+
+        self.num_actions = tuple(int(a) for a in num_actions)
+        if num_players < 1 or min(self.num_actions) < 1:
+            raise ValueError(f"every player needs at least one action, got {self.num_actions}")
+        # strides[i] is how far the flat index moves per action of player i (row-major, like numpy)
+        strides = [1] * num_players
+        for i in range(num_players - 2, -1, -1):
+            strides[i] = strides[i + 1] * self.num_actions[i + 1]
+        self.strides = tuple(strides)
+        self.size = strides[0] * self.num_actions[0] #number of joint actions
+        self.h = hidden_idx
+        self.action_labels = action_labels or [list(range(a)) for a in self.num_actions]
+        self._checks = tuple(zip(self.num_actions, self.strides))
+
+        default = np.broadcast_to(np.asarray(default_payoff, dtype=float), (num_players,))
+        self.default = tuple(default.tolist())
+        if payoff_tensor is not None:
+            #one python tuple per joint action, indexing numpy every round is much slower
+            self.payoffs = tuple(map(tuple, tensor[hidden_idx].reshape(self.size, num_players).tolist()))
+            self.sparse = False
+        else:
+            self.payoffs = self._sparse_table(sparse_payoffs)
+            self.sparse = True
+
+    def _sparse_table(self, sparse_payoffs) -> Dict[int, Tuple[float, ...]]:
+        table = {}
+        for joint, payoffs in sparse_payoffs.items():
+            payoffs = tuple(float(p) for p in payoffs)
+            if len(payoffs) != self.n:
+                raise ValueError(f"{joint}: expected {self.n} payoffs, got {len(payoffs)}")
+            table[self.flat_index(joint)] = payoffs
+        return table
+
+    def flat_index(self, joint: Sequence[int]) -> int:
+        """the flat index of a joint action (one action per player, in seat order)."""
+        if len(joint) != self.n:
+            raise ValueError(f"expected actions for {self.n} players, got {len(joint)}")
+        flat = 0
+        for action, (count, stride) in zip(joint, self._checks):
+            try:
+                action = operator.index(action)
+            except TypeError:
+                raise ValueError(f"{action!r} is not an action")
+            if not 0 <= action < count:
+                raise ValueError(f"illegal action {action}, legal actions are 0..{count - 1}")
+            flat += action * stride
+        return flat
+
+    def joint_action(self, flat: int) -> Tuple[int, ...]:
+        """the joint action at a flat index."""
+        return tuple(int(a) for a in np.unravel_index(flat, self.num_actions))
+
+    def legal_actions(self, player_id=0):
+        return self.action_labels[player_id]
+
+    def play(self, joint: Sequence[int]) -> Tuple[float, ...]:
+        """every player's payoff for one round, joint holds the actions in seat order."""
+        flat = self.flat_index(joint)
+        if self.sparse:
+            return self.payoffs.get(flat, self.default)
+        return self.payoffs[flat]
+
+    def step(self, actions: ActionDict):
+        self._validate_actions(actions)
+        payoffs = self.play([actions[i] for i in range(self.n)])
+        reward: RewardDict = dict(enumerate(payoffs))
+
+        # One-shot stage ends immediately
+        self._done = True
+        obs: ObsDict = {i: {"round_complete": True} for i in range(self.n)}
+        info: InfoDict = {}
+        return obs, reward, True, info
@@ -2,6 +2,9 @@
 
 
 
+from core.log import get_logger
+
+
 def server_print(message: str, flush: bool = True):
-    """Unified print method for all server output."""
-    print(f"[SERVER] {message}", flush=flush)
\ No newline at end of file
+    """Unified print method for all server output, goes through the agt.server logger."""
+    get_logger("server").info(message)
\ No newline at end of file
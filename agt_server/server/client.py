@@ -11,15 +11,47 @@ import json
 import socket
 import time
 import argparse
+import logging
+import concurrent.futures
 from typing import Dict, Any, Optional, List
 from abc import ABC, abstractmethod
 import sys
 import os
 
+sys.path.insert(0, os.path.dirname(__file__))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 
 from core.agents.common.base_agent import BaseAgent
+from core.log import get_logger
+from profiler import ClientProfiler, format_summary
+
+logger = get_logger("client")
+
+# AGTClient.log levels, "success" is an info message worth celebrating
+_LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "success": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+# where agent callbacks (get_action, update, setup, ...) run, see AGTClient.call_agent
+OFFLOAD_MODES = ("thread", "process", "none")
+
+# the agent copy owned by an offload worker process
+_process_agent = None
+
+
+def _init_agent_process(agent):
+    global _process_agent
+    _process_agent = agent
+
+
+def _call_process_agent(method: str, args: tuple):
+    return getattr(_process_agent, method)(*args)
+
 
 # class AGTAgent(ABC):
 #     """base class for agt agents that can connect to the server."""
@@ -67,7 +99,9 @@ from core.agents.common.base_agent import BaseAgent
 class AGTClient:
     """client for connecting to the agt server."""
     
-    def __init__(self, agent: BaseAgent, host: str = "localhost", port: int = 8080, verbose: bool = False):
+    def __init__(self, agent: BaseAgent, host: str = "localhost", port: int = 8080, verbose: bool = False,
+                 offload: str = "thread", profile: bool = False, report_profile: bool = False,
+                 policy: Optional[Dict[str, Any]] = None):
         self.agent = agent
         self.host = host
         self.port = port
@@ -76,25 +110,36 @@ class AGTClient:
         self.writer = None
         self.connected = False
         self.should_exit = False  # Add exit flag
+        self.logger = logger
+        if verbose:
+            self.logger.setLevel(logging.DEBUG)
+
+        #session resumption, the server hands out a token we present again after a dropped connection
+        self.session_token = None
+        self.reconnect_timeout = 30.0
+        self.tournament_finished = False
+
+        #agent callbacks run on one worker thread (or process) so a slow get_action doesn't stop
+        #us reading the socket and answering heartbeats. "none" runs them on the event loop
+        if offload not in OFFLOAD_MODES:
+            raise ValueError(f"offload must be one of {', '.join(OFFLOAD_MODES)}, got {offload!r}")
+        self.offload = offload
+        self._executor: Optional[concurrent.futures.Executor] = None
+        self._received_at: Optional[float] = None  # time.monotonic() when the message being handled arrived
+
+        #self-profiling, timings and sizes of every frame in and out (see profiler.py). the summary is
+        #printed when the tournament ends, and sent to the server as well with report_profile
+        self.profiler: Optional[ClientProfiler] = ClientProfiler() if profile or report_profile else None
+        self.report_profile = report_profile
+        self._profile_shown = False
+
+        #a table policy (see core/policy.py) the server plays for us without asking every round,
+        #if the server rejects it the agent plays as usual
+        self.policy = policy
     
-    def log(self, message: str, level: str = "info"):
-        """Log message with appropriate level and formatting."""
-        # if level == "debug" and not self.verbose:
-        #     return
-        
-        prefix = ""
-        if level == "debug":
-            prefix = "[DEBUG] "
-        elif level == "info":
-            prefix = "[INFO] "
-        elif level == "success":
-            prefix = "[SUCCESS] "
-        elif level == "warning":
-            prefix = "[WARNING] "
-        elif level == "error":
-            prefix = "[ERROR] "
-        
-        print(f"{prefix}{message}")
+    def log(self, message: str, level: str = "info", *args):
+        """Log message with appropriate level, %-style args are only formatted if the level is enabled."""
+        self.logger.log(_LOG_LEVELS.get(level, logging.INFO), message, *args)
     
     async def connect(self):
         """connect to the agt server."""
@@ -105,6 +150,8 @@ class AGTClient:
             
             # handle initial handshake
             await self.setup_server_connection()
+            if self.connected and self.policy is not None:
+                await self.send_message({"message": "upload_policy", "policy": self.policy})
             
         except Exception as e:
             self.log(f"Failed to connect to server: {e}", "error")
@@ -121,7 +168,7 @@ class AGTClient:
 
         # wait for request_client_info
         msg = await self.receive_message()
-        self.log(f"Received: {msg}", "debug")
+        self.log("Received: %s", "debug", msg)
         if not msg or msg.get("message") != "request_client_info":
             self.log("Failed: expected request_client_info", "error")
             self.connected = False
@@ -129,23 +176,37 @@ class AGTClient:
 
         # send device id
         self.log("Sending client info...", "debug")
-        await self.send_message({
+        client_info = {
             "message": "provide_client_info",
             "device_id": self.agent.device_id,
             "player_name": self.agent.name,
-            "game_type": self.agent.game_title
-        })
+            "game_type": self.agent.game_title,
+            "heartbeat": True,  # we answer pings, so the server may evict us when we go quiet
+        }
+        if self.session_token:
+            client_info["session_token"] = self.session_token
+        if self.report_profile:
+            #so the server waits for our profile before closing the connection at the end
+            client_info["report_profile"] = True
+        await self.send_message(client_info)
 
 
 
-        # wait for connection_established
+        # wait for connection_established, the server may queue us first if the lobby is full
         message = await self.receive_message()
-        self.log(f"Received: {message}", "debug")
+        self.log("Received: %s", "debug", message)
+        while message and message.get("message") == "queued":
+            self.log(f"Lobby is full, waiting for a seat (position {message.get('position')})", "info")
+            message = await self.receive_message()
         if message and message.get("message") == "connection_established":
             assigned_name = message.get("assigned_name")
             if assigned_name:
                 self.agent.name = assigned_name
-            self.log(f"Connection established as '{self.agent.name}'", "success")
+            self.session_token = message.get("session_token", self.session_token)
+            if message.get("resumed"):
+                self.log(f"Session resumed as '{self.agent.name}'", "success")
+            else:
+                self.log(f"Connection established as '{self.agent.name}'", "success")
             self.log("Connection handshake complete", "debug")
         else:
             self.log("Failed to establish connection", "error")
@@ -185,10 +246,17 @@ class AGTClient:
         if not self.connected:
             self.log("Not connected to server", "error")
             return
+        #a reader task keeps draining the socket and answering pings while messages are handled
+        inbox: asyncio.Queue = asyncio.Queue()
+        reader_task = asyncio.create_task(self._read_loop(inbox))
         try:
             while not self.should_exit:
-                message = await self.receive_message()
+                self._received_at, message = await inbox.get()
                 if not message:
+                    #connection dropped mid tournament, try to get our seat back
+                    if await self._reconnect():
+                        reader_task = asyncio.create_task(self._read_loop(inbox))
+                        continue
                     break
                 # If game_end, break after handling
                 should_exit = await self.handle_message(message)
@@ -199,7 +267,74 @@ class AGTClient:
         except Exception as e:
             self.log(f"Error in client loop: {e}", "error")
         finally:
+            reader_task.cancel()
+            if not self._profile_shown:
+                await self.show_profile(send=False)  # e.g. ladder mode, or the connection dropped
             await self.disconnect()
+            self.close_executor()
+
+    async def _read_loop(self, inbox: asyncio.Queue):
+        """read messages into the inbox until the connection drops, answering pings straight away."""
+        try:
+            while True:
+                message = await self._next_message()
+                received_at = time.monotonic()
+                if message and message.get("message") == "ping":
+                    await self.handle_message(message)
+                    continue
+                inbox.put_nowait((received_at, message))
+                if not message:
+                    return
+        except Exception as e:
+            self.log(f"Reader stopped: {e}", "debug")
+            inbox.put_nowait((time.monotonic(), None))
+
+    async def _next_message(self) -> Optional[Dict[str, Any]]:
+        """
+        the next message for the read loop, None once the connection is gone.
+
+        only the end of the stream or a socket error counts as a dropped connection. a
+        malformed line is logged and skipped, and a quiet server is left to the heartbeat,
+        so unlike receive_message there's no read timeout.
+        """
+        while not self.should_exit:
+            try:
+                data = await self.reader.readline()
+            except ValueError as e:
+                # a line over the stream limit, the reader has already dropped it
+                self.log(f"Skipping oversized message: {e}", "error")
+                continue
+            except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                self.log(f"Connection error: {e}", "debug")
+                return None
+            if not data:
+                self.log("No data received (connection closed)", "debug")
+                return None
+            message = self._decode_message(data)
+            if message is not None:
+                return message
+        return None
+
+    async def call_agent(self, method: str, *args) -> Any:
+        """call an agent method on the offload worker, in order with every other agent call."""
+        if self.offload == "none":
+            return getattr(self.agent, method)(*args)
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            if self.offload == "process":
+                # the worker gets its own copy of the agent, all its state lives there from now on
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1, initializer=_init_agent_process, initargs=(self.agent,))
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="agt-agent")
+        if self.offload == "process":
+            return await loop.run_in_executor(self._executor, _call_process_agent, method, args)
+        return await loop.run_in_executor(self._executor, getattr(self.agent, method), *args)
+
+    def close_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
     
 
 
@@ -211,17 +346,65 @@ class AGTClient:
 
 
 
+    async def _reconnect(self) -> bool:
+        """reconnect with our session token, backing off between attempts. returns True once resumed."""
+        if not self.session_token or self.tournament_finished or self.should_exit:
+            return False
+
+        self.log("Connection lost, trying to resume session...", "warning")
+        deadline = time.monotonic() + self.reconnect_timeout
+        delay = 0.5
+        while time.monotonic() < deadline and not self.should_exit:
+            try:
+                if self.writer:
+                    self.writer.close()
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+                self.connected = True
+                await self.setup_server_connection()
+                if self.connected:
+                    return True
+            except (OSError, ValueError) as e:
+                self.log(f"Reconnect failed: {e}", "debug")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+        self.log("Could not resume session", "error")
+        return False
+
+    async def show_profile(self, send: bool = False):
+        """print the self-profile, and send it to the server with send=True."""
+        if self.profiler is None:
+            return
+        self._profile_shown = True
+        summary = self.profiler.summary()
+        print(format_summary(summary, self.agent.name))
+        if send:
+            try:
+                await self.send_message({"message": "client_profile", "profile": summary})
+            except Exception as e:
+                self.log(f"Couldn't send the profile to the server: {e}", "debug")
+
+    async def choose_action(self, observation: Dict[str, Any]) -> Any:
+        """ask the agent for its action, subclasses can override this to change how decisions are made."""
+        return await self.call_agent("get_action", observation)
+
     async def handle_message(self, message: Dict[str, Any]):
         """handle messages from the server."""
 
 
         msg_type = message.get("message", "")
-        self.log(f"Received: {msg_type}", "debug")
+        self.log("Received: %s", "debug", msg_type)
         
 
 
 
-        if msg_type == "round_end":
+        if msg_type == "ping":
+            # heartbeat from the server, answer right away so we don't get evicted
+            await self.send_message({"message": "pong", "t": message.get("t")})
+            return False
+
+
+        elif msg_type == "round_end":
             self.log("Round ended", "info")
             return True  # Signal to exit
 
@@ -323,11 +506,11 @@ class AGTClient:
             
             # Reset the agent for a new game
             if hasattr(self.agent, 'reset'):
-                self.agent.reset()
+                await self.call_agent("reset")
             
             # Setup the agent if needed
             if hasattr(self.agent, 'setup'):
-                self.agent.setup()
+                await self.call_agent("setup")
             
             self.log(f"Agent setup complete for {game_type}", "info")
             
@@ -338,9 +521,9 @@ class AGTClient:
             
             # Set valuations on the agent
             if hasattr(self.agent, 'set_valuations'):
-                self.agent.set_valuations(valuations)
+                await self.call_agent("set_valuations", valuations)
             
-            self.log(f"Valuations set: {valuations}", "info")
+            self.log("Valuations set: %s", "debug", valuations)
             
         elif msg_type == "agent_update":
             # Handle agent update from async engine
@@ -354,15 +537,15 @@ class AGTClient:
             
             # Update the agent with the results
             if hasattr(self.agent, 'update'):
-                self.agent.update(observation, action, reward, done, info)
+                await self.call_agent("update", observation, action, reward, done, info)
             
             # Log the result
-            self.log(f"Round result: +{reward:.2f} points", "info")
+            self.log("Round result: +%.2f points", "debug", reward)
             
         elif msg_type == "request_action":
             # Handle action request silently unless verbose
             observation = message.get("observation", {})
-            print(f"[CLIENT DEBUG] {self.agent.name}: Received observation: {observation}")
+            self.log("%s: Received observation: %s", "debug", self.agent.name, observation)
             
             
             # # Special handling for auction games - setup agent and set valuations
@@ -378,7 +561,9 @@ class AGTClient:
             #         print(f"[CLIENT DEBUG] {self.agent.name}: Set valuations to {observation['valuations']}")
             
             
-            action = self.agent.get_action(observation)
+            decision_started = time.monotonic()
+            action = await self.choose_action(observation)
+            decision_time = time.monotonic() - decision_started
             #print(f"[CLIENT DEBUG] {self.agent.name}: Sending action: {action}")
             
             # For ADX games, we need to serialize the OneDayBidBundle to a simple format
@@ -389,10 +574,16 @@ class AGTClient:
                 # For other games, use the action as-is
                 serialized_action = action
             
-            await self.send_message({
+            reply = {
                 "message": "action",
-                "action": serialized_action
-            })
+                "action": serialized_action,
+                # so the server can tell our thinking apart from the network
+                "decision_time": decision_time,
+                "client_time": time.monotonic() - (self._received_at or decision_started),
+            }
+            if "request_id" in message:
+                reply["request_id"] = message["request_id"]
+            await self.send_message(reply)
 
 
 
@@ -409,7 +600,7 @@ class AGTClient:
             #print(f"[CLIENT DEBUG] {self.agent.name}: Received round result - reward: {reward}, info: {info}")
             # Note: The server already called update() on the agent, so we don't need to call it again here
             round_num = message.get('round', 0)
-            self.log(f"Round {round_num}: +{reward:.2f} points", "info")
+            self.log("Round %s: +%.2f points", "debug", round_num, reward)
 
         elif msg_type == "waiting_for_tournament":
             # Handle waiting message from server
@@ -424,6 +615,7 @@ class AGTClient:
 
         elif msg_type == "tournament_complete":
             # Handle tournament completion with JSON results
+            self.tournament_finished = True
             results = message.get("results", {})
             tournament_results = results.get("tournament_results", [])
             summary = results.get("summary", {})
@@ -444,6 +636,26 @@ class AGTClient:
             
             print("="*50)
             self.log("Tournament completed successfully", "info")
+            await self.show_profile(send=self.report_profile)
+
+        elif msg_type == "policy_accepted":
+            self.log(f"Server accepted the policy ({message.get('states')} states), it plays it for us from the next game", "success")
+
+        elif msg_type == "policy_rejected":
+            self.log(f"Server rejected the policy: {message.get('error')}, the agent plays instead", "warning")
+
+        elif msg_type == "policy_cleared":
+            self.log("Policy removed, the agent plays from the next game", "info")
+
+        elif msg_type == "ladder_update":
+            # ladder mode: one game done, the next starts when opponents are free
+            self.log("Ladder game done: %+.2f points, rating %.0f (%+.0f), rank %d/%d after %d games", "info",
+                     message.get("reward", 0), message.get("rating", 0), message.get("rating_change", 0),
+                     message.get("rank", 0), message.get("num_ranked", 0), message.get("games", 0))
+            for entry in message.get("leaderboard", []):
+                self.log("%3d. %-20s | rating: %6.1f | games: %3d | w/l/t: %d/%d/%d", "debug",
+                         entry['rank'], entry['agent'], entry['rating'], entry['games'],
+                         entry['wins'], entry['losses'], entry['ties'])
 
         
         return False 
@@ -476,8 +688,10 @@ class AGTClient:
             # message = convert_numpy(message)
 
 
-            self.log(f"Sending: {message}", "debug")
+            self.log("Sending: %s", "debug", message)
             data = json.dumps(message).encode() + b'\n'
+            if self.profiler is not None:
+                self.profiler.sent(message.get("message", ""), len(data))
             self.writer.write(data)
             await self.writer.drain()
 
@@ -510,22 +724,31 @@ class AGTClient:
                 self.log("No data received (connection closed)", "debug")
                 return None
             
-            # Decode and strip whitespace
-            decoded_data = data.decode().strip()
-            if not decoded_data:
-                self.log("Empty data received", "debug")
-                return None
-                
-            try:
-                message = json.loads(decoded_data)
-                return message
-            except json.JSONDecodeError as e:
-                self.log(f"JSON decode error: {e}", "error")
-                self.log(f"Raw data: {repr(decoded_data)}", "debug")
-                return None
+            return self._decode_message(data)
         except Exception as e:
             self.log(f"Receive exception: {e}", "error")
             return None
+
+    def _decode_message(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """one line off the socket as a message, None (logged) for a blank or malformed line."""
+        # Decode and strip whitespace
+        decoded_data = data.decode(errors="replace").strip()
+        if not decoded_data:
+            self.log("Empty data received", "debug")
+            return None
+
+        try:
+            message = json.loads(decoded_data)
+        except json.JSONDecodeError as e:
+            self.log(f"JSON decode error: {e}", "error")
+            self.log("Raw data: %r", "debug", decoded_data)
+            return None
+        if not isinstance(message, dict):
+            self.log("Ignoring a message that isn't an object: %r", "error", decoded_data)
+            return None
+        if self.profiler is not None:
+            self.profiler.received(message.get("message", ""), len(data))
+        return message
     
 
 
@@ -8,19 +8,22 @@ for competitions and testing.
 
 import asyncio
 import argparse
+import json
 import sys
 import os
 
 # Add the server directory to the path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from client import AGTClient
+from client import AGTClient, OFFLOAD_MODES
+from core.log import setup_logging, parse_levels
 from adapters import load_agent_from_stencil
 
 
 async def connect_agent_to_server(agent, game_type: str, name: str = None, 
                                  host: str = 'localhost', port: int = 8080, 
-                                 verbose: bool = False):
+                                 verbose: bool = False, offload: str = "thread", profile: str = "off",
+                                 policy: dict = None):
     """
     Connect an agent to the AGT server.
     
@@ -31,6 +34,9 @@ async def connect_agent_to_server(agent, game_type: str, name: str = None,
         host: Server host
         port: Server port
         verbose: Enable verbose output
+        offload: Where agent callbacks run (thread, process or none)
+        profile: Self-profile the client: off, on (print a summary at the end) or report (also send it to the server)
+        policy: Table policy for the server to play instead of the agent (see core/policy.py)
     
     Returns:
         bool: True if connection and game join successful, False otherwise
@@ -45,7 +51,8 @@ async def connect_agent_to_server(agent, game_type: str, name: str = None,
         
         # Create client and connect
         print(f"Connecting to server at {host}:{port}...")
-        client = AGTClient(agent, host, port, verbose=verbose)
+        client = AGTClient(agent, host, port, verbose=verbose, offload=offload,
+                           profile=profile != "off", report_profile=profile == "report", policy=policy)
         await client.connect()
         
         if client.connected:
@@ -72,8 +79,16 @@ async def main():
     parser.add_argument('--host', type=str, default='localhost', help='Server host')
     parser.add_argument('--port', type=int, default=8080, help='Server port')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose debug output')
+    parser.add_argument('--offload', type=str, choices=OFFLOAD_MODES, default='thread',
+                        help='Run the agent on a worker thread (default), a worker process (for cpu-heavy agents) or the event loop (none)')
+    parser.add_argument('--profile', type=str, choices=['off', 'on', 'report'], default='off',
+                        help='Time every message and print where the time went at the end (report also sends it to the server)')
+    parser.add_argument('--policy', type=str, help='JSON file with a table policy for the server to play locally (see core/policy.py)')
+    parser.add_argument('--log-level', type=str, default='info', help='Default log level (debug, info, warning, error)')
+    parser.add_argument('--log', type=str, default='', help='Per-component log levels, e.g. client=debug')
     
     args = parser.parse_args()
+    setup_logging(args.log_level, parse_levels(args.log))
     
     # Validate stencil file exists
     if not os.path.exists(args.stencil):
@@ -87,9 +102,14 @@ async def main():
         
         print(f"Successfully loaded agent: {agent.name}")
         
+        policy = None
+        if args.policy:
+            with open(args.policy) as f:
+                policy = json.load(f)
+
         # Connect agent to server
         success = await connect_agent_to_server(
-            agent, args.game, args.name, args.host, args.port, args.verbose
+            agent, args.game, args.name, args.host, args.port, args.verbose, args.offload, args.profile, policy
         )
         
         if not success:
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+ratings and matchmaking for the server's ladder mode.
+
+in tournament mode everyone waits for ctrl+z, plays a fixed number of groupings and
+sits idle afterwards. in ladder mode a game starts as soon as enough players are idle
+in the lobby, and players go back to the pool when their game ends, so a lab can keep
+iterating against live opponents for as long as the server runs.
+
+ratings are elo. a game with n players counts as every pair of them playing a match:
+the higher reward wins, equal rewards draw, and a player who forfeited loses to
+everyone. the k factor is split over the n - 1 pairings so a 3-player lemonade game
+moves ratings about as much as a 2-player rps game.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set
+
+
+DEFAULT_RATING = 1500.0
+DEFAULT_K = 32.0
+RECENT_OPPONENTS = 3  # try not to pair someone with the players from their last few games
+
+
+@dataclass
+class LadderEntry:
+    """one player's standing on the ladder."""
+    name: str
+    rating: float = DEFAULT_RATING
+    games: int = 0
+    wins: int = 0
+    losses: int = 0
+    ties: int = 0
+    forfeits: int = 0
+    total_reward: float = 0.0
+    idle_since: float = 0.0  # time.monotonic() when the player last became available
+    recent: List[Set[str]] = field(default_factory=list)  # opponents in the last few games
+
+    def as_result(self, rank: int) -> Dict[str, object]:
+        """same fields as a tournament result, plus the rating and rank."""
+        decided = self.wins + self.losses + self.ties
+        return {
+            'rank': rank,
+            'agent': self.name,
+            'rating': round(self.rating, 1),
+            'total score': self.total_reward,
+            'average score': self.total_reward / max(self.games, 1),
+            'games': self.games,
+            'wins': self.wins,
+            'losses': self.losses,
+            'ties': self.ties,
+            'forfeits': self.forfeits,
+            'win rate': self.wins / max(decided, 1),
+        }
+
+
+class Ladder:
+    """elo ratings plus rating-aware matchmaking over the idle players."""
+
+    def __init__(self, group_size: int, k_factor: float = DEFAULT_K, initial_rating: float = DEFAULT_RATING):
+        self.group_size = group_size
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.entries: Dict[str, LadderEntry] = {}
+        self.games_played = 0
+
+    def entry(self, name: str) -> LadderEntry:
+        if name not in self.entries:
+            self.entries[name] = LadderEntry(name, rating=self.initial_rating, idle_since=time.monotonic())
+        return self.entries[name]
+
+    def mark_idle(self, name: str):
+        self.entry(name).idle_since = time.monotonic()
+
+    # matchmaking
+
+    def pick_match(self, idle: Sequence[str]) -> Optional[List[str]]:
+        """
+        choose the next game from the idle players, or None if there aren't enough.
+
+        whoever has waited longest anchors the game so nobody starves, and the rest are the
+        players closest to them in rating. recent opponents count as further away so the
+        same pair doesn't play back to back while others are free.
+        """
+        if len(idle) < self.group_size:
+            return None
+        anchor = min(idle, key=lambda name: self.entry(name).idle_since)
+        anchor_entry = self.entry(anchor)
+        recent = set().union(*anchor_entry.recent) if anchor_entry.recent else set()
+
+        def distance(name: str) -> float:
+            gap = abs(self.entry(name).rating - anchor_entry.rating)
+            return gap + (1000.0 if name in recent else 0.0)
+
+        others = sorted((name for name in idle if name != anchor), key=distance)
+        return [anchor] + others[:self.group_size - 1]
+
+    # ratings
+
+    @staticmethod
+    def expected_score(rating: float, opponent: float) -> float:
+        return 1.0 / (1.0 + 10 ** ((opponent - rating) / 400.0))
+
+    def record_game(self, names: Sequence[str], rewards: Sequence[float], forfeited: Set[int] = frozenset()) -> Dict[str, float]:
+        """update ratings and records for a finished game, returns each player's rating change."""
+        entries = [self.entry(name) for name in names]
+        ratings = [entry.rating for entry in entries]
+        n = len(entries)
+        k = self.k_factor / max(n - 1, 1)
+        deltas = [0.0] * n
+
+        for i in range(n):
+            for j in range(n):
+                if i == j:
+                    continue
+                if i in forfeited and j in forfeited:
+                    score = 0.5
+                elif i in forfeited:
+                    score = 0.0
+                elif j in forfeited:
+                    score = 1.0
+                elif rewards[i] > rewards[j]:
+                    score = 1.0
+                elif rewards[i] < rewards[j]:
+                    score = 0.0
+                else:
+                    score = 0.5
+                deltas[i] += k * (score - self.expected_score(ratings[i], ratings[j]))
+
+        best = max((rewards[i] for i in range(n) if i not in forfeited), default=None)
+        for i, entry in enumerate(entries):
+            entry.rating += deltas[i]
+            entry.recent = (entry.recent + [{name for name in names if name != entry.name}])[-RECENT_OPPONENTS:]
+            if i in forfeited:
+                # forfeited games count as a loss and not towards the score, like in the tournament
+                entry.forfeits += 1
+                entry.losses += 1
+                continue
+            entry.games += 1
+            entry.total_reward += rewards[i]
+            if sum(1 for j in range(n) if j not in forfeited and rewards[j] == best) > 1 and rewards[i] == best:
+                entry.ties += 1
+            elif rewards[i] == best:
+                entry.wins += 1
+            else:
+                entry.losses += 1
+
+        self.games_played += 1
+        return {entry.name: deltas[i] for i, entry in enumerate(entries)}
+
+    def leaderboard(self, limit: Optional[int] = None) -> List[Dict[str, object]]:
+        """standings by rating, best first."""
+        ranked = sorted(self.entries.values(), key=lambda entry: (-entry.rating, entry.name))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [entry.as_result(rank) for rank, entry in enumerate(ranked, 1)]
+
+    def rank(self, name: str) -> int:
+        rating = self.entry(name).rating
+        return 1 + sum(1 for entry in self.entries.values() if entry.rating > rating)
@@ -1,10 +1,12 @@
 import os
 import json
 import importlib.util
+import multiprocessing
 import random
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 from collections import defaultdict
 
 # Add parent directories to path
@@ -12,7 +14,16 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from core.game.LemonadeGame import LemonadeGame
 from core.engine import Engine
-from server.adapters import create_adapter
+from core.rng import SeedBank, sample, seed_globals
+try:
+    from server.adapters import create_adapter
+except ImportError:
+    # server/ itself is on the path, so server is server.py
+    from adapters import create_adapter
+
+class TournamentCancelled(Exception):
+    """raised by run_tournament when its cancel event is set before the last game"""
+
 
 class AgentSubmission:
     """Simple container for a submitted agent"""
@@ -23,6 +34,10 @@ class AgentSubmission:
         self.submitted_at = datetime.now()
         self.agent = None  # Will be loaded agent instance
 
+    def spec(self) -> Tuple[str, str, str]:
+        """what a worker process needs to load the agent itself"""
+        return self.student_id, self.file_path, self.agent_name
+
 class LemonadeCompetition:
     """Main class to handle the entire lemonade competition"""
     
@@ -69,7 +84,8 @@ class LemonadeCompetition:
         
         valid_submissions = []
         
-        for student_id, submission in self.submissions.items():
+        # a copy, the web server can scan for agents while a tournament loads them
+        for student_id, submission in list(self.submissions.items()):
             try:
                 # Load agent from file
                 agent = self._load_agent_from_file(submission.file_path, submission.agent_name)
@@ -104,8 +120,21 @@ class LemonadeCompetition:
             print(f"Error loading {file_path}: {e}")
             return None
     
-    def run_tournament(self, num_competitions: int = 10, rounds_per_comp: int = 100) -> Dict[str, Any]:
-        """Run tournament and return results"""
+    def run_tournament(self, num_competitions: int = 10, rounds_per_comp: int = 100, workers: int = 1,
+                       seed: Optional[int] = None, progress: Optional[Callable[[int, int], None]] = None,
+                       cancel=None) -> Dict[str, Any]:
+        """Run tournament and return results
+
+        workers > 1 plays the games on that many processes (0 for one per core), each
+        loading every agent from its file once. every game reseeds the global random
+        state from the tournament seed and its number, so with a seed the tournament
+        gives the same results whatever the number of workers, as long as the agents'
+        reset() clears what they learned in earlier games.
+
+        progress is called with (games done, games total) before the first game and after
+        every game. once the cancel event (a threading.Event) is set, the games that haven't
+        started are dropped and TournamentCancelled is raised.
+        """
         valid_submissions = self.load_all_agents()
         
         if len(valid_submissions) < 3:
@@ -117,17 +146,22 @@ class LemonadeCompetition:
         games_played = {sub.agent_name: 0 for sub in valid_submissions}
         
         print(f"Running tournament with {len(valid_submissions)} agents")
-        
+
+        # who plays whom is drawn up front, from its own stream, so it doesn't depend on the games
+        seeds = SeedBank(seed)
+        schedule = seeds.schedule()
+        games = []
         for comp_num in range(num_competitions):
-            print(f"Competition {comp_num + 1}/{num_competitions}")
-            
+            self.game_counter += 1
             # Randomly select 3 agents for this competition
-            selected_agents = random.sample(valid_submissions, 3)
-            
-            # Run the competition
-            comp_results = self._run_single_competition(selected_agents, rounds_per_comp)
-            
-            # Update scores
+            games.append((self.game_counter, sample(schedule, valid_submissions, 3), seeds.sequence(comp_num)))
+
+        finished = {game_number: (selected_agents, comp_results)
+                    for game_number, selected_agents, comp_results
+                    in self._play_games(games, rounds_per_comp, workers, progress, cancel)}
+        # Update scores, in game order so the sums don't depend on which game finished first
+        for game_number in sorted(finished):
+            selected_agents, comp_results = finished[game_number]
             for i, submission in enumerate(selected_agents):
                 scores[submission.agent_name] += comp_results[i]
                 games_played[submission.agent_name] += 1
@@ -149,27 +183,79 @@ class LemonadeCompetition:
             "metadata": {
                 "total_agents": len(valid_submissions),
                 "competitions_run": num_competitions,
-                "rounds_per_competition": rounds_per_comp
+                "rounds_per_competition": rounds_per_comp,
+                "seed": int(seeds.entropy)
             }
         }
         
         self.results = results
         return results
+
+    def _play_games(self, games: List[Tuple[int, List[AgentSubmission], Any]], rounds: int, workers: int,
+                    progress=None, cancel=None) -> Iterator[Tuple[int, List[AgentSubmission], List[float]]]:
+        """play (game number, agents, seed) games, yielding each game's number, agents and rewards as it finishes"""
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        if progress is not None:
+            progress(0, len(games))
+        if workers <= 1 or len(games) <= 1:
+            for comp_num, (game_number, selected_agents, seed) in enumerate(games):
+                if cancel is not None and cancel.is_set():
+                    raise TournamentCancelled(f"cancelled after {comp_num} of {len(games)} games")
+                print(f"Competition {comp_num + 1}/{len(games)}")
+                final_rewards, game_info = self._play_game(selected_agents, rounds, game_number, seed)
+                self._record_game(game_info)
+                if progress is not None:
+                    progress(comp_num + 1, len(games))
+                yield game_number, selected_agents, final_rewards
+            return
+
+        specs = {sub.student_id: sub.spec() for _, selected_agents, _ in games for sub in selected_agents}
+        print(f"Playing {len(games)} games on {workers} worker processes")
+        # spawned workers, forking the threads of the web server isn't safe
+        with ProcessPoolExecutor(max_workers=min(workers, len(games)), mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(self.agents_dir, list(specs.values()))) as pool:
+            futures = {
+                pool.submit(_play_worker_game, [sub.student_id for sub in selected_agents], rounds, game_number, seed):
+                    (game_number, selected_agents)
+                for game_number, selected_agents, seed in games
+            }
+            # merged in completion order, the game numbers say which game it was
+            for done, future in enumerate(as_completed(futures), 1):
+                final_rewards, game_info = future.result()
+                self._record_game(game_info)
+                if progress is not None:
+                    progress(done, len(games))
+                game_number, selected_agents = futures[future]
+                yield game_number, selected_agents, final_rewards
+                if cancel is not None and cancel.is_set() and done < len(games):
+                    # the games already running on a worker still finish, the rest never start
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise TournamentCancelled(f"cancelled after {done} of {len(games)} games")
     
-    def _run_single_competition(self, submissions: List[AgentSubmission], rounds: int) -> List[float]:
+    def _run_single_competition(self, submissions: List[AgentSubmission], rounds: int, seed=None) -> List[float]:
         """Run one competition between 3 agents"""
-        agents = [sub.agent for sub in submissions]
-        agent_names = [sub.agent_name for sub in submissions]
-        
         # Increment game counter
         self.game_counter += 1
+        final_rewards, game_info = self._play_game(submissions, rounds, self.game_counter, seed)
+        self._record_game(game_info)
+        return final_rewards
+
+    def _play_game(self, submissions: List[AgentSubmission], rounds: int, game_number: int,
+                   seed=None) -> Tuple[List[float], Dict]:
+        """Play one game between 3 loaded agents, returns the final rewards and the game info"""
+        agents = [sub.agent for sub in submissions]
+        agent_names = [sub.agent_name for sub in submissions]
+
+        if seed is not None:
+            seed_globals(seed)
         
         # Create game
         game = LemonadeGame(rounds=rounds)
         
         # Track detailed game information
         game_info = {
-            "game_number": self.game_counter,
+            "game_number": game_number,
             "agents": agent_names,
             "rounds": rounds,
             "agent_actions": {name: defaultdict(int) for name in agent_names},
@@ -182,14 +268,13 @@ class LemonadeCompetition:
         # Add final statistics to game info
         for i, name in enumerate(agent_names):
             game_info["agent_utilities"][name] = final_rewards[i]
-        
-        # Add game info to log
+
+        return final_rewards, game_info
+
+    def _record_game(self, game_info: Dict):
+        """Add a finished game to the log and print its summary"""
         self.game_log.append(game_info)
-        
-        # Print game summary
         self._print_game_summary(game_info)
-        
-        return final_rewards
     
     def _run_game_with_logging(self, game: LemonadeGame, agents: List, agent_names: List[str], game_info: Dict) -> List[float]:
         """Run a game while logging detailed information"""
@@ -313,3 +398,25 @@ class LemonadeCompetition:
                 f.write("\n")
         
         print(f"Game log saved to {filename}")
+
+
+# the agents of a worker process, loaded once by _init_worker and reused for every game it plays
+_worker_competition: Optional[LemonadeCompetition] = None
+_worker_submissions: Dict[str, AgentSubmission] = {}
+
+
+def _init_worker(agents_dir: str, specs: List[Tuple[str, str, str]]):
+    global _worker_competition, _worker_submissions
+    _worker_competition = LemonadeCompetition(agents_dir)
+    _worker_submissions = {}
+    for student_id, file_path, agent_name in specs:
+        submission = AgentSubmission(student_id, file_path, agent_name)
+        submission.agent = _worker_competition._load_agent_from_file(file_path, agent_name)
+        if submission.agent is None:
+            raise RuntimeError(f"worker couldn't load the agent of {student_id} from {file_path}")
+        _worker_submissions[student_id] = submission
+
+
+def _play_worker_game(student_ids: List[str], rounds: int, game_number: int, seed) -> Tuple[List[float], Dict]:
+    submissions = [_worker_submissions[student_id] for student_id in student_ids]
+    return _worker_competition._play_game(submissions, rounds, game_number, seed)
@@ -1,16 +1,27 @@
+import json
 import os
 import sys
 
 # Add parent directories to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string
 from lemonade_competition import LemonadeCompetition
+from tournament_jobs import JobQueue
 import requests
 
 app = Flask(__name__)
 competition = LemonadeCompetition()
 
+
+def save_job_results(job):
+    competition.save_results()
+    competition.save_game_log()  # Automatically save game log
+
+
+# tournaments run in the background, one at a time, see tournament_jobs.py
+jobs = JobQueue(competition, on_done=save_job_results)
+
 # Simple HTML template
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -23,6 +34,7 @@ HTML_TEMPLATE = """
         .submission { margin: 10px 0; padding: 10px; background: #f9f9f9; }
         .error { color: red; }
         .success { color: green; }
+        form.action { margin: 1em 0; }
     </style>
 </head>
 <body>
@@ -46,12 +58,29 @@ HTML_TEMPLATE = """
     <div class="section">
         <h2>Actions</h2>
         <p><a href="/scan">Scan for New Agents</a></p>
-        <p><a href="/run_tournament">Run Tournament</a></p>
+        <form class="action" method="post" action="/run_tournament"><button type="submit">Run Tournament</button>
+            (in the background, see <a href="/jobs">jobs</a>)</form>
         <p><a href="/results">View Results</a></p>
         <p><a href="/push_to_leaderboard">Push to Leaderboard</a></p>
         <p><a href="/save_game_log">Save Game Log</a></p>
     </div>
     
+    {% if recent_jobs %}
+        <div class="section">
+            <h2>Tournaments</h2>
+            {% for job in recent_jobs %}
+                <div class="submission">
+                    <a href="/jobs/{{ job.id }}">{{ job.id }}</a>: {{ job.status }},
+                    {{ job.games_done }}/{{ job.games_total }} games
+                    {% if job.eta is not none %}, about {{ job.eta|round|int }}s left{% endif %}
+                    {% if job.status == "done" %} - <a href="/jobs/{{ job.id }}/results">results</a>{% endif %}
+                    {% if job.error %}<span class="error">{{ job.error }}</span>{% endif %}
+                    {% if job.save_error %}<span class="error">results not saved: {{ job.save_error }}</span>{% endif %}
+                </div>
+            {% endfor %}
+        </div>
+    {% endif %}
+
     {% if message %}
         <div class="section">
             <p class="{{ message_type }}">{{ message }}</p>
@@ -63,7 +92,8 @@ HTML_TEMPLATE = """
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE, submissions=competition.submissions)
+    return render_template_string(HTML_TEMPLATE, submissions=competition.submissions,
+                                  recent_jobs=jobs.snapshots()[:5])
 
 @app.route('/scan')
 def scan_agents():
@@ -71,15 +101,97 @@ def scan_agents():
     message = f"Found {len(new_agents)} new agents" if new_agents else "No new agents found"
     return render_template_string(HTML_TEMPLATE, 
                                 submissions=competition.submissions,
+                                recent_jobs=jobs.snapshots()[:5],
                                 message=message,
                                 message_type="success")
 
-@app.route('/run_tournament')
+# tournaments with fewer games play in order by default, spawning a process per core that
+# each load every agent costs more than the games do
+PARALLEL_MIN_COMPETITIONS = 200
+
+
+@app.route('/run_tournament', methods=['POST'])
 def run_tournament():
-    results = competition.run_tournament()
-    competition.save_results()
-    competition.save_game_log()  # Automatically save game log
-    return jsonify(results)
+    """
+    queue a tournament, ?competitions=5000&rounds=1000&workers=0&seed=42 (workers=0 is one
+    process per core, the default from PARALLEL_MIN_COMPETITIONS games up, otherwise 1)
+    """
+    try:
+        params = {
+            "num_competitions": _int_arg("competitions", 10, minimum=1),
+            "rounds_per_comp": _int_arg("rounds", 100, minimum=1),
+            "workers": _int_arg("workers", None, minimum=0),
+            "seed": _int_arg("seed", None, minimum=0),
+        }
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if params["workers"] is None:
+        params["workers"] = 0 if params["num_competitions"] >= PARALLEL_MIN_COMPETITIONS else 1
+    job, created = jobs.submit(**params)
+    # an identical tournament is already queued or running, that's the one to follow
+    return jsonify({**job.snapshot(), "coalesced": not created}), 202
+
+
+def _int_arg(name: str, default, minimum: int):
+    # request.values.get(type=int) would quietly fall back to the default on a typo
+    value = request.values.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number, got {value!r}")
+    if number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {number}")
+    return number
+
+
+@app.route('/jobs')
+def list_jobs():
+    return jsonify(jobs.snapshots())
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"no job {job_id}"}), 404
+    return jsonify(job.snapshot())
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """server-sent progress events until the job finishes, curl -N works"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"no job {job_id}"}), 404
+    interval = request.args.get("interval", 1.0, type=float)
+
+    def stream():
+        while not job.wait(timeout=max(interval, 0.1)):
+            yield f"event: progress\ndata: {json.dumps(job.snapshot())}\n\n"
+        yield f"event: {job.status}\ndata: {json.dumps(job.snapshot())}\n\n"
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"no job {job_id}"}), 404
+    return jsonify(job.snapshot())
+
+
+@app.route('/jobs/<job_id>/results')
+def job_results(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"no job {job_id}"}), 404
+    if job.status != "done":
+        # not there yet (202) or never will be (409)
+        return jsonify(job.snapshot()), 409 if job.finished else 202
+    return jsonify(job.results)
 
 @app.route('/save_game_log')
 def save_game_log():
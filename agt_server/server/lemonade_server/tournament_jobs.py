@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+background tournaments for the lemonade web server.
+
+a tournament over a whole class takes minutes, far too long for one request. the web
+server hands it to a JobQueue and answers straight away with the job, which a
+background thread plays with LemonadeCompetition.run_tournament (and its worker
+processes) while the browser polls or streams the progress:
+
+    job, created = jobs.submit(num_competitions=5000, rounds_per_comp=1000, workers=0)
+    job.snapshot()    # {"id": ..., "status": "running", "games_done": 1200, "games_total": 5000, "eta": 41.5, ...}
+    jobs.cancel(job.id)
+    job.results       # once job.status == "done"
+
+jobs run one at a time, in the order they were submitted, since they share the
+competition's agents and game log. submitting the same settings as a job that is still
+queued or running, with no agent file changed in between, returns that job instead of
+queueing another one, so a double click or two tabs play one tournament.
+"""
+
+import collections
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from lemonade_competition import LemonadeCompetition, TournamentCancelled
+
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class TournamentJob:
+    """one submitted tournament and how far it got."""
+    id: str
+    params: Dict[str, Any]
+    key: Tuple = ()
+    status: str = QUEUED
+    games_done: int = 0
+    games_total: int = 0
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    results: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    save_error: Optional[str] = None  # on_done failed, the job itself is still done
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    finished_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def progress(self, done: int, total: int):
+        """run_tournament's progress callback."""
+        self.games_done, self.games_total = done, total
+
+    def eta(self) -> Optional[float]:
+        """seconds left at the rate so far, None before the first game is done."""
+        if self.status != RUNNING or not self.games_done or self.started_at is None:
+            return None
+        elapsed = time.time() - self.started_at
+        return elapsed / self.games_done * (self.games_total - self.games_done)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """block until the job is finished, returns whether it is."""
+        return self.finished_event.wait(timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """the job as json, without the results."""
+        eta = self.eta()
+        return {
+            "id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "games_done": self.games_done,
+            "games_total": self.games_total,
+            "eta": None if eta is None else round(eta, 1),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_requested": self.cancel_event.is_set(),
+            "error": self.error,
+            "save_error": self.save_error,
+        }
+
+
+class JobQueue:
+    """plays submitted tournaments one after the other on a background thread."""
+
+    def __init__(self, competition: LemonadeCompetition, on_done: Optional[Callable[[TournamentJob], None]] = None,
+                 history: int = 50):
+        self.competition = competition
+        self.on_done = on_done  # called with every job that finished with results, e.g. to save them
+        self.history = history  # finished jobs kept for status and results, oldest dropped first
+        self.jobs: Dict[str, TournamentJob] = {}  # by id, in submission order
+        self._pending: Deque[TournamentJob] = collections.deque()
+        self._lock = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, **params) -> Tuple[TournamentJob, bool]:
+        """queue a tournament with run_tournament's arguments. returns the job and whether it is a new one."""
+        key = (tuple(sorted(params.items())), self._agents_fingerprint())
+        with self._lock:
+            for job in self.jobs.values():
+                if job.key == key and not job.finished and not job.cancel_event.is_set():
+                    return job, False
+            job = TournamentJob(id=uuid.uuid4().hex[:12], params=dict(params), key=key)
+            self.jobs[job.id] = job
+            self._pending.append(job)
+            self._forget_old_jobs()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="lemonade-jobs", daemon=True)
+                self._thread.start()
+            self._lock.notify()
+        return job, True
+
+    def cancel(self, job_id: str) -> Optional[TournamentJob]:
+        """cancel a queued job, or stop a running one after the games in progress. None if there is no such job."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                self._pending.remove(job)
+                self._finish(job, CANCELLED)
+        return job
+
+    def get(self, job_id: str) -> Optional[TournamentJob]:
+        return self.jobs.get(job_id)
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """every job we still know about, newest first."""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job.snapshot() for job in reversed(jobs)]
+
+    def _agents_fingerprint(self) -> Tuple:
+        # a changed, added or removed agent file makes the same settings a different tournament
+        agents_dir = self.competition.agents_dir
+        try:
+            names = sorted(name for name in os.listdir(agents_dir) if name.endswith('.py'))
+        except OSError:
+            return ()
+        fingerprint = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(agents_dir, name))
+            except OSError:
+                continue
+            fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(fingerprint)
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def _finish(self, job: TournamentJob, status: str, error: Optional[str] = None):
+        job.status, job.error, job.finished_at = status, error, time.time()
+        job.finished_event.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._lock.wait()
+                job = self._pending.popleft()
+                job.status, job.started_at = RUNNING, time.time()
+
+            status, error = DONE, None
+            try:
+                results = self.competition.run_tournament(**job.params, progress=job.progress,
+                                                          cancel=job.cancel_event)
+                if not results:
+                    status, error = FAILED, "need at least 3 agents to run a tournament"
+                job.results = results or None
+            except TournamentCancelled as e:
+                status, error = CANCELLED, str(e)
+            except Exception as e:
+                status, error = FAILED, f"{type(e).__name__}: {e}"
+            if status == DONE and self.on_done is not None:
+                # the tournament was played either way, a failed save doesn't lose the results
+                try:
+                    self.on_done(job)
+                except Exception as e:
+                    job.save_error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                self._finish(job, status, error)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+prometheus metrics for the agt server.
+
+the server used to report only through print output for the dashboard. ServerMetrics
+keeps counters, gauges and histograms for players, traffic, action latency, timeouts,
+event-loop lag and tournament progress, and MetricsHTTPServer serves them in the
+prometheus text exposition format on a local port (GET /metrics).
+
+no client library needed, the text format is simple enough to write by hand.
+"""
+
+import asyncio
+import bisect
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# seconds, tuned for agents answering within the 5s action timeout
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """monotonically increasing value, one per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    """value that goes up and down. a callback gauge is read at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Optional[Callable[[], Dict[LabelKey, float]]] = None):
+        super().__init__(name, help_text)
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        self.values[_label_key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self.callback is not None:
+            self.values = dict(self.callback())
+        return super().samples()
+
+
+class Histogram:
+    """cumulative bucket counts plus sum and count, one per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[LabelKey, List[float]] = {}  # label key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+        # counts are stored per bucket and made cumulative when rendering
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[index] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self.values.get(_label_key(labels))
+        return state[-1] if state else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, state in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class ServerMetrics:
+    """all metrics for one AGTServer process, labelled by game (the server's room)."""
+
+    def __init__(self, game: str, players: Callable[[], int] = lambda: 0, queued: Callable[[], int] = lambda: 0):
+        self.game = game
+        self._players = players
+        self._queued = queued
+        self._tournament_started_at: Optional[float] = None
+        self._tournament_finished_at: Optional[float] = None
+        self._tournament_rounds = 0
+
+        self.players = Gauge("agt_connected_players", "players with a seat in the lobby",
+                             lambda: {_label_key({"game": self.game}): self._players()})
+        self.queued = Gauge("agt_queued_connections", "connections waiting for a lobby seat",
+                            lambda: {_label_key({"game": self.game}): self._queued()})
+        self.active_games = Gauge("agt_active_games", "games currently being played")
+        self.messages_out = Counter("agt_messages_sent_total", "json messages written to clients")
+        self.bytes_out = Counter("agt_bytes_sent_total", "bytes written to clients")
+        self.messages_in = Counter("agt_messages_received_total", "json messages read from clients")
+        self.bytes_in = Counter("agt_bytes_received_total", "bytes read from clients")
+        self.action_latency = Histogram("agt_action_latency_seconds", "time from request_action to the player's answer")
+        self.decision_time = Histogram("agt_client_decision_seconds", "time the player's agent spent deciding, as reported by the client")
+        self.network_time = Histogram("agt_action_network_seconds",
+                                      "action latency minus the time the client held the request (network and server queueing)")
+        self.action_timeouts = Counter("agt_action_timeouts_total", "action requests that timed out")
+        self.default_actions = Counter("agt_default_actions_total", "default actions played for players that didn't answer")
+        self.games_completed = Counter("agt_games_completed_total", "games played to the end")
+        self.games_forfeited = Counter("agt_games_forfeited_total", "games cut short because a player left mid-game")
+        self.games_aborted = Counter("agt_games_aborted_total", "games stopped by an error or cancelled")
+        self.rounds = Counter("agt_rounds_total", "rounds played")
+        self.rounds_per_second = Gauge("agt_tournament_rounds_per_second",
+                                       "rounds per second over the current (or last) tournament",
+                                       self._rounds_per_second)
+        self.loop_lag = Histogram("agt_event_loop_lag_seconds", "how late the event loop ran a scheduled wakeup",
+                                  LOOP_LAG_BUCKETS)
+
+        self._all = [self.players, self.queued, self.active_games, self.messages_out, self.bytes_out,
+                     self.messages_in, self.bytes_in, self.action_latency, self.decision_time, self.network_time,
+                     self.action_timeouts,
+                     self.default_actions, self.games_completed, self.games_forfeited, self.games_aborted,
+                     self.rounds, self.rounds_per_second,
+                     self.loop_lag]
+        self._loop_lag_task: Optional[asyncio.Task] = None
+
+    # hooks called by the server, transport and engine
+
+    def record_sent(self, messages: int, num_bytes: int):
+        self.messages_out.inc(messages, game=self.game)
+        self.bytes_out.inc(num_bytes, game=self.game)
+
+    def record_received(self, num_bytes: int):
+        self.messages_in.inc(game=self.game)
+        self.bytes_in.inc(num_bytes, game=self.game)
+
+    def record_action(self, latency: Optional[float], defaulted: bool = False, timed_out: bool = False,
+                      decision_time: Optional[float] = None, client_time: Optional[float] = None):
+        if latency is not None:
+            self.action_latency.observe(latency, game=self.game)
+            # clients report how long they held the request, the rest is the network
+            if isinstance(decision_time, (int, float)) and decision_time >= 0:
+                self.decision_time.observe(decision_time, game=self.game)
+            if isinstance(client_time, (int, float)) and client_time >= 0:
+                self.network_time.observe(max(latency - client_time, 0.0), game=self.game)
+        if timed_out:
+            self.action_timeouts.inc(game=self.game)
+        if defaulted:
+            self.default_actions.inc(game=self.game)
+
+    def game_started(self):
+        self.active_games.inc(game=self.game)
+
+    def game_finished(self, outcome: str = "completed"):
+        """a game ended: "completed", "forfeited" (a player left) or "aborted" (an error)."""
+        self.active_games.dec(game=self.game)
+        counters = {"completed": self.games_completed, "forfeited": self.games_forfeited, "aborted": self.games_aborted}
+        counters[outcome].inc(game=self.game)
+
+    def round_played(self):
+        self.rounds.inc(game=self.game)
+        self._tournament_rounds += 1
+
+    def tournament_started(self):
+        self._tournament_started_at = time.monotonic()
+        self._tournament_finished_at = None
+        self._tournament_rounds = 0
+
+    def tournament_finished(self):
+        self._tournament_finished_at = time.monotonic()
+
+    def _rounds_per_second(self) -> Dict[LabelKey, float]:
+        if self._tournament_started_at is None:
+            rate = 0.0
+        else:
+            end = self._tournament_finished_at or time.monotonic()
+            rate = self._tournament_rounds / max(end - self._tournament_started_at, 1e-9)
+        return {_label_key({"game": self.game}): rate}
+
+    # event-loop lag
+
+    def start_loop_monitor(self, interval: float = 0.5):
+        """sample event-loop lag in the background, the loop must be running."""
+        if self._loop_lag_task is None or self._loop_lag_task.done():
+            self._loop_lag_task = asyncio.create_task(self._monitor_loop_lag(interval))
+
+    async def _monitor_loop_lag(self, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.loop_lag.observe(max(loop.time() - expected, 0.0))
+
+    # exposition
+
+    def render(self) -> str:
+        """all metrics in the prometheus text exposition format."""
+        lines = []
+        for metric in self._all:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHTTPServer:
+    """tiny http server answering GET /metrics, runs on the server's event loop."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, metrics: ServerMetrics, host: str = "127.0.0.1", port: int = 9100):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            # skip the headers, we don't need any of them
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode(errors="replace").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+                status, body = "200 OK", self.metrics.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {self.CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+multiplexed client: many agents over one connection.
+
+TAs fill brackets with 10-30 baseline bots, and each AGTClient opens its own socket and
+does its own handshake. MultiplexedClient connects once and registers all its agents
+in a single handshake; every message after that carries a "player" field with the
+agent's id on the connection, in both directions. each agent is still driven by an
+AGTClient (same message handling, same offloading of agent callbacks), fed from the
+shared connection instead of a socket of its own.
+
+usage:
+    python mux_client.py --game rps --bots 20
+    python mux_client.py --game lemonade --bots 30 --name ta_bot
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from client import AGTClient, OFFLOAD_MODES
+from core.agents.common.base_agent import BaseAgent
+from core.log import get_logger, setup_logging, parse_levels
+
+logger = get_logger("client")
+
+
+class _MultiplexedPlayer(AGTClient):
+    """an AGTClient whose messages come from and go to a MultiplexedClient connection."""
+
+    def __init__(self, mux: "MultiplexedClient", tag: str, agent: BaseAgent):
+        super().__init__(agent, mux.host, mux.port, mux.verbose, mux.offload)
+        self.mux = mux
+        self.tag = tag
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.connected = True
+
+    async def receive_message(self):
+        if self.should_exit:
+            return None
+        return await self.inbox.get()
+
+    async def _next_message(self):
+        # the connection's reader already skipped what it couldn't parse
+        return await self.receive_message()
+
+    async def send_message(self, message: Dict[str, Any]):
+        await self.mux.send({**message, "player": self.tag})
+
+    async def handle_message(self, message: Dict[str, Any]):
+        if message.get("message") == "player_closed":
+            # the server dropped this player, the others on the connection carry on
+            self.log("Removed from the server: %s", "warning", message.get("reason", "unknown reason"))
+            return True
+        return await super().handle_message(message)
+
+    async def _reconnect(self) -> bool:
+        # multiplexed players aren't resumable, the server evicts them when the connection drops
+        return False
+
+    async def call_agent(self, method: str, *args) -> Any:
+        if self.offload == "thread" and self.mux.executor is not None:
+            # one worker thread for all the agents on the connection, rather than one each
+            return await asyncio.get_running_loop().run_in_executor(self.mux.executor, getattr(self.agent, method), *args)
+        return await super().call_agent(method, *args)
+
+    async def disconnect(self):
+        self.connected = False
+
+
+class MultiplexedClient:
+    """connects several agents to the server over one connection."""
+
+    def __init__(self, agents: List[BaseAgent], host: str = "localhost", port: int = 8080,
+                 verbose: bool = False, offload: str = "thread"):
+        if not agents:
+            raise ValueError("need at least one agent")
+        self.host = host
+        self.port = port
+        self.verbose = verbose
+        self.offload = offload
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.connected = False
+        self.executor = (concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="agt-agents")
+                         if offload == "thread" else None)
+        self.players: Dict[str, _MultiplexedPlayer] = {
+            str(i): _MultiplexedPlayer(self, str(i), agent) for i, agent in enumerate(agents)
+        }
+
+    async def send(self, message: Dict[str, Any]):
+        if self.writer is None:
+            raise ValueError("No writer available")
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def _receive(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        try:
+            data = await asyncio.wait_for(self.reader.readline(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not data:
+            return None
+        try:
+            message = json.loads(data)
+        except json.JSONDecodeError as e:
+            logger.error("JSON decode error: %s", e)
+            return {}
+        if not isinstance(message, dict):
+            logger.error("Ignoring a message that isn't an object: %r", data)
+            return {}
+        return message
+
+    async def connect(self):
+        """open the connection and register every agent in one handshake."""
+        try:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            message = await self._receive(timeout=30.0)
+            if not message or message.get("message") != "request_client_info":
+                logger.error("Failed: expected request_client_info, got %s", message)
+                return
+
+            first = next(iter(self.players.values())).agent
+            await self.send({
+                "message": "provide_client_info",
+                "game_type": first.game_title,
+                "heartbeat": True,
+                "players": [
+                    {"player": tag, "player_name": player.agent.name, "device_id": player.agent.device_id}
+                    for tag, player in self.players.items()
+                ],
+            })
+
+            # the server may queue us until there are seats for everyone
+            message = await self._receive(timeout=300.0)
+            while message and message.get("message") == "queued":
+                logger.info("Lobby is full, waiting for %d seats (position %s)", len(self.players), message.get("position"))
+                message = await self._receive(timeout=300.0)
+            if not message or message.get("message") != "connection_established":
+                logger.error("Failed to establish connection: %s", message)
+                return
+
+            for assigned in message.get("players", []):
+                player = self.players.get(str(assigned.get("player")))
+                if player is not None:
+                    player.agent.name = assigned.get("assigned_name") or player.agent.name
+                    player.session_token = assigned.get("session_token")
+            self.connected = True
+            logger.info("Connected %d agents to %s:%s over one connection", len(self.players), self.host, self.port)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to connect to server: %s", e)
+
+    async def run(self):
+        """run every agent until they're all done or the server closes the connection."""
+        if not self.connected:
+            logger.error("Not connected to server")
+            return
+        router = asyncio.create_task(self._route())
+        try:
+            await asyncio.gather(*(player.run() for player in self.players.values()), return_exceptions=True)
+        finally:
+            router.cancel()
+            await self.disconnect()
+
+    async def _route(self):
+        """hand each message to the agent it's tagged for."""
+        try:
+            while True:
+                # no read timeout, the server's heartbeat looks after quiet connections
+                message = await self._receive()
+                if message is None:
+                    break
+                tag = message.get("player")
+                if tag is None:
+                    if message.get("message") == "ping":
+                        await self.send({"message": "pong", "t": message.get("t")})
+                    continue
+                player = self.players.get(str(tag))
+                if player is not None:
+                    player.inbox.put_nowait(message)
+        except (ConnectionError, OSError) as e:
+            logger.error("Connection error: %s", e)
+        # connection gone, every agent's run() ends
+        for player in self.players.values():
+            player.inbox.put_nowait(None)
+
+    async def disconnect(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.connected = False
+        logger.info("Disconnected from server")
+
+
+async def main():
+    from swarm import SWARM_AGENTS, make_agent
+
+    parser = argparse.ArgumentParser(description='Connect many baseline bots to the AGT server over one connection')
+    parser.add_argument('--game', type=str, required=True, choices=sorted(SWARM_AGENTS), help='Game type to play')
+    parser.add_argument('--bots', type=int, default=10, help='Number of bots, drawn from the lab agents for the game')
+    parser.add_argument('--name', type=str, default='bot', help='Name prefix for the bots')
+    parser.add_argument('--host', type=str, default='localhost', help='Server host')
+    parser.add_argument('--port', type=int, default=8080, help='Server port')
+    parser.add_argument('--offload', type=str, choices=OFFLOAD_MODES, default='thread',
+                        help='Run the agents on a worker thread (default), a worker process each, or the event loop (none)')
+    parser.add_argument('--log-level', type=str, default='info', help='Default log level (debug, info, warning, error)')
+    parser.add_argument('--log', type=str, default='', help='Per-component log levels, e.g. client=debug')
+    args = parser.parse_args()
+    setup_logging(args.log_level, parse_levels(args.log))
+
+    agents = [make_agent(args.game, f"{args.name}_{i}", i) for i in range(args.bots)]
+    client = MultiplexedClient(agents, args.host, args.port, offload=args.offload)
+    await client.connect()
+    if not client.connected:
+        sys.exit(1)
+    await client.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
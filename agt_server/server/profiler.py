@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+client-side self-profiler.
+
+answers "is my agent too slow or is the server slow?". AGTClient(profile=True) feeds
+every frame it reads and writes through ClientProfiler, which keeps per message type:
+
+- how many frames and bytes went each way
+- the gap since the previous frame from the server (any type)
+
+and per action:
+
+- decision: request_action arriving to our action going out (the agent, plus the client)
+- wait: our action going out to the next request_action arriving (the server, the network
+  and the other players in the game)
+
+the summary is printed when the tournament ends and can be sent to the server as a
+client_profile message.
+"""
+
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+
+def _quantile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _describe(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "total": sum(samples),
+        "mean": sum(samples) / len(samples) if samples else 0.0,
+        "p50": _quantile(samples, 0.5),
+        "p99": _quantile(samples, 0.99),
+        "max": max(samples, default=0.0),
+    }
+
+
+class _TypeStats:
+    __slots__ = ("received", "sent", "bytes_in", "bytes_out", "gaps", "gap_total", "gap_max")
+
+    def __init__(self):
+        self.received = 0
+        self.sent = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.gaps = 0
+        self.gap_total = 0.0
+        self.gap_max = 0.0
+
+
+class ClientProfiler:
+    """timings and sizes of the frames one client reads and writes."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.types: Dict[str, _TypeStats] = defaultdict(_TypeStats)
+        self.decisions: List[float] = []
+        self.waits: List[float] = []
+        self._last_frame: Optional[float] = None
+        self._request_at: Optional[float] = None  # the request_action we haven't answered yet
+        self._action_at: Optional[float] = None  # our last action, until the next request_action
+
+    def received(self, msg_type: str, nbytes: int, at: Optional[float] = None):
+        at = self.clock() if at is None else at
+        stats = self.types[msg_type]
+        stats.received += 1
+        stats.bytes_in += nbytes
+        if self._last_frame is not None:
+            gap = at - self._last_frame
+            stats.gaps += 1
+            stats.gap_total += gap
+            stats.gap_max = max(stats.gap_max, gap)
+        self._last_frame = at
+
+        if msg_type == "request_action":
+            if self._action_at is not None:
+                self.waits.append(at - self._action_at)
+                self._action_at = None
+            self._request_at = at
+
+    def sent(self, msg_type: str, nbytes: int, at: Optional[float] = None):
+        at = self.clock() if at is None else at
+        stats = self.types[msg_type]
+        stats.sent += 1
+        stats.bytes_out += nbytes
+
+        if msg_type == "action" and self._request_at is not None:
+            self.decisions.append(at - self._request_at)
+            self._request_at = None
+            self._action_at = at
+
+    def summary(self) -> Dict[str, Any]:
+        """everything measured so far, json ready."""
+        return {
+            "elapsed": self.clock() - self.started,
+            "decision": _describe(self.decisions),
+            "wait": _describe(self.waits),
+            "messages": {
+                msg_type: {
+                    "received": stats.received,
+                    "sent": stats.sent,
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                    "gap_mean": stats.gap_total / stats.gaps if stats.gaps else 0.0,
+                    "gap_max": stats.gap_max,
+                }
+                for msg_type, stats in sorted(self.types.items())
+            },
+        }
+
+
+def format_summary(summary: Dict[str, Any], name: str = "") -> str:
+    """the summary as a table for the terminal."""
+    decision, wait = summary["decision"], summary["wait"]
+    lines = [
+        "=" * 78,
+        f"CLIENT PROFILE{' - ' + name if name else ''} ({summary['elapsed']:.1f}s)",
+        "=" * 78,
+        f"{'':10s} {'actions':>8s} {'mean':>9s} {'p50':>9s} {'p99':>9s} {'max':>9s}",
+    ]
+    for label, stats in (("decision", decision), ("wait", wait)):
+        lines.append(f"{label:10s} {stats['count']:8d} {stats['mean'] * 1000:7.1f}ms {stats['p50'] * 1000:7.1f}ms "
+                     f"{stats['p99'] * 1000:7.1f}ms {stats['max'] * 1000:7.1f}ms")
+
+    spent = decision["total"] + wait["total"]
+    if spent > 0:
+        share = decision["total"] / spent
+        lines.append(f"between actions {share:.0%} of the time went to your agent and "
+                     f"{1 - share:.0%} to the server, the network and the other players")
+
+    lines.append("")
+    lines.append(f"{'message':22s} {'in':>7s} {'out':>7s} {'bytes in':>10s} {'bytes out':>10s} "
+                 f"{'gap mean':>9s} {'gap max':>9s}")
+    for msg_type, stats in summary["messages"].items():
+        lines.append(f"{msg_type[:22]:22s} {stats['received']:7d} {stats['sent']:7d} {stats['bytes_in']:10d} "
+                     f"{stats['bytes_out']:10d} {stats['gap_mean'] * 1000:7.1f}ms {stats['gap_max'] * 1000:7.1f}ms")
+    lines.append("=" * 78)
+    return "\n".join(lines)
@@ -12,7 +12,6 @@ import time
 import argparse
 import os
 import sys
-import logging
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'dashboard'))
 from binary_encoding import (
     encode_player_connect, encode_player_disconnect, 
@@ -20,15 +19,27 @@ from binary_encoding import (
     encode_results_saved
 )
 import signal
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+import socket
+import secrets
+import collections
+from typing import Dict, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field
 
 # Dashboard is now separate - no longer integrated
 
 # Add the core directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
 
 from core.utils import server_print
+from core.log import get_logger, setup_logging, parse_levels, dashboard_event, COMPONENTS
+from core.policy import TablePolicy, PolicyError, action_space
+
+logger = get_logger("server")
+from transport import MessageTransport, TaggedTransport, DEFAULT_HIGH_WATER
+from metrics import ServerMetrics, MetricsHTTPServer
+from ladder import Ladder
+from spectator import SpectatorHub, SpectatorHTTPServer
 
 
 
@@ -45,6 +56,24 @@ class PlayerConnection:
     pending_action: Optional[Any] = None
     total_reward: float = 0.0
     games_played: int = 0
+    transport: Optional[MessageTransport] = None  # buffered writes, flushed once per round by the engine
+    last_seen: float = 0.0  # time.monotonic() of the last message from the client
+    last_ping: float = 0.0  # time.monotonic() of the last ping we sent
+    missed_actions: int = 0  # consecutive action requests that timed out, maintained by the engine
+    alive: bool = True  # False once the player is evicted, the engine forfeits their games
+    session_token: str = ""  # secret the client presents together with its device_id to resume
+    connected: bool = True  # False while the connection is down but the session is held open
+    detached_at: float = 0.0  # time.monotonic() when the connection was lost
+    action_request_id: int = 0  # id of the latest request_action, stale answers are ignored
+    action_received_at: Optional[float] = None  # time.monotonic() when the answer to it arrived
+    action_arrived: asyncio.Event = field(default_factory=asyncio.Event)  # wakes the engine on an answer, eviction or drop
+    decision_time: Optional[float] = None  # seconds the client says its agent spent deciding
+    client_time: Optional[float] = None  # seconds the client held the request, decision included
+    mux_tag: Optional[str] = None  # player id on a multiplexed connection, None if the player has its own
+    report_profile: bool = False  # the client said it will send its self-profile when the tournament ends
+    heartbeat: bool = False  # the client said it answers pings, only then is it evicted for going quiet
+    client_profile: Optional[Dict[str, Any]] = None  # self-profile the client sent, see profiler.py
+    policy: Optional[TablePolicy] = None  # uploaded table policy, the engine plays it locally instead of asking us
     
 
 
@@ -61,16 +90,62 @@ class AGTServer:
         self.game_config = None #the config with params for the game
         self.tournament_started = False
         self.results: List[Dict[str, Any]] = []
-
+        self.write_high_water = config.get("write_high_water", DEFAULT_HIGH_WATER) #bytes buffered per connection before we flush/drain early
+
+        #dead-peer detection: ping idle players, evict ones that stay silent or keep missing actions
+        self.heartbeat_interval = config.get("heartbeat_interval", 5.0)
+        self.heartbeat_timeout = config.get("heartbeat_timeout", 15.0)
+        self.max_missed_actions = config.get("max_missed_actions", 3)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+        #session resumption: players that drop keep their seat for session_grace seconds
+        self.session_grace = config.get("session_grace", 30.0)
+        self.sessions: Dict[str, PlayerConnection] = {} #device id -> player, for resumable sessions
+
+        #admission control, so a whole lab connecting at once doesn't swamp the event loop
+        self.max_players = config.get("max_players") #None means no limit
+        self.handshake_timeout = config.get("handshake_timeout", 5.0) #seconds per handshake step
+        self.listen_backlog = config.get("listen_backlog", 1024)
+        self._handshake_slots = asyncio.Semaphore(config.get("max_concurrent_handshakes", 32))
+        self.wait_queue: collections.deque = collections.deque() #futures of connections waiting for a seat, in arrival order
+        self._reserved_seats = 0 #seats handed to queued connections that haven't registered yet
+        self._name_counters: Dict[str, int] = {} #base name -> last suffix handed out
+        self.broadcast_timeout = config.get("broadcast_timeout", 10.0) #seconds a player gets to take a broadcast
+        self.profile_report_timeout = config.get("profile_report_timeout", 2.0) #seconds to wait for client self-profiles after a tournament
+        self._policy_actions: Optional[List[List[int]]] = None #each seat's actions, to validate uploaded policies against
+        self.max_players_per_connection = config.get("max_players_per_connection", 64) #logical players on one multiplexed connection
+        self.fast_forward = config.get("fast_forward", True) #skip repeated cycles between uploaded deterministic policies
+        self.seed = config.get("seed") #tournament seed, every game gets its own random stream from it (core/rng.py)
+
+        #prometheus metrics, served over http when metrics_port is set
+        self.metrics = ServerMetrics(config.get("game_title"), lambda: len(self.players), lambda: len(self.wait_queue))
+        self.metrics_host = config.get("metrics_host", "127.0.0.1")
+        self.metrics_port = config.get("metrics_port") #None disables the endpoint, 0 picks a free port
+        self.metrics_server: Optional[MetricsHTTPServer] = None
+
+        #live spectator feed (server-sent events), every round is encoded once and fanned out
+        self.spectators = SpectatorHub(
+            max_subscribers=config.get("max_spectators", 256),
+            max_queue=config.get("spectator_queue", 256),
+            write_timeout=config.get("spectator_write_timeout", 5.0),
+        )
+        self.spectator_host = config.get("spectator_host", "0.0.0.0")
+        self.spectator_port = config.get("spectator_port") #None disables the feed, 0 picks a free port
+        self.spectator_server: Optional[SpectatorHTTPServer] = None
+
+        #ladder mode: a game starts whenever enough players are idle, instead of one tournament on ctrl+z
+        self.mode = config.get("mode", "tournament")
+        self.ladder: Optional[Ladder] = None
+        self.in_game: Set[str] = set() #names of players currently in a ladder game
+        self.ladder_leaderboard_size = config.get("ladder_leaderboard_size", 10) #standings sent after each game
+        self._ladder_arena = None
+        self._ladder_task: Optional[asyncio.Task] = None
+        self._ladder_games: Set[asyncio.Task] = set()
+        self._ladder_wakeup = asyncio.Event()
         
 
-        #set up logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            stream=sys.stdout  # Force logging to stdout for dashboard capture
-        )
-        self.logger = logging.getLogger(__name__)
+        #logging goes through a queue to a writer thread, see core/log.py
+        self.logger = logger
         
         #create results directory if it doesn't exist
         os.makedirs("results", exist_ok=True)
@@ -82,12 +157,15 @@ class AGTServer:
         allowed_game = config.get("game_title", None)
         if allowed_game is None:
             raise ValueError("Server requires exactly a game type to be specified")
-        print(type(allowed_game))
-        print(allowed_game)
+        self.logger.debug("game title: %r", allowed_game)
         if allowed_game not in all_game_configs:
             raise ValueError(f"Unknown game type: {allowed_game}")
         
         self.game_config = all_game_configs[allowed_game]
+        if self.mode == "ladder":
+            self.ladder = Ladder(self.game_config["num_players"], config.get("ladder_k_factor", 32.0))
+        elif self.mode != "tournament":
+            raise ValueError(f"Unknown server mode: {self.mode}")
     
     def _load_game_configs(self):
         """Load game configurations from config files."""
@@ -143,8 +221,8 @@ class AGTServer:
         return game_configs
     
     def server_print(self, message: str, flush: bool = True):
-        """Unified print method for all server output."""
-        print(f"[SERVER] {message}", flush=flush)
+        """Unified print method for all server output, kept for callers that build the message themselves."""
+        self.logger.info(message)
     
     
 
@@ -156,16 +234,19 @@ class AGTServer:
         """WHEN A NEW PLAYER JOINS THE SERVER, THIS FUNCTION IS CALLED"""
         address = writer.get_extra_info('peername')
         player_name = None
+        player = None
         
-        self.server_print(f"New client connection from {address}")
+        self.logger.debug("New client connection from %s", address)
+        self._configure_keepalive(writer)
         
         try:
-            # Request device id
-            await self.send_message(writer, {"message": "request_client_info"})
-            client_info = await self.receive_message(reader)
+            # Request device id, only a bounded number of handshakes run at once and each step has a short deadline
+            async with self._handshake_slots:
+                await self.send_message(writer, {"message": "request_client_info"})
+                client_info = await self.receive_message(reader, timeout=self.handshake_timeout)
             
             if not client_info or client_info.get("message") != "provide_client_info":
-                print(f"Invalid client info response from {address}")
+                self.logger.warning("Invalid client info response from %s", address)
                 return
             
             device_id = client_info.get("device_id", f"device_{address[0]}_{address[1]}")
@@ -174,9 +255,12 @@ class AGTServer:
             
 
 
+            #several logical players over this one connection, see MultiplexedClient
+            multiplexed = "players" in client_info
+
             #validate player name
-            if not player_name:
-                print(f"Invalid name response from {address}")
+            if not player_name and not multiplexed:
+                self.logger.warning("Invalid name response from %s", address)
                 await self.send_message(writer, {
                     "message": "error",
                     "error": "no name or invalid name provided",
@@ -186,26 +270,43 @@ class AGTServer:
 
             #validate game type
             if not player_game_type or player_game_type != self.server_config["game_title"]:
-                self.server_print(f"Invalid game type response from {address}")
+                self.logger.warning("Invalid game type response from %s", address)
                 await self.send_message(writer, {
                     "message": "error",
                     "error": "wrong game type provided",
                 })
 
                 return
+
+            if multiplexed:
+                await self._handle_multiplexed(reader, writer, address, client_info.get("players"),
+                                               bool(client_info.get("heartbeat")))
+                return
             
 
             
+            # a player coming back with a valid session token gets their old seat back
+            resumable = self._find_session(device_id, client_info.get("session_token"))
+            if resumable is not None:
+                player = resumable
+                player.heartbeat = bool(client_info.get("heartbeat"))
+                await self._resume_player(player, reader, writer)
+                self.logger.info("Player '%s' resumed their session from %s:%s", player.name, address[0], address[1])
+                await self.client_loop(player)
+                return
+
+            # lobby full, wait in line for a seat
+            if not await self._wait_for_seat(reader, writer):
+                return
+            self._reserved_seats -= 1
+
             # handle duplicate names
             original_name = player_name
-            counter = 1
-            while player_name in self.players:
-                player_name = f"{original_name}_{counter}"
-                counter += 1
+            player_name = self._unique_name(player_name)
             
             # Log if name was modified due to conflict
             if player_name != original_name:
-                print(f"Name conflict resolved: '{original_name}' -> '{player_name}'", flush=True)
+                self.logger.info("Name conflict resolved: '%s' -> '%s'", original_name, player_name)
             
             # Create player connection
             player = PlayerConnection(
@@ -215,14 +316,21 @@ class AGTServer:
                 address=address,
                 device_id=device_id,
                 connected_at=time.time(),
+                transport=MessageTransport(writer, self.write_high_water, metrics=self.metrics),
+                last_seen=time.monotonic(),
+                session_token=secrets.token_hex(16),
+                report_profile=bool(client_info.get("report_profile")),
+                heartbeat=bool(client_info.get("heartbeat")),
             )
             
             self.players[player_name] = player
+            self.sessions[device_id] = player
             
             # Send confirmation with only the single allowed game
             await self.send_message(writer, {
                 "message": "connection_established",
                 "assigned_name": player_name,
+                "session_token": player.session_token,
             })
             
 
@@ -231,107 +339,444 @@ class AGTServer:
 
             #print out saying the player connected successfully
             if player_name == original_name:
-                print(f"Player '{player_name}' connected from {address[0]}:{address[1]} (no name conflicts)", flush=True)
-                print(encode_player_connect(player_name, f"{address[0]}:{address[1]}"), flush=True)
-                self.server_print(f"Player '{player_name}' connected successfully")
+                self.logger.info("Player '%s' connected from %s:%s (no name conflicts)", player_name, address[0], address[1])
+                dashboard_event(encode_player_connect(player_name, f"{address[0]}:{address[1]}"))
             else:
-                print(f"Player '{player_name}' connected from {address[0]}:{address[1]} (resolved from '{original_name}')", flush=True)
-                print(encode_player_connect(player_name, f"{address[0]}:{address[1]}"), flush=True)
-                self.server_print(f"Player '{player_name}' connected with name conflict resolution")
+                self.logger.info("Player '%s' connected from %s:%s (resolved from '%s')", player_name, address[0], address[1], original_name)
+                dashboard_event(encode_player_connect(player_name, f"{address[0]}:{address[1]}"))
             
 
 
 
             # Client is now connected and ready for tournament
-            # Keep connection alive by waiting for tournament to start
-            self.server_print(f"[DEBUG] Player '{player_name}' is waiting for tournament to start...")
-            self.server_print(f"[DEBUG] Current tournament_started flag: {self.tournament_started}")
-            
-            # Send a waiting message to the client
-            self.server_print(f"[DEBUG] Sending waiting message to {player_name}")
             await self._send_waiting_message(player)
-            self.server_print(f"[DEBUG] Waiting message sent to {player_name}")
-            
-            # Wait for tournament to start (this will be set by the signal handler)
-            self.server_print(f"[DEBUG] Entering wait loop for {player_name}")
-            loop_count = 0
-            while not self.tournament_started:
-                loop_count += 1
-                if loop_count % 100 == 0:  # Print every 10 seconds (100 * 0.1s)
-                    self.server_print(f"[DEBUG] Still waiting for tournament... loop {loop_count}, flag: {self.tournament_started}")
-                await asyncio.sleep(0.1)  # Small delay to prevent busy waiting
-            
-            self.server_print(f"[DEBUG] Tournament started! Player '{player_name}' will participate.")
-            
-            # Keep the connection alive during the tournament
-            # The tournament will communicate with this client through the Engine
-            self.server_print(f"[DEBUG] Keeping connection alive for {player_name} during tournament")
-            
-            # Listen for messages during the tournament
-            while self.tournament_started:
-                try:
-                    # Try to receive a message with a short timeout
-                    message = await asyncio.wait_for(
-                        self.receive_message(player.reader, player), 
-                        timeout=0.1
-                    )
-                    if message:
-                        self.server_print(f"[DEBUG] Received message for {player_name} during tournament: {message.get('message', 'unknown')}")
-                        # Handle the message (this will be processed by the Engine)
-                        await self.handle_message(player, message)
-                except asyncio.TimeoutError:
-                    # No message received, continue waiting
-                    pass
-                except Exception as e:
-                    self.server_print(f"[DEBUG] Error receiving message for {player_name}: {e}")
-                    break
-            
-            self.server_print(f"[DEBUG] Tournament completed for {player_name}")
+            self._player_available(player)
+
+            # read everything the client sends until it disconnects or is evicted,
+            # the engine picks actions up from player.pending_action
+            await self.client_loop(player)
             
         except Exception as e:
-            print(f"Error handling client {address}: {e}")
+            self.logger.error("Error handling client %s: %s", address, e)
 
         finally:
-            #at this point the player has disconnected from the server, so we need to remove them from the game they were in if they were in one
-
-
-            player = self.players[player_name] #get current player
+            #at this point the player has disconnected from the server, hold their session open for a while
+            #(unless a newer connection has already taken it over)
+            if player is not None and player.writer is writer:
+                await self._connection_lost(player, "disconnected")
+            else:
+                #handshake never completed, just close the connection
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except Exception:
+                    pass
+    
 
-            print(f"Player {player_name} disconnected from the server, {len(self.players)} players left", flush=True)
-            print(encode_player_disconnect(player_name, len(self.players)), flush=True)
+    async def _handle_multiplexed(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                  address: Tuple[str, int], entries: Any, heartbeat: bool = False):
+        """
+        Seat every logical player of a multiplexed connection and read messages for all of them.
 
-            del self.players[player_name]
+        Messages in both directions carry a "player" field with the client's id for the player.
+        Multiplexed players aren't resumable, they are evicted when the connection drops.
+        """
+        if not isinstance(entries, list) or not entries or len(entries) > self.max_players_per_connection:
+            self.logger.warning("Invalid multiplexed player list from %s", address)
+            await self.send_message(writer, {
+                "message": "error",
+                "error": f"expected a list of 1 to {self.max_players_per_connection} players",
+            })
+            return
+        tags = [str(entry.get("player", i)) if isinstance(entry, dict) else None for i, entry in enumerate(entries)]
+        if None in tags or len(set(tags)) != len(tags) or not all(entry.get("player_name") for entry in entries):
+            self.logger.warning("Invalid multiplexed player list from %s", address)
+            await self.send_message(writer, {
+                "message": "error",
+                "error": "every player needs a unique player id and a name",
+            })
+            return
 
-            #close the connection to the player
-            writer.close()
-            await writer.wait_closed()
-    
+        #reserve all the seats first so nobody plays before the whole connection is in
+        reserved = 0
+        try:
+            for _ in entries:
+                if not await self._wait_for_seat(reader, writer):
+                    return
+                reserved += 1
+        finally:
+            if reserved < len(entries):
+                self._reserved_seats -= reserved
+                await self._admit_waiting()
 
+        shared = MessageTransport(writer, self.write_high_water, metrics=self.metrics)
+        players: Dict[str, PlayerConnection] = {}
+        try:
+            for tag, entry in zip(tags, entries):
+                self._reserved_seats -= 1
+                name = self._unique_name(str(entry["player_name"]))
+                player = PlayerConnection(
+                    name=name,
+                    reader=reader,
+                    writer=writer,
+                    address=address,
+                    device_id=str(entry.get("device_id") or f"{name}_{address[0]}_{address[1]}"),
+                    connected_at=time.time(),
+                    transport=TaggedTransport(shared, tag),
+                    last_seen=time.monotonic(),
+                    session_token=secrets.token_hex(16),
+                    mux_tag=tag,
+                    heartbeat=heartbeat,
+                )
+                self.players[name] = player
+                players[tag] = player
 
+            await self.send_message(writer, {
+                "message": "connection_established",
+                "players": [{"player": tag, "assigned_name": player.name, "session_token": player.session_token}
+                            for tag, player in players.items()],
+            })
+            self.logger.info("%d multiplexed players connected from %s:%s: %s", len(players), address[0], address[1],
+                             ", ".join(player.name for player in players.values()))
+            for player in players.values():
+                dashboard_event(encode_player_connect(player.name, f"{address[0]}:{address[1]}"))
+                await self._send_waiting_message(player)
+                self._player_available(player)
+
+            await self._multiplexed_loop(reader, players)
+        finally:
+            for player in players.values():
+                await self.evict_player(player, "disconnected")
 
+    async def _multiplexed_loop(self, reader: asyncio.StreamReader, players: Dict[str, PlayerConnection]):
+        """client_loop for a multiplexed connection, routes each message to the player it is tagged with."""
+        try:
+            while any(player.alive for player in players.values()):
+                data = await reader.readline()
+                if not data:
+                    break
 
+                #anything on the connection shows it is alive for every player on it
+                now = time.monotonic()
+                for player in players.values():
+                    player.last_seen = now
+                self.metrics.record_received(len(data))
+                decoded_data = data.decode().strip()
+                if not decoded_data:
+                    continue
+                try:
+                    message = json.loads(decoded_data)
+                except json.JSONDecodeError as e:
+                    self.logger.warning("JSON decode error on multiplexed connection: %s", e)
+                    continue
+
+                player = players.get(str(message.get("player")))
+                if player is None:
+                    if message.get("message") != "pong":
+                        self.logger.warning("message for unknown multiplexed player %r", message.get("player"))
+                    continue
+                if player.alive:
+                    await self.handle_message(player, message)
+        except Exception as e:
+            self.logger.error("error in multiplexed client loop: %s", e)
 
+    async def _install_policy(self, player: PlayerConnection, spec: Any):
+        """Validate an uploaded table policy, the engine plays it for the player from their next game on."""
+        if spec is None:
+            player.policy = None
+            self.logger.info("Player %s removed their policy", player.name)
+            await player.transport.send_now({"message": "policy_cleared"})
+            return
 
+        if self._policy_actions is None:
+            try:
+                self._policy_actions = action_space(self.game_config["game_class"]()) or []
+            except Exception:
+                self._policy_actions = []
+        try:
+            if not self._policy_actions:
+                raise PolicyError(f"policies aren't supported for {self.game_config['name']}")
+            policy = TablePolicy.from_spec(spec, self._policy_actions)
+        except PolicyError as e:
+            self.logger.info("Rejected policy from %s: %s", player.name, e)
+            await player.transport.send_now({"message": "policy_rejected", "error": str(e)})
+            return
+
+        player.policy = policy
+        self.logger.info("Player %s uploaded a policy with %d states", player.name, policy.num_states)
+        await player.transport.send_now({"message": "policy_accepted", "states": policy.num_states})
+
+    def _unique_name(self, name: str) -> str:
+        """Pick a free player name, remembering the last suffix per base name so repeats don't rescan."""
+        if name not in self.players:
+            return name
+        counter = self._name_counters.get(name, 0)
+        candidate = name
+        while candidate in self.players:
+            counter += 1
+            candidate = f"{name}_{counter}"
+        self._name_counters[name] = counter
+        return candidate
+
+    def _has_free_seat(self) -> bool:
+        return self.max_players is None or len(self.players) + self._reserved_seats < self.max_players
+
+    async def _wait_for_seat(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """
+        Reserve a lobby seat, queueing the connection while the lobby is full.
+
+        Queued clients are told their position whenever it changes, and again every
+        heartbeat interval as a keepalive. Returns False if the client left while waiting.
+        """
+        if not self.wait_queue and self._has_free_seat():
+            self._reserved_seats += 1
+            return True
+
+        seat = asyncio.get_running_loop().create_future()
+        entry = (seat, writer)
+        self.wait_queue.append(entry)
+        self.logger.info("Lobby full (%s players), queued connection at position %d", self.max_players, len(self.wait_queue))
+        await self._send_queue_position(writer, len(self.wait_queue))
+
+        #watch the socket while we wait so clients that give up leave the queue
+        read_task = asyncio.ensure_future(reader.readline())
+        admitted = False
+        try:
+            while True:
+                done, _ = await asyncio.wait({seat, read_task}, timeout=self.heartbeat_interval,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if seat in done:
+                    admitted = True
+                    return True
+                if read_task in done:
+                    if not read_task.result():
+                        return False
+                    read_task = asyncio.ensure_future(reader.readline())
+                    continue
+                await self._send_queue_position(writer, self.wait_queue.index(entry) + 1)
+        finally:
+            #let the cancelled read unwind before anyone else reads from this stream
+            read_task.cancel()
+            try:
+                await read_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            if not seat.done():
+                seat.cancel()
+                self.wait_queue.remove(entry)
+                await self._send_queue_positions()
+            elif not admitted and not seat.cancelled():
+                #a seat came free while we were giving up, pass it on to the next in line
+                self._reserved_seats -= 1
+                await self._admit_waiting()
+
+    async def _send_queue_position(self, writer: asyncio.StreamWriter, position: int):
+        await self.send_message(writer, {
+            "message": "queued",
+            "position": position,
+            "max_players": self.max_players,
+        })
+
+    async def _send_queue_positions(self):
+        """Tell every queued connection its current position."""
+        for position, (_, writer) in enumerate(list(self.wait_queue), 1):
+            await self._send_queue_position(writer, position)
+
+    async def _admit_waiting(self):
+        """Hand free seats to queued connections, oldest first."""
+        admitted = False
+        while self.wait_queue and self._has_free_seat():
+            seat, _ = self.wait_queue.popleft()
+            self._reserved_seats += 1
+            seat.set_result(True)
+            admitted = True
+        if admitted:
+            await self._send_queue_positions()
+
+    async def evict_player(self, player: PlayerConnection, reason: str):
+        """
+        Remove a player from the lobby and close their connection.
+
+        Evicted players are skipped when the arena schedules future games and the
+        engine forfeits any game they are currently in. Safe to call more than once.
+        """
+        if not player.alive:
+            return
+        player.alive = False
+        player.action_arrived.set()  # an engine waiting on their action forfeits right away
+
+        if self.players.get(player.name) is player:
+            del self.players[player.name]
+        if self.sessions.get(player.device_id) is player:
+            del self.sessions[player.device_id]
+
+        self.logger.info("Player %s disconnected from the server (%s), %d players left", player.name, reason, len(self.players))
+        dashboard_event(encode_player_disconnect(player.name, len(self.players)))
+
+        #their seat is free now
+        await self._admit_waiting()
+
+        #other players multiplexed over the same connection keep it, this one is just told it's done
+        if player.mux_tag is not None and any(other.writer is player.writer for other in self.players.values()):
+            try:
+                await player.transport.send_now({"message": "player_closed", "reason": reason})
+            except Exception:
+                pass
+            return
 
+        #close the connection to the player
+        player.writer.close()
+        try:
+            await player.writer.wait_closed()
+        except Exception:
+            pass
+
+    async def _connection_lost(self, player: PlayerConnection, reason: str):
+        """Hold the player's session open for session_grace seconds, or evict right away if resumption is off."""
+        if not player.alive or not player.connected:
+            return
+        if self.session_grace <= 0 or player.mux_tag is not None:
+            await self.evict_player(player, reason)
+            return
+
+        player.connected = False
+        player.detached_at = time.monotonic()
+        player.action_arrived.set()  # an engine waiting on their action plays the default instead
+        self.logger.info("Player %s lost connection (%s), holding their session for %.0fs", player.name, reason, self.session_grace)
+
+        player.writer.close()
+        try:
+            await player.writer.wait_closed()
+        except Exception:
+            pass
+
+    def _find_session(self, device_id: str, session_token: Optional[str]) -> Optional[PlayerConnection]:
+        """Return the player a device id + token pair belongs to, if that session is still open."""
+        if not session_token:
+            return None
+        player = self.sessions.get(device_id)
+        if player is None or not player.alive:
+            return None
+        if not secrets.compare_digest(player.session_token, str(session_token)):
+            return None
+        return player
+
+    async def _resume_player(self, player: PlayerConnection, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Re-attach a player to a new connection and replay the frames they missed."""
+        old_writer = player.writer
+        player.reader, player.writer = reader, writer
+        player.connected = True
+        player.last_seen = time.monotonic()
+        player.missed_actions = 0
+
+        #the old connection may not have noticed it is dead yet
+        if old_writer is not writer:
+            old_writer.close()
+
+        await self.send_message(writer, {
+            "message": "connection_established",
+            "assigned_name": player.name,
+            "session_token": player.session_token,
+            "resumed": True,
+        })
+
+        #anything queued while the player was away goes out now, in order
+        player.transport.attach(writer)
+        await player.transport.flush()
+        self._player_available(player)
+
+    async def start_metrics(self):
+        """Start sampling event-loop lag and, if metrics_port is set, serve /metrics over http."""
+        self.metrics.start_loop_monitor()
+        if self.metrics_port is not None and self.metrics_server is None:
+            self.metrics_server = await MetricsHTTPServer(self.metrics, self.metrics_host, self.metrics_port).start()
+            self.logger.info("Metrics available at http://%s:%d/metrics", self.metrics_host, self.metrics_server.port)
+
+    async def start_spectator(self):
+        """If spectator_port is set, stream live games to spectators at /spectate."""
+        if self.spectator_port is not None and self.spectator_server is None:
+            self.spectator_server = await SpectatorHTTPServer(self.spectators, self.spectator_host, self.spectator_port).start()
+            self.logger.info("Spectator feed at http://%s:%d/spectate", self.spectator_host, self.spectator_server.port)
+
+    def start_heartbeat(self):
+        """Start the background task that pings idle players and evicts dead ones."""
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        """
+        Ping players that have been quiet for a heartbeat interval, evict the unresponsive.
+
+        Any message from a client counts as a sign of life, not just a pong. Only clients that
+        announced "heartbeat" in their handshake are pinged and evicted for going quiet. Older
+        clients never answer pings and sit silent in the lobby between games, so for them a
+        dead connection is left to the socket closing and TCP keepalive.
+        """
+        tick = max(self.heartbeat_interval / 2, 0.05)
+        while True:
+            await asyncio.sleep(tick)
+            now = time.monotonic()
+            for player in list(self.players.values()):
+                if not player.connected:
+                    if now - player.detached_at > self.session_grace:
+                        await self.evict_player(player, "session expired")
+                    continue
+
+                idle = now - player.last_seen
+                if player.heartbeat and idle > self.heartbeat_timeout:
+                    await self._connection_lost(player, f"no response for {idle:.0f}s")
+                elif player.missed_actions >= self.max_missed_actions:
+                    await self.evict_player(player, f"missed {player.missed_actions} actions in a row")
+                elif player.heartbeat and idle > self.heartbeat_interval and now - player.last_ping > self.heartbeat_interval:
+                    player.last_ping = now
+                    await player.transport.send_now({"message": "ping", "t": time.time()})
+
+    def _configure_keepalive(self, writer: asyncio.StreamWriter):
+        """Turn on TCP keepalive so the kernel also notices peers that vanished without a FIN."""
+        sock = writer.get_extra_info('socket')
+        if sock is None:
+            return
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            idle = max(int(self.heartbeat_interval), 1)
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+            if hasattr(socket, 'TCP_KEEPINTVL'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, idle)
+            if hasattr(socket, 'TCP_KEEPCNT'):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+        except OSError as e:
+            self.logger.debug("Could not enable TCP keepalive: %s", e)
+    
 
     async def client_loop(self, player: PlayerConnection):
         """THIS IS HOW WE COMMUNICATE WITH PLAYERS CURRENTLY CONNECTED TO THE SERVER"""
         try:
             
-            while True:
+            while player.alive:
 
-                #wait for a message from the client
+                #wait for a message from the client, silence is handled by the heartbeat
+                data = await player.reader.readline()
+                if not data:
+                    break #connection closed
 
                 #we just received a message from the client
-                message = await self.receive_message(player.reader, player)
-                if not message:
-                    break
+                player.last_seen = time.monotonic()
+                self.metrics.record_received(len(data))
+                decoded_data = data.decode().strip()
+                if not decoded_data:
+                    continue
+                try:
+                    message = json.loads(decoded_data)
+                except json.JSONDecodeError as e:
+                    self.logger.warning("JSON decode error from %s: %s", player.name, e)
+                    continue
                 
                 #handle the message
                 await self.handle_message(player, message)
                 
         except Exception as e:
-            self.server_print(f"error in client loop for {player.name}: {e}")
+            self.logger.error("error in client loop for %s: %s", player.name, e)
 
     
 
@@ -344,15 +789,46 @@ class AGTServer:
     async def handle_message(self, player: PlayerConnection, message: Dict[str, Any]):
         """Handle a message from a client."""
         msg_type = message.get("message")
-        self.server_print(f"Received message from {player.name}: {msg_type}")
+        self.logger.debug("Received message from %s: %s", player.name, msg_type)
         
         
         if msg_type == "action":
-            # Store the action for the current round
+            # Store the action for the current round, answers to older requests
+            # (e.g. replayed after a reconnect) are ignored
+            request_id = message.get("request_id")
+            if request_id is not None and request_id != player.action_request_id:
+                self.logger.debug("Ignoring stale action from %s (request %s)", player.name, request_id)
+                return
             player.pending_action = message.get("action")
+            player.action_received_at = time.monotonic()
+            player.decision_time = message.get("decision_time")
+            player.client_time = message.get("client_time")
+            player.action_arrived.set()
+
+        elif msg_type == "pong":
+            # liveness is recorded by client_loop, nothing else to do
+            pass
+
+        elif msg_type == "upload_policy":
+            await self._install_policy(player, message.get("policy"))
+
+        elif msg_type == "client_profile":
+            # the client's own view of where its time went, sent when the tournament ends
+            profile = message.get("profile")
+            if not isinstance(profile, dict):
+                return
+            player.client_profile = profile
+            decision, wait = profile.get("decision") or {}, profile.get("wait") or {}
+            try:
+                self.logger.info("Client profile from %s: %d actions, decision p50 %.1fms p99 %.1fms, "
+                                 "wait p50 %.1fms p99 %.1fms", player.name, decision.get("count", 0),
+                                 decision.get("p50", 0) * 1000, decision.get("p99", 0) * 1000,
+                                 wait.get("p50", 0) * 1000, wait.get("p99", 0) * 1000)
+            except (TypeError, ValueError):
+                self.logger.debug("Malformed client profile from %s", player.name)
 
         else:
-            self.server_print(f"unknown message type from {player.name}: {msg_type}")
+            self.logger.warning("unknown message type from %s: %s", player.name, msg_type)
     
 
 
@@ -412,17 +888,15 @@ class AGTServer:
 
 
 
-    async def run_tournament(self):
-        """Run a tournament with all connected players."""
-        self.server_print(f"==========================================")
-        self.server_print(f"run_tournament called with {len(self.players)} players")
-        self.server_print(f"==========================================")
+    async def run_tournament(self) -> Dict[str, Any]:
+        """Run a tournament with all connected players and return the results json."""
+        self.logger.debug("run_tournament called with %d players", len(self.players))
         
 
         game_title = self.game_config['name']
         self.tournament_started = True  # Set flag to enable timeouts
-        self.server_print(f"TOURNAMENT {game_title} started with {len(self.players)} players")
-        print(encode_tournament_start(game_title, len(self.players)), flush=True)
+        self.logger.info("TOURNAMENT %s started with %d players", game_title, len(self.players))
+        dashboard_event(encode_tournament_start(game_title, len(self.players)))
         
         # Get game class and configuration
         game_class = self.game_config["game_class"]
@@ -431,7 +905,6 @@ class AGTServer:
         
         # Create LocalArena with PlayerConnection objects directly
         from core.local_arena import LocalArena
-        print('creating local arena')
         arena = LocalArena(
             game_title=self.server_config["game_title"],
             game_class=game_class,
@@ -440,23 +913,36 @@ class AGTServer:
             num_rounds=num_rounds,
             timeout=30.0,
             save_results=False,  # Server handles result saving
-            verbose=True
+            verbose=True,
+            metrics=self.metrics,
+            spectator=self.spectators,
+            fast_forward=self.fast_forward,
+            seed=self.seed
         )
-        print('local arena created')
+        self.logger.info("tournament seed entropy %s", arena.seeds.entropy)
         
         # Run tournament asynchronously
-        self.server_print(f"Running tournament with async LocalArena...")
-        results_json = await arena.run_tournament_async()
+        self.logger.debug("Running tournament with async LocalArena...")
+        self.metrics.tournament_started()
+        try:
+            results_json = await arena.run_tournament_async()
+        finally:
+            self.metrics.tournament_finished()
         
         # Send results to clients
         await self._send_tournament_results(list(self.players.values()), results_json, arena.agent_stats)
         
-        self.server_print(f"TOURNAMENT {game_title} ended.")
-        print(encode_tournament_end(game_title), flush=True)
+        self.logger.info("TOURNAMENT %s ended.", game_title)
+        dashboard_event(encode_tournament_end(game_title))
+
+        # clients that asked to report their self-profile send it once they have the results
+        await self._wait_for_client_profiles(list(self.players.values()))
         
-        # Reset tournament flag so client connections can complete
+        # Reset tournament flag and close the connections, the clients exit once they have their results
         self.tournament_started = False
-        self.server_print(f"[DEBUG] Tournament flag reset to False")
+        for player in list(self.players.values()):
+            await self.evict_player(player, "tournament complete")
+        self.logger.debug("Tournament flag reset to False")
         
         # except Exception as e:
         #     self.server_print(f"error running tournament: {e}")
@@ -468,6 +954,7 @@ class AGTServer:
         #     self.server_print(f"==========================================")
 
         self.tournament_started = False
+        return results_json
     
 
 
@@ -502,40 +989,156 @@ class AGTServer:
 
 
     
-    async def _send_tournament_results(self, players: List[PlayerConnection], results_json, agent_stats: Dict):
-        """Send tournament results to all players."""
-        for player in players:
-            try:
-                await self.send_message(player.writer, {
-                    "message": "tournament_complete",
-                    "results": results_json
-                })
-            except Exception as e:
-                self.server_print(f"Failed to send results to {player.name}: {e}")
-    
-
-
-
-
-
+    def start_ladder(self):
+        """Start matchmaking for ladder mode, games begin as soon as enough players are idle (see ladder.py)."""
+        if self.ladder is None:
+            self.ladder = Ladder(self.game_config["num_players"], self.server_config.get("ladder_k_factor", 32.0))
+        if self._ladder_arena is None:
+            from core.local_arena import LocalArena
+            self._ladder_arena = LocalArena(
+                game_title=self.server_config["game_title"],
+                game_class=self.game_config["game_class"],
+                agents=[],
+                num_agents_per_game=self.game_config["num_players"],
+                num_rounds=self.game_config["num_rounds"],
+                timeout=30.0,
+                save_results=False,
+                verbose=False,
+                metrics=self.metrics,
+                spectator=self.spectators,
+                fast_forward=self.fast_forward,
+                seed=self.seed
+            )
+        self.tournament_started = True  # Set flag to enable timeouts
+        if self._ladder_task is None or self._ladder_task.done():
+            self.metrics.tournament_started()
+            self._ladder_task = asyncio.create_task(self._ladder_loop())
+            self.logger.info("LADDER %s started, games begin whenever %d players are idle",
+                             self.game_config['name'], self.ladder.group_size)
+        self._ladder_wakeup.set()
+
+    def _player_available(self, player: PlayerConnection):
+        """A player joined or came back, in ladder mode they go into the matchmaking pool."""
+        if self.ladder is None:
+            return
+        self.ladder.mark_idle(player.name)
+        self._ladder_wakeup.set()
+
+    def _idle_players(self) -> List[str]:
+        return [name for name, player in self.players.items()
+                if player.alive and player.connected and name not in self.in_game]
+
+    async def _ladder_loop(self):
+        """Start a game every time enough players are idle."""
+        while True:
+            await self._ladder_wakeup.wait()
+            self._ladder_wakeup.clear()
+            while True:
+                names = self.ladder.pick_match(self._idle_players())
+                if names is None:
+                    break
+                self.in_game.update(names)
+                game = asyncio.create_task(self._play_ladder_game([self.players[name] for name in names]))
+                self._ladder_games.add(game)
+                game.add_done_callback(self._ladder_games.discard)
+
+    async def _play_ladder_game(self, players: List[PlayerConnection]):
+        """Play one ladder game, update the ratings and put the players back in the pool."""
+        names = [player.name for player in players]
+        self.logger.info("LADDER game: %s", ", ".join(f"{name} ({self.ladder.entry(name).rating:.0f})" for name in names))
+        try:
+            rewards, forfeited = await self._ladder_arena.run_game_async(players)
+            changes = self.ladder.record_game(names, rewards, forfeited)
+            self.logger.info("LADDER game done: %s", ", ".join(
+                f"{name} {rewards[i]:+.1f} ({changes[name]:+.0f})" for i, name in enumerate(names)))
+            await self._send_ladder_updates(players, rewards, changes)
+        except Exception as e:
+            self.logger.exception("ladder game %s failed: %s", names, e)
+        finally:
+            for name in names:
+                self.in_game.discard(name)
+                self.ladder.mark_idle(name)
+            self._ladder_wakeup.set()
+
+    async def _send_ladder_updates(self, players: List[PlayerConnection], rewards: List[float], changes: Dict[str, float]):
+        """Tell each player how the game went for them and where the ladder stands now."""
+        leaderboard = self.ladder.leaderboard(self.ladder_leaderboard_size)
+
+        async def deliver(player: PlayerConnection, reward: float):
+            entry = self.ladder.entry(player.name)
+            await player.transport.send_now({
+                "message": "ladder_update",
+                "reward": reward,
+                "rating": round(entry.rating, 1),
+                "rating_change": round(changes[player.name], 1),
+                "rank": self.ladder.rank(player.name),
+                "num_ranked": len(self.ladder.entries),
+                "games": entry.games,
+                "leaderboard": leaderboard,
+            })
 
+        await asyncio.gather(*(deliver(player, reward) for player, reward in zip(players, rewards) if player.alive),
+                             return_exceptions=True)
 
+    async def _send_tournament_results(self, players: List[PlayerConnection], results_json, agent_stats: Dict):
+        """Send tournament results to all players."""
+        await self.broadcast(players, {
+            "message": "tournament_complete",
+            "results": results_json
+        })
+
+    async def _wait_for_client_profiles(self, players: List[PlayerConnection]):
+        """Give players that announced a self-profile up to profile_report_timeout seconds to send it."""
+        deadline = time.monotonic() + self.profile_report_timeout
+        while time.monotonic() < deadline:
+            if all(player.client_profile is not None or not player.report_profile or not player.alive
+                   for player in players):
+                return
+            await asyncio.sleep(0.02)
 
     async def _send_tournament_error(self, players: List[PlayerConnection], error_message: str):
         """Send tournament error to all players."""
-        for player in players:
+        await self.broadcast(players, {
+            "message": "tournament_error",
+            "error": error_message
+        })
+
+    async def broadcast(self, players: List[PlayerConnection], message: Dict[str, Any],
+                        deadline: Optional[float] = None) -> List[PlayerConnection]:
+        """
+        Send one message to many players at once.
+
+        The message is encoded once and the same bytes are queued for everyone (behind
+        anything still buffered for them, so ordering is kept). Every player gets
+        `deadline` seconds to take the payload, players that can't are dropped so a
+        stalled client doesn't hold up the rest. Returns the dropped players.
+        """
+        if deadline is None:
+            deadline = self.broadcast_timeout
+        data = json.dumps(message).encode() + b'\n'
+        dropped: List[PlayerConnection] = []
+
+        async def deliver(player: PlayerConnection):
+            if not player.alive:
+                return
+            player.transport.queue_encoded(data)
+            if not player.connected:
+                return #replayed if they resume in time
             try:
-                await self.send_message(player.writer, {
-                    "message": "tournament_error",
-                    "error": error_message
-                })
-            except Exception as e:
-                self.server_print(f"Failed to send error to {player.name}: {e}")
-    
-    
-    
+                await asyncio.wait_for(player.transport.flush(drain=True), timeout=deadline)
+            except (asyncio.TimeoutError, ConnectionError, OSError) as e:
+                self.logger.warning("Failed to send %s to %s: %s", message.get("message"), player.name, str(e) or "timed out")
+                dropped.append(player)
+
+        await asyncio.gather(*(deliver(player) for player in players))
+
+        for player in dropped:
+            #don't wait for a stuck socket buffer to drain on close
+            if player.writer.transport is not None:
+                player.writer.transport.abort()
+            await self.evict_player(player, f"could not accept {message.get('message')} within {deadline:.0f}s")
+        return dropped
 
-    
     async def send_message(self, writer: asyncio.StreamWriter, message: Dict[str, Any]):
         """Send a message to a client."""
         try:
@@ -556,36 +1159,46 @@ class AGTServer:
             data = json.dumps(message).encode() + b'\n'
             # Sending message to client - no logging needed
             writer.write(data)
-            await writer.drain()
+            self.metrics.record_sent(1, len(data))
+            # only wait for the socket when the client is falling behind
+            if writer.transport.get_write_buffer_size() > self.write_high_water:
+                await writer.drain()
         except Exception as e:
-            print(f"Error sending message: {e}")
+            self.logger.error("Error sending message: %s", e)
+
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-player write queue depth and traffic counters."""
+        return {name: player.transport.stats() for name, player in self.players.items() if player.transport}
 
     async def _send_waiting_message(self, player: PlayerConnection):
         """Send a waiting message to a connected player."""
         try:
-            self.server_print(f"[DEBUG] Creating waiting message for {player.name}")
             message = {
                 "message": "waiting_for_tournament",
                 "status": "connected",
                 "message_text": "Connected to server. Waiting for tournament to start..."
             }
-            self.server_print(f"[DEBUG] Sending waiting message to {player.name}: {message}")
-            await self.send_message(player.writer, message)
-            self.server_print(f"[DEBUG] Waiting message sent successfully to {player.name}")
+            if self.ladder is not None:
+                message["mode"] = "ladder"
+                message["message_text"] = "Connected to server. Ladder mode, your first game starts as soon as opponents are free."
+            self.logger.debug("Sending waiting message to %s: %s", player.name, message)
+            await player.transport.send_now(message)
         except Exception as e:
-            self.server_print(f"[DEBUG] Error sending waiting message to {player.name}: {e}")
-            print(f"Error sending waiting message to {player.name}: {e}")
+            self.logger.error("Error sending waiting message to %s: %s", player.name, e)
 
-    async def receive_message(self, reader: asyncio.StreamReader, player: Optional[PlayerConnection] = None) -> Optional[Dict[str, Any]]:
+    async def receive_message(self, reader: asyncio.StreamReader, player: Optional[PlayerConnection] = None,
+                              timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """Receive a message from a client."""
         try:
             # Use different timeouts based on tournament state
             # Before tournament: long timeout (grace period for connection)
             # During tournament: short timeout (enforce responsiveness)
-            timeout = 300.0 if not self.tournament_started else 10.0
+            if timeout is None:
+                timeout = 300.0 if not self.tournament_started else 10.0
             data = await asyncio.wait_for(reader.readline(), timeout=timeout)
             if not data:
                 return None
+            self.metrics.record_received(len(data))
             decoded_data = data.decode().strip()
             if not decoded_data:
                 return None
@@ -593,11 +1206,13 @@ class AGTServer:
                 msg = json.loads(decoded_data)
                 return msg
             except json.JSONDecodeError as e:
-                print(f"JSON decode error: {e}")
-                print(f"Raw data: {repr(decoded_data)}")
+                self.logger.warning("JSON decode error: %s", e)
+                self.logger.debug("Raw data: %r", decoded_data)
                 return None
+        except asyncio.TimeoutError:
+            self.logger.info("Timed out after %.0fs waiting for a client message", timeout)
         except Exception as e:
-            print(f"Error receiving message: {e}")
+            self.logger.error("Error receiving message: %s", e)
         return None
     
     
@@ -605,29 +1220,34 @@ class AGTServer:
         """Start the server."""
         try:
 
-            print(f"Attempting to start server on {self.host}:{self.port}")
+            self.logger.debug("Attempting to start server on %s:%s", self.host, self.port)
             
             server = await asyncio.start_server(
                 self.handle_new_client_connection,
                 self.host,
-                self.port
+                self.port,
+                backlog=self.listen_backlog
             )
+            self.start_heartbeat()
+            await self.start_metrics()
+            await self.start_spectator()
             
-            print(f"Server running on {self.host}:{self.port}", flush=True)
-            print("Commands:", flush=True)
-            print("  Ctrl+Z                - Start tournament", flush=True)
-            print("  Ctrl+C                - Exit server", flush=True)
-            print("", flush=True)
-            print("Waiting for players to connect...", flush=True)
+            self.logger.info("Server running on %s:%s", self.host, self.port)
+            if self.ladder is not None:
+                self.start_ladder()
+                self.logger.info("Commands:\n"
+                                 "  Ctrl+C                - Save the ladder standings and exit\n")
+            else:
+                self.logger.info("Commands:\n"
+                                 "  Ctrl+Z                - Start tournament\n"
+                                 "  Ctrl+C                - Exit server\n")
+            self.logger.info("Waiting for players to connect...")
             
             async with server:
                 await server.serve_forever()
                 
         except Exception as e:
-            print(f"[ERROR] Failed to start AGT server: {e}")
-            if self.verbose:
-                import traceback
-                traceback.print_exc()
+            self.logger.exception("Failed to start AGT server: %s", e)
             raise
     
     def save_results(self):
@@ -639,8 +1259,16 @@ class AGTServer:
             with open(filename, 'w') as f:
                 json.dump(self.results, f, indent=2, default=str)
             
-            print(f"Results saved to {filename}")
-            print(encode_results_saved(filename), flush=True)
+            self.logger.info("Results saved to %s", filename)
+            dashboard_event(encode_results_saved(filename))
+
+        if self.ladder is not None and self.ladder.entries:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            filename = f"results/agt_ladder_{self.server_config['game_title']}_{timestamp}.json"
+            with open(filename, 'w') as f:
+                json.dump({"games": self.ladder.games_played, "leaderboard": self.ladder.leaderboard()}, f, indent=2)
+            self.logger.info("Ladder standings saved to %s", filename)
+            dashboard_event(encode_results_saved(filename))
 
 
 async def main():
@@ -650,10 +1278,27 @@ async def main():
     parser.add_argument('--port', type=int, default=8080, help='Port to bind to')
     parser.add_argument('--game', type=str, choices=['rps', 'bos', 'bosii', 'chicken', 'pd', 'lemonade', 'auction', 'adx_twoday', 'adx_oneday'],
                        help='Restrict server to a specific game type (required)')
+    parser.add_argument('--shards', type=int, default=1,
+                       help='Number of worker processes to spread players over (0 = one per core)')
+    parser.add_argument('--max-players', type=int, default=50,
+                       help='Players seated at once, later connections wait in a queue (0 = no limit)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='Serve prometheus metrics on this port (with --shards, shard i uses this port + i)')
+    parser.add_argument('--spectator-port', type=int, default=None,
+                       help='Stream live games as server-sent events on this port at /spectate (with --shards, shard i uses this port + i)')
+    parser.add_argument('--log-level', type=str, default='info',
+                       help='Default log level (debug, info, warning, error)')
+    parser.add_argument('--log', type=str, default='',
+                       help=f'Per-component log levels, e.g. server=debug,engine=warning (components: {", ".join(COMPONENTS)})')
+    parser.add_argument('--ladder', action='store_true',
+                       help='Ladder mode: start a game whenever enough players are idle, with elo matchmaking, instead of one tournament on Ctrl+Z')
+    parser.add_argument('--shard-mode', type=str, choices=['handoff', 'reuseport'], default='handoff',
+                       help='How shards share the port: coordinator socket handoff or SO_REUSEPORT')
     # Dashboard is now separate - run with: python dashboard/app.py
 
     
     args = parser.parse_args()
+    setup_logging(args.log_level, parse_levels(args.log))
     
     # Default configuration
     config = {
@@ -672,7 +1317,23 @@ async def main():
         return
 
     config["game_title"] = args.game
-    print(f"server restricted to game: {args.game}")
+    config["max_players"] = args.max_players or None
+    config["mode"] = "ladder" if args.ladder else "tournament"
+    if args.metrics_port is not None:
+        config["metrics_port"] = args.metrics_port
+    if args.spectator_port is not None:
+        config["spectator_port"] = args.spectator_port
+    logger.info("server restricted to game: %s", args.game)
+
+    if args.shards != 1:
+        if args.ladder:
+            # every shard would keep its own pool and ratings
+            print("ERROR: --ladder runs a single matchmaking pool, it can't be combined with --shards")
+            return
+        # several worker processes behind one port, see sharding.py
+        from sharding import run_sharded_server
+        await run_sharded_server(config, args.host, args.port, args.shards or None, args.shard_mode)
+        return
 
     
     server = AGTServer(config, args.host, args.port)
@@ -683,7 +1344,7 @@ async def main():
     async def start_tournament():
         """Start tournament function for main."""
         nonlocal tournament_started
-        print("\nStarting tournament...")
+        logger.info("Starting tournament...")
         tournament_started = True
         await server.run_tournament()
 
@@ -692,15 +1353,17 @@ async def main():
         nonlocal tournament_started
         if signum == signal.SIGTSTP:
             # SIGTSTP (Ctrl+Z) = Start tournament
-            print(f"[DEBUG] Signal handler called - tournament_started: {tournament_started}, server.tournament_started: {server.tournament_started}")
-            if not tournament_started:
-                print("\nStarting tournament...")
+            logger.debug("Signal handler called - tournament_started: %s, server.tournament_started: %s", tournament_started, server.tournament_started)
+            if server.ladder is not None:
+                logger.info("Ladder mode, games start on their own")
+            elif not tournament_started:
+                logger.info("Starting tournament...")
                 tournament_started = True
                 server.tournament_started = True  # Set instance variable too
-                print(f"[DEBUG] Set both flags - tournament_started: {tournament_started}, server.tournament_started: {server.tournament_started}")
+                logger.debug("Set both flags - tournament_started: %s, server.tournament_started: %s", tournament_started, server.tournament_started)
         elif signum == signal.SIGINT:
             # SIGINT (Ctrl+C) = Exit server
-            print("\nShutting down server...")
+            logger.info("Shutting down server...")
             server.save_results()
             sys.exit(0)
 
@@ -713,7 +1376,7 @@ async def main():
         # Dashboard is now separate - run with: python dashboard/app.py
         
         # Start server
-        print(f"[DEBUG] Creating server task...")
+        logger.debug("Creating server task...")
         server_task = asyncio.create_task(server.start())
         
         # Wait for manual interrupt to start tournaments
@@ -727,9 +1390,7 @@ async def main():
                 break
             
     except Exception as e:
-        print(f"[ERROR] Server error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Server error: %s", e)
         server.save_results()
         raise
 
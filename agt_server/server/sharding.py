@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+sharded agt server
+
+a single AGTServer process tops out at one core for json encoding, game simulation
+and local agents. this module runs several AGTServer worker processes behind one
+port, each with its own lobby and arena, plus a lightweight coordinator process
+that assigns players to shards and aggregates the tournament results.
+
+two ways of sharing the port are supported:
+- "handoff": the coordinator owns the listening socket, accepts every connection
+  and hands the accepted socket to the least loaded shard over a unix pipe.
+- "reuseport": every shard binds the same port with SO_REUSEPORT and the kernel
+  spreads incoming connections over them (linux only).
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional
+
+# Add the server and core directories to the path
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+try:
+    from server import AGTServer
+except ImportError:
+    from server.server import AGTServer
+
+from binary_encoding import encode_tournament_start, encode_tournament_end, encode_results_saved
+from core.log import get_logger, dashboard_event
+
+logger = get_logger("shard")
+
+
+SHARD_MODES = ("handoff", "reuseport")
+
+# how often a shard reports its lobby size to the coordinator
+LOAD_REPORT_INTERVAL = 0.25
+# how often the coordinator logs the shard loads, when they changed. every report is logged at debug level
+LOAD_SUMMARY_INTERVAL = 30.0
+
+
+@dataclass
+class ShardHandle:
+    """coordinator-side view of a running shard process."""
+    shard_id: int
+    process: multiprocessing.Process
+    conn: Connection
+    num_players: int = 0
+    handed_off: int = 0  # sockets sent to the shard by the coordinator
+    adopted: int = 0  # sockets the shard reported as picked up
+    ready: bool = False
+    exited: bool = False  # the shard's pipe closed, it won't answer commands any more
+    results: Optional[asyncio.Future] = None
+
+    @property
+    def load(self) -> int:
+        """connected players plus connections still in flight to the shard."""
+        return self.num_players + max(self.handed_off - self.adopted, 0)
+
+
+def merge_shard_results(shard_results: Dict[int, Optional[Dict[str, Any]]], game_title: str) -> Dict[str, Any]:
+    """
+    merge per-shard tournament results into one leaderboard.
+
+    player names are only unique within a shard, so every entry is tagged with
+    the shard it played on.
+    """
+    merged = []
+    for shard_id, results in sorted(shard_results.items()):
+        if not results:
+            continue
+        for entry in results.get("tournament_results", []):
+            merged.append(dict(entry, shard=shard_id))
+
+    merged.sort(key=lambda entry: entry.get("total score", 0), reverse=True)
+
+    return {
+        "tournament_results": merged,
+        "summary": {
+            "total_players": len(merged),
+            "num_shards": len(shard_results),
+            "timestamp": time.strftime("%Y%m%d_%H%M%S"),
+            "game_title": game_title,
+        }
+    }
+
+
+def _shard_main(shard_id: int, config: Dict[str, Any], host: str, port: int, mode: str, conn: Connection):
+    """entry point of a shard worker process."""
+    # the coordinator owns ctrl+z / ctrl+c, the terminal sends them to the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTSTP, signal.SIG_IGN)
+    asyncio.run(_run_shard(shard_id, config, host, port, mode, conn))
+
+
+async def _run_shard(shard_id: int, config: Dict[str, Any], host: str, port: int, mode: str, conn: Connection):
+    """run one shard: an AGTServer lobby driven by commands from the coordinator."""
+    loop = asyncio.get_running_loop()
+    if config.get("metrics_port"):
+        # every shard serves its own metrics, shard i on metrics_port + i
+        config = dict(config, metrics_port=config["metrics_port"] + shard_id)
+    if config.get("spectator_port"):
+        config = dict(config, spectator_port=config["spectator_port"] + shard_id)
+    server = AGTServer(config, host, port)
+    commands: asyncio.Queue = asyncio.Queue()
+    adopted = 0
+
+    def read_commands():
+        # runs in a thread, conn.recv() and recv_handle() block
+        while True:
+            try:
+                command = conn.recv()
+                if command[0] == "socket":
+                    command = ("socket", socket.socket(fileno=reduction.recv_handle(conn)))
+            except (EOFError, OSError):
+                command = ("shutdown",)
+            loop.call_soon_threadsafe(commands.put_nowait, command)
+            if command[0] == "shutdown":
+                return
+
+    async def report_load():
+        last = None
+        while True:
+            current = (len(server.players), adopted)
+            if current != last:
+                conn.send(("load", *current))
+                last = current
+            await asyncio.sleep(LOAD_REPORT_INTERVAL)
+
+    async def adopt(sock: socket.socket):
+        reader, writer = await asyncio.open_connection(sock=sock)
+        await server.handle_new_client_connection(reader, writer)
+
+    async def play_tournament():
+        players = list(server.players.values())
+        if len(players) < server.game_config["num_players"]:
+            server.server_print(f"shard {shard_id} has {len(players)} players, not enough for a game")
+            await server._send_tournament_error(players, "not enough players on this shard")
+            conn.send(("results", None))
+            return
+        results = await server.run_tournament()
+        conn.send(("results", results))
+
+    listener = None
+    if mode == "reuseport":
+        listener = await asyncio.start_server(server.handle_new_client_connection, host, port, reuse_port=True)
+
+    server.start_heartbeat()
+    await server.start_metrics()
+    await server.start_spectator()
+    threading.Thread(target=read_commands, daemon=True).start()
+    reporter = asyncio.create_task(report_load())
+    tasks = set()
+    conn.send(("ready",))
+
+    while True:
+        command = await commands.get()
+        if command[0] == "socket":
+            adopted += 1
+            task = asyncio.create_task(adopt(command[1]))
+        elif command[0] == "start_tournament":
+            task = asyncio.create_task(play_tournament())
+        elif command[0] == "shutdown":
+            break
+        else:
+            server.server_print(f"shard {shard_id} got unknown command: {command[0]}")
+            continue
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    reporter.cancel()
+    if listener is not None:
+        listener.close()
+    for task in tasks:
+        task.cancel()
+    server.save_results()
+
+
+class ShardCoordinator:
+    """
+    starts the shard processes, assigns incoming players to shards and
+    aggregates the results of the per-shard tournaments.
+    """
+
+    def __init__(self, config: Dict[str, Any], host: str = "0.0.0.0", port: int = 8080,
+                 num_shards: Optional[int] = None, mode: str = "handoff"):
+        if mode not in SHARD_MODES:
+            raise ValueError(f"Unknown shard mode: {mode}")
+        if mode == "reuseport" and not hasattr(socket, "SO_REUSEPORT"):
+            raise ValueError("SO_REUSEPORT is not supported on this platform, use --shard-mode handoff")
+
+        self.server_config = config
+        self.host = host
+        self.port = port
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.mode = mode
+        self.shards: List[ShardHandle] = []
+        self.results: List[Dict[str, Any]] = []
+        self.tournament_started = False
+        self._listener: Optional[socket.socket] = None
+        self._all_ready: Optional[asyncio.Event] = None
+        self._load_summary: Optional[asyncio.Task] = None
+
+    def coordinator_print(self, message: str, flush: bool = True):
+        """Unified print method for all coordinator output."""
+        logger.info(message)
+
+    def shard_loads(self) -> List[int]:
+        """current number of players (connected or in flight) per shard."""
+        return [shard.load for shard in self.shards]
+
+    def _pick_shard(self) -> ShardHandle:
+        """least loaded shard, ties go to the lowest shard id."""
+        return min(self.shards, key=lambda shard: (shard.load, shard.shard_id))
+
+    async def start(self):
+        """start the shard processes and wait until they all accept players."""
+        loop = asyncio.get_running_loop()
+        self._all_ready = asyncio.Event()
+
+        if self.mode == "handoff":
+            # bind before forking so a port clash fails fast in the coordinator
+            self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._listener.bind((self.host, self.port))
+            self._listener.listen(1024)
+            self._listener.setblocking(False)
+
+        for shard_id in range(self.num_shards):
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=True)
+            process = multiprocessing.Process(
+                target=_shard_main,
+                args=(shard_id, self.server_config, self.host, self.port, self.mode, child_conn),
+                name=f"agt-shard-{shard_id}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            shard = ShardHandle(shard_id=shard_id, process=process, conn=parent_conn)
+            self.shards.append(shard)
+            threading.Thread(target=self._read_shard_events, args=(shard, loop), daemon=True).start()
+
+        await self._all_ready.wait()
+        self.coordinator_print(f"{self.num_shards} shards running on {self.host}:{self.port} ({self.mode} mode)")
+        self._load_summary = asyncio.create_task(self._summarize_loads())
+
+    async def _summarize_loads(self):
+        """log the shard loads every LOAD_SUMMARY_INTERVAL, rather than on every join and leave."""
+        last = None
+        while True:
+            await asyncio.sleep(LOAD_SUMMARY_INTERVAL)
+            loads = self.shard_loads()
+            if loads != last:
+                self.coordinator_print(f"shard loads: {loads}")
+                last = loads
+
+    def _read_shard_events(self, shard: ShardHandle, loop: asyncio.AbstractEventLoop):
+        """runs in a thread per shard, conn.recv() blocks."""
+        while True:
+            try:
+                event = shard.conn.recv()
+            except (EOFError, OSError):
+                event = ("exited",)
+            loop.call_soon_threadsafe(self._handle_shard_event, shard, event)
+            if event[0] == "exited":
+                return
+
+    def _handle_shard_event(self, shard: ShardHandle, event: tuple):
+        """dispatch a message coming back from one shard."""
+        if event[0] == "ready":
+            shard.ready = True
+            if len(self.shards) == self.num_shards and all(s.ready for s in self.shards):
+                self._all_ready.set()
+        elif event[0] == "load":
+            shard.num_players, shard.adopted = event[1], event[2]
+            logger.debug("shard %d load: %d players, shard loads: %s", shard.shard_id, shard.num_players,
+                         self.shard_loads())
+        elif event[0] in ("results", "exited"):
+            if event[0] == "exited":
+                shard.exited = True
+            if shard.results is not None and not shard.results.done():
+                shard.results.set_result(event[1] if event[0] == "results" else None)
+
+    async def serve(self):
+        """start the shards and, in handoff mode, hand accepted connections to them."""
+        await self.start()
+        if self.mode != "handoff":
+            # the shards accept connections themselves
+            await asyncio.Event().wait()
+
+        loop = asyncio.get_running_loop()
+        while True:
+            client_sock, address = await loop.sock_accept(self._listener)
+            shard = self._pick_shard()
+            try:
+                shard.conn.send(("socket",))
+                reduction.send_handle(shard.conn, client_sock.fileno(), shard.process.pid)
+                shard.handed_off += 1
+            except OSError as e:
+                self.coordinator_print(f"Failed to hand {address} to shard {shard.shard_id}: {e}")
+            finally:
+                # the shard holds its own duplicate of the descriptor now
+                client_sock.close()
+
+    async def run_tournament(self) -> Dict[str, Any]:
+        """run a tournament on every shard and merge the leaderboards."""
+        loop = asyncio.get_running_loop()
+        game_title = self.server_config["game_title"]
+        self.tournament_started = True
+        total_players = sum(shard.num_players for shard in self.shards)
+        self.coordinator_print(f"TOURNAMENT {game_title} started on {len(self.shards)} shards with {total_players} players")
+        dashboard_event(encode_tournament_start(game_title, total_players))
+
+        shard_results = {}
+        for shard in self.shards:
+            shard.results = loop.create_future()
+            if shard.exited or shard.conn.closed or not shard.process.is_alive():
+                # nothing would ever answer, the shard's players (if any) are lost with it
+                self.coordinator_print(f"shard {shard.shard_id} has exited, it takes no part in the tournament")
+                shard.results.set_result(None)
+                continue
+            try:
+                shard.conn.send(("start_tournament",))
+            except OSError as e:
+                self.coordinator_print(f"Failed to start the tournament on shard {shard.shard_id}: {e}")
+                shard.results.set_result(None)
+
+        for shard in self.shards:
+            shard_results[shard.shard_id] = await shard.results
+
+        merged = merge_shard_results(shard_results, game_title)
+        self.results.append(merged)
+
+        self.coordinator_print("combined leaderboard:")
+        for i, result in enumerate(merged["tournament_results"], 1):
+            self.coordinator_print(f"{i:2d}. {result['agent']:20s} | shard {result['shard']} | "
+                                   f"score: {result['total score']:6.1f}")
+
+        self.coordinator_print(f"TOURNAMENT {game_title} ended.")
+        dashboard_event(encode_tournament_end(game_title))
+        self.tournament_started = False
+        return merged
+
+    def shutdown(self, timeout: float = 5.0):
+        """stop all shards, they save their own results on the way out."""
+        if self._load_summary is not None:
+            self._load_summary.cancel()
+            self._load_summary = None
+        for shard in self.shards:
+            try:
+                shard.conn.send(("shutdown",))
+            except OSError:
+                pass
+        for shard in self.shards:
+            shard.process.join(timeout)
+            if shard.process.is_alive():
+                shard.process.terminate()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def save_results(self):
+        """Save combined results to file."""
+        if self.results:
+            os.makedirs("results", exist_ok=True)
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            filename = f"results/agt_server_results_{timestamp}.json"
+
+            with open(filename, 'w') as f:
+                json.dump(self.results, f, indent=2, default=str)
+
+            self.coordinator_print(f"Results saved to {filename}")
+            dashboard_event(encode_results_saved(filename))
+
+
+async def run_sharded_server(config: Dict[str, Any], host: str, port: int, num_shards: Optional[int], mode: str):
+    """main loop of a sharded server: ctrl+z starts the tournament, ctrl+c exits."""
+    loop = asyncio.get_running_loop()
+    coordinator = ShardCoordinator(config, host, port, num_shards, mode)
+    start_requested = asyncio.Event()
+    stop_requested = asyncio.Event()
+
+    loop.add_signal_handler(signal.SIGTSTP, start_requested.set)
+    loop.add_signal_handler(signal.SIGINT, stop_requested.set)
+
+    serve_task = asyncio.create_task(coordinator.serve())
+    logger.info("Commands:\n"
+                "  Ctrl+Z                - Start tournament\n"
+                "  Ctrl+C                - Exit server\n")
+
+    try:
+        start_wait = asyncio.create_task(start_requested.wait())
+        stop_wait = asyncio.create_task(stop_requested.wait())
+        await asyncio.wait([start_wait, stop_wait, serve_task], return_when=asyncio.FIRST_COMPLETED)
+        if start_requested.is_set() and not stop_requested.is_set():
+            logger.info("Starting tournament...")
+            await coordinator.run_tournament()
+        if serve_task.done() and serve_task.exception():
+            raise serve_task.exception()
+    finally:
+        logger.info("Shutting down server...")
+        serve_task.cancel()
+        coordinator.shutdown()
+        coordinator.save_results()
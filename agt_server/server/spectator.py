@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+live spectator feed for the agt server.
+
+the dashboard only sees what the server prints. SpectatorHub gets a call from the
+engine at the start of every game, after every round and at the end, and streams
+them to subscribers as server-sent events:
+
+    GET /spectate                 every game
+    GET /spectate?player=alice    only games alice plays in
+
+    event: game_start
+    data: {"game": 3, "title": "rps", "players": ["alice", "bob"], "rounds": 100}
+
+    event: round
+    data: {"game": 3, "round": 0, "actions": [0, 2], "rewards": [1, -1], "totals": [1, -1]}
+
+    event: game_end
+    data: {"game": 3, "totals": [12, -12], "forfeited": []}
+
+a frame is encoded once and the same bytes are queued for every subscriber, nothing
+is encoded at all while nobody is watching. the engine never waits on a spectator:
+each subscriber has a bounded queue, round frames that don't fit are skipped (a slow
+subscriber sees a sample of the rounds, plus every game_start and game_end), and a
+subscriber that can't take a write within write_timeout is disconnected.
+
+curl -N http://127.0.0.1:9200/spectate is enough to watch.
+"""
+
+import asyncio
+import collections
+import json
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from core.log import get_logger
+
+logger = get_logger("server")
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def _jsonable(value: Any) -> Any:
+    # actions can be numpy scalars or bid bundles
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def encode_event(event: str, data: Dict[str, Any]) -> bytes:
+    """one server-sent event, ready to write."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=_jsonable)}\n\n".encode()
+
+
+class Subscriber:
+    """one spectator connection with its own bounded frame queue."""
+
+    def __init__(self, writer: asyncio.StreamWriter, player: Optional[str], max_queue: int):
+        self.writer = writer
+        self.player = player  # only games this player is in, None for everything
+        self.frames: collections.deque = collections.deque()
+        self.max_queue = max_queue
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.skipped = 0  # round frames dropped because the queue was full
+        self.closed = False
+
+    def offer(self, frame: bytes, droppable: bool):
+        if len(self.frames) >= self.max_queue:
+            if droppable:
+                self.skipped += 1
+                return
+            # game boundaries always get through, make room by skipping the oldest frame
+            self.frames.popleft()
+            self.skipped += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+
+class SpectatorHub:
+    """fans encoded game frames out to every subscriber without blocking the games."""
+
+    def __init__(self, max_subscribers: int = 256, max_queue: int = 256, write_timeout: float = 5.0,
+                 keepalive_interval: float = 15.0):
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self.write_timeout = write_timeout
+        self.keepalive_interval = keepalive_interval
+        self.subscribers: Set[Subscriber] = set()
+        self.games: Dict[int, Dict[str, Any]] = {}  # live games, for the snapshot new subscribers get
+        self._next_game = 1
+        self.frames_encoded = 0
+        self.disconnected_slow = 0
+
+    # hooks called by the engine
+
+    def game_started(self, title: str, players: Sequence[str], rounds: int) -> int:
+        """register a new game, returns the id its frames are tagged with."""
+        game_id = self._next_game
+        self._next_game += 1
+        game = {"game": game_id, "title": title, "players": list(players), "rounds": rounds}
+        self.games[game_id] = game
+        self._publish(game_id, "game_start", game, droppable=False)
+        return game_id
+
+    def round_played(self, game_id: int, round_num: int, actions: Sequence[Any], rewards: Sequence[float],
+                     totals: Sequence[float]):
+        if not self.subscribers:
+            return
+        self._publish(game_id, "round", {
+            "game": game_id, "round": round_num, "actions": list(actions),
+            "rewards": list(rewards), "totals": list(totals),
+        }, droppable=True)
+
+    def game_finished(self, game_id: int, totals: Sequence[float], forfeited: Sequence[int] = ()):
+        self._publish(game_id, "game_end", {"game": game_id, "totals": list(totals), "forfeited": list(forfeited)},
+                      droppable=False)
+        self.games.pop(game_id, None)
+
+    def _publish(self, game_id: int, event: str, data: Dict[str, Any], droppable: bool):
+        if not self.subscribers:
+            return
+        players = self.games.get(game_id, {}).get("players", ())
+        frame = None
+        for subscriber in self.subscribers:
+            if subscriber.player is not None and subscriber.player not in players:
+                continue
+            if frame is None:
+                frame = encode_event(event, data)  # once, however many subscribers there are
+                self.frames_encoded += 1
+            subscriber.offer(frame, droppable)
+
+    # subscribers
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "live_games": len(self.games),
+            "frames_encoded": self.frames_encoded,
+            "frames_skipped": sum(subscriber.skipped for subscriber in self.subscribers),
+            "disconnected_slow": self.disconnected_slow,
+        }
+
+    async def serve(self, writer: asyncio.StreamWriter, player: Optional[str] = None):
+        """stream events to one subscriber until they go away or fall too far behind."""
+        subscriber = Subscriber(writer, player, self.max_queue)
+        # the games already running, so the viewer knows what the round frames belong to
+        for game in self.games.values():
+            if player is None or player in game["players"]:
+                subscriber.offer(encode_event("game_start", game), droppable=False)
+        self.subscribers.add(subscriber)
+        logger.info("Spectator connected (%d watching)", len(self.subscribers))
+
+        try:
+            while not writer.is_closing():
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), timeout=self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    subscriber.frames.append(KEEPALIVE)
+                subscriber.ready.clear()
+
+                # everything queued goes out in one write
+                frames = list(subscriber.frames)
+                subscriber.frames.clear()
+                writer.write(b"".join(frames))
+                try:
+                    await asyncio.wait_for(writer.drain(), timeout=self.write_timeout)
+                except asyncio.TimeoutError:
+                    self.disconnected_slow += 1
+                    logger.info("Dropping spectator that couldn't keep up (%d frames skipped)", subscriber.skipped)
+                    writer.transport.abort()
+                    break
+                subscriber.sent += len(frames)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            subscriber.closed = True
+            self.subscribers.discard(subscriber)
+            writer.close()
+            logger.info("Spectator disconnected (%d watching)", len(self.subscribers))
+
+
+class SpectatorHTTPServer:
+    """tiny http server for the event stream, runs on the server's event loop."""
+
+    def __init__(self, hub: SpectatorHub, host: str = "127.0.0.1", port: int = 9200):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+        except (asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+
+        parts = request_line.decode(errors="replace").split()
+        url = urllib.parse.urlsplit(parts[1]) if len(parts) >= 2 else None
+        if url is None or parts[0] != "GET" or url.path not in ("/spectate", "/"):
+            self._reply(writer, "404 Not Found", "text/plain", b"not found\n")
+            return
+        if len(self.hub.subscribers) >= self.hub.max_subscribers:
+            self._reply(writer, "503 Service Unavailable", "text/plain", b"too many spectators\n")
+            return
+
+        player = urllib.parse.parse_qs(url.query).get("player", [None])[0]
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\nAccess-Control-Allow-Origin: *\r\n\r\n: connected\n\n")
+        await self.hub.serve(writer, player)
+
+    @staticmethod
+    def _reply(writer: asyncio.StreamWriter, status: str, content_type: str, body: bytes):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        writer.close()
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+synthetic client swarm for load testing the agt server.
+
+spawns hundreds to thousands of bot clients (AGTClient with the built-in agents from
+core/agents/lab*) on one event loop or spread over several processes against a server
+in ladder mode, so there are as many games going at once as the bots can fill. once
+everyone is connected it measures for --duration seconds and reports what the server
+managed in that window:
+
+- end-to-end rounds per second
+- p50/p99 action latency, as seen by the server (request_action sent -> answer received)
+- p50/p99 turnaround, as seen by the bots (action sent -> next request_action)
+- server cpu
+
+everything runs on localhost. by default the swarm starts its own server process with
+the metrics endpoint enabled; point it at a running one with --port/--metrics-port.
+
+usage:
+    python swarm.py --game rps --clients 500
+    python swarm.py --game lemonade --clients 2000 --processes 4 --think exp:0.02 --ramp 5 --duration 60
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import inspect
+import json
+import math
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from client import AGTClient
+from core.log import get_logger, setup_logging
+
+logger = get_logger("swarm")
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+# built-in agents the bots are drawn from, per server game type (games with a server config)
+SWARM_AGENTS = {
+    "rps": ["core.agents.lab01.random_agent:RandomAgent", "core.agents.lab01.rock_agent:RockAgent",
+            "core.agents.lab01.paper_agent:PaperAgent", "core.agents.lab01.fictitious_play_agent:FictitiousPlayAgent"],
+    "bos": ["core.agents.lab02.random_bos_agent:RandomBOSAgent", "core.agents.lab02.compromise_agent:CompromiseAgent",
+            "core.agents.lab02.stubborn_agent:StubbornAgent", "core.agents.lab02.bos_punitive_agent:BOSPunitiveAgent"],
+    "bosii": ["core.agents.lab02.random_bos_agent:RandomBOSAgent", "core.agents.lab02.compromise_agent:CompromiseAgent",
+              "core.agents.lab02.stubborn_agent:StubbornAgent"],
+    "chicken": ["core.agents.lab03.random_chicken_agent:RandomChickenAgent", "core.agents.lab03.swerve_agent:SwerveAgent",
+                "core.agents.lab03.continue_agent:ContinueAgent"],
+    "lemonade": ["core.agents.lab04.random_lemonade_agent:RandomLemonadeAgent",
+                 "core.agents.lab04.always_stay_agent:AlwaysStayAgent", "core.agents.lab04.stick_agent:StickAgent"],
+    "auction": ["core.agents.lab07.random_agent:RandomAgent", "core.agents.lab07.aggressive_agent:AggressiveAgent",
+                "core.agents.lab07.conservative_agent:ConservativeAgent"],
+    "adx_twoday": ["core.agents.lab09.random_agent:RandomAdXAgent", "core.agents.lab09.aggressive_agent:AggressiveAdXAgent"],
+    "adx_oneday": ["core.agents.lab08.basic_bidding_agent:BasicBiddingAgent",
+                   "core.agents.lab08.aggressive_bidding_agent:AggressiveBiddingAgent"],
+}
+
+
+def parse_think_time(spec: str) -> Callable[[], float]:
+    """
+    parse a think-time distribution, in seconds.
+
+    none | const:D | uniform:LO,HI | exp:MEAN | lognormal:MEDIAN,SIGMA
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(x) for x in args.split(",") if x.strip()]
+    except ValueError:
+        raise ValueError(f"bad think time: {spec}")
+
+    if kind == "none" and not values:
+        return lambda: 0.0
+    if kind == "const" and len(values) == 1:
+        delay = values[0]
+        return lambda: delay
+    if kind == "uniform" and len(values) == 2:
+        low, high = values
+        return lambda: random.uniform(low, high)
+    if kind == "exp" and len(values) == 1:
+        mean = values[0]
+        return lambda: random.expovariate(1.0 / mean) if mean > 0 else 0.0
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"bad think time: {spec} (none, const:D, uniform:LO,HI, exp:MEAN, lognormal:MEDIAN,SIGMA)")
+
+
+def make_agent(game: str, name: str, index: int):
+    """instantiate the index-th bot for a game, cycling through the built-in agents."""
+    module_name, class_name = SWARM_AGENTS[game][index % len(SWARM_AGENTS[game])].split(":")
+    agent = getattr(importlib.import_module(module_name), class_name)(name)
+    agent.game_title = game
+    _adapt_update(agent)
+    return agent
+
+
+def _adapt_update(agent):
+    """
+    the client calls update(observation, action, reward, done, info), a lot of the lab
+    agents still have the old update(reward, info=None). wrap those so they can play.
+    """
+    try:
+        parameters = list(inspect.signature(agent.update).parameters.values())
+    except (TypeError, ValueError):
+        return
+    if any(p.kind == p.VAR_POSITIONAL for p in parameters) or len(parameters) >= 5:
+        return
+    original = agent.update
+    takes_info = len(parameters) >= 2
+
+    def update(observation=None, action=None, reward=None, done=None, info=None):
+        return original(reward, info) if takes_info else original(reward)
+
+    agent.update = update
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """nearest-rank percentile, q in [0, 1]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class SwarmClient(AGTClient):
+    """
+    bot client with a think-time delay that records its own turnaround times.
+
+    the lab agents decide in microseconds, so they run on the event loop: a worker thread
+    per bot would have the swarm measuring its own thread overhead.
+    """
+
+    def __init__(self, agent, host: str, port: int, think_time: Callable[[], float]):
+        super().__init__(agent, host, port, offload="none")
+        self.think_time = think_time
+        self.requests = 0
+        self.turnarounds: List[Tuple[float, float]] = []  # (time.time(), seconds from our action to the next request_action)
+        self._answered_at: Optional[float] = None
+
+    async def choose_action(self, observation: Dict[str, Any]) -> Any:
+        now = time.monotonic()
+        if self._answered_at is not None:
+            self.turnarounds.append((time.time(), now - self._answered_at))
+        self.requests += 1
+
+        delay = self.think_time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        action = await super().choose_action(observation)
+        if hasattr(action, "item"):
+            action = action.item()  # numpy scalars don't survive json
+        self._answered_at = time.monotonic()
+        return action
+
+    async def handle_message(self, message: Dict[str, Any]):
+        if message.get("message") in ("agent_setup", "ladder_update"):
+            # waiting between games isn't turnaround
+            self._answered_at = None
+        return await super().handle_message(message)
+
+
+async def run_bots(worker_id: int, num_clients: int, game: str, host: str, port: int,
+                   think: str, ramp: float, stop) -> Dict[str, Any]:
+    """
+    connect num_clients bots and play ladder games until stop is set, then return their stats.
+
+    stop is a threading.Event, or a multiprocessing.Event when the bots run in a worker process.
+    """
+    think_time = parse_think_time(think)
+    clients = [
+        SwarmClient(make_agent(game, f"bot{worker_id}_{i}", i), host, port, think_time)
+        for i in range(num_clients)
+    ]
+
+    async def play(client: SwarmClient, delay: float):
+        await asyncio.sleep(delay)
+        if stop.is_set():
+            return
+        await client.connect()
+        if client.connected:
+            await client.run()
+
+    async def stop_bots():
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        for client in clients:
+            # closing the connection ends client.run(), and should_exit keeps it from resuming
+            client.should_exit = True
+            if client.writer is not None:
+                client.writer.close()
+
+    # the client prints every leaderboard to stdout, nobody needs a thousand of them
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        stopper = asyncio.create_task(stop_bots())
+        await asyncio.gather(*(play(client, ramp * i / max(num_clients, 1)) for i, client in enumerate(clients)))
+        await stopper
+
+    return {
+        "clients": num_clients,
+        "connected": sum(1 for client in clients if client.session_token),
+        "played": sum(1 for client in clients if client.requests),
+        "requests": sum(client.requests for client in clients),
+        "turnarounds": [t for client in clients for t in client.turnarounds],
+    }
+
+
+def _worker_main(worker_id: int, num_clients: int, game: str, host: str, port: int,
+                 think: str, ramp: float, stop, results):
+    setup_logging("warning", stream=sys.stderr)
+    results.put(asyncio.run(run_bots(worker_id, num_clients, game, host, port, think, ramp, stop)))
+
+
+def parse_metrics(text: str) -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+    """parse prometheus text exposition into {name: [(labels, value), ...]}."""
+    metrics: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name_part, _, value = line.rpartition(" ")
+        labels = {}
+        if "{" in name_part:
+            name, _, label_text = name_part.partition("{")
+            for pair in label_text.rstrip("}").split(","):
+                key, _, label_value = pair.partition("=")
+                labels[key] = label_value.strip('"')
+        else:
+            name = name_part
+        metrics.setdefault(name, []).append((labels, float(value)))
+    return metrics
+
+
+def metrics_delta(before: Dict[str, List[Tuple[Dict[str, str], float]]],
+                  after: Dict[str, List[Tuple[Dict[str, str], float]]]) -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+    """what counters and histogram buckets gained between two scrapes, gauges come out meaningless."""
+    earlier = {(name, tuple(sorted(labels.items()))): value
+               for name, samples in before.items() for labels, value in samples}
+    return {
+        name: [(labels, value - earlier.get((name, tuple(sorted(labels.items()))), 0.0)) for labels, value in samples]
+        for name, samples in after.items()
+    }
+
+
+def metric_total(metrics: Dict[str, List[Tuple[Dict[str, str], float]]], name: str) -> float:
+    return sum(value for _, value in metrics.get(name, []))
+
+
+def histogram_quantile(metrics: Dict[str, List[Tuple[Dict[str, str], float]]], name: str, q: float) -> Optional[float]:
+    """estimate a quantile from cumulative histogram buckets, interpolating inside a bucket like prometheus does."""
+    buckets: Dict[float, float] = {}
+    for labels, value in metrics.get(f"{name}_bucket", []):
+        bound = float(labels["le"].replace("+Inf", "inf"))
+        buckets[bound] = buckets.get(bound, 0.0) + value
+    if not buckets:
+        return None
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]]
+    if total == 0:
+        return None
+
+    rank = q * total
+    lower, lower_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                return lower  # can't interpolate into +Inf, report the largest finite bound
+            if count == lower_count:
+                return bound
+            return lower + (bound - lower) * (rank - lower_count) / (count - lower_count)
+        lower, lower_count = bound, count
+    return lower
+
+
+def scrape(host: str, port: int, timeout: float = 5.0) -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+    with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=timeout) as response:
+        return parse_metrics(response.read().decode())
+
+
+async def _scrape(host: str, port: int):
+    return await asyncio.get_running_loop().run_in_executor(None, scrape, host, port)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class CpuSampler:
+    """samples a process's cpu use over the measured window."""
+
+    def __init__(self, pid: Optional[int]):
+        self.process = None
+        if pid is not None:
+            try:
+                import psutil
+                self.process = psutil.Process(pid)
+            except ImportError:
+                logger.warning("psutil is not installed, server cpu is not reported")
+        self.samples: List[float] = []
+        self._start: Optional[Tuple[float, float]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _cpu_seconds(self) -> float:
+        times = self.process.cpu_times()
+        return times.user + times.system
+
+    def start(self):
+        if self.process is None:
+            return
+        self._start = (time.monotonic(), self._cpu_seconds())
+        self.process.cpu_percent(None)
+        self._task = asyncio.create_task(self._sample())
+
+    async def _sample(self):
+        while True:
+            await asyncio.sleep(0.5)
+            self.samples.append(self.process.cpu_percent(None))
+
+    def stop(self) -> Dict[str, Optional[float]]:
+        if self._task is not None:
+            self._task.cancel()
+        if self.process is None or self._start is None:
+            return {"average_percent": None, "peak_percent": None}
+        wall = time.monotonic() - self._start[0]
+        cpu = self._cpu_seconds() - self._start[1]
+        return {
+            "average_percent": 100.0 * cpu / max(wall, 1e-9),
+            "peak_percent": max(self.samples) if self.samples else None,
+        }
+
+
+async def run_swarm(game: str, clients: int, processes: int = 1, think: str = "none", ramp: float = 0.0,
+                    port: Optional[int] = None, metrics_port: Optional[int] = None, server_pid: Optional[int] = None,
+                    connect_timeout: float = 60.0, duration: float = 30.0) -> Dict[str, Any]:
+    """run one load test against a localhost ladder server and return the report."""
+    host = "127.0.0.1"
+    if game not in SWARM_AGENTS:
+        raise ValueError(f"no swarm agents for game {game}, choose from {', '.join(SWARM_AGENTS)}")
+    parse_think_time(think)  # fail early on a bad spec
+
+    server_process = None
+    if port is None:
+        port, metrics_port = _free_port(), _free_port()
+        command = [sys.executable, SERVER_SCRIPT, "--game", game, "--host", host, "--port", str(port),
+                   "--metrics-port", str(metrics_port), "--max-players", "0", "--ladder", "--log-level", "warning"]
+        server_process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        server_pid = server_process.pid
+    if metrics_port is None:
+        raise ValueError("--metrics-port is required with --port, the report is built from the server's metrics")
+
+    loop = asyncio.get_running_loop()
+    results_queue = None
+    stop: Any = None
+    workers: List[Any] = []
+    try:
+        # wait for the server to come up
+        deadline = time.monotonic() + 30.0
+        while True:
+            try:
+                await _scrape(host, metrics_port)
+                break
+            except OSError:
+                if time.monotonic() > deadline or (server_process and server_process.poll() is not None):
+                    raise RuntimeError("server did not start")
+                await asyncio.sleep(0.2)
+
+        # spread the bots over the workers
+        processes = max(1, min(processes, clients))
+        shares = [clients // processes + (1 if i < clients % processes else 0) for i in range(processes)]
+        connect_start = time.monotonic()
+        if processes == 1:
+            stop = threading.Event()
+            workers = [asyncio.create_task(run_bots(0, clients, game, host, port, think, ramp, stop))]
+        else:
+            stop = multiprocessing.Event()
+            results_queue = multiprocessing.Queue()
+            for worker_id, share in enumerate(shares):
+                process = multiprocessing.Process(target=_worker_main, daemon=True,
+                                                  args=(worker_id, share, game, host, port, think, ramp, stop, results_queue))
+                process.start()
+                workers.append(process)
+
+        # wait until everyone is seated, the ladder starts games while they trickle in
+        connected = 0
+        while time.monotonic() - connect_start < connect_timeout:
+            connected = int(metric_total(await _scrape(host, metrics_port), "agt_connected_players"))
+            if connected >= clients:
+                break
+            await asyncio.sleep(0.25)
+        connect_time = time.monotonic() - connect_start
+        logger.info("%d/%d bots connected in %.1fs, measuring for %.0fs", connected, clients, connect_time, duration)
+
+        # measure a window of steady play, counters are diffed between its two scrapes
+        cpu = CpuSampler(server_pid)
+        before = await _scrape(host, metrics_port)
+        window_start = time.time()
+        cpu.start()
+        await asyncio.sleep(duration)
+        final = metrics_delta(before, await _scrape(host, metrics_port))
+        window_end = time.time()
+        server_cpu = cpu.stop()
+
+        stop.set()
+        if processes == 1:
+            done, _ = await asyncio.wait(workers, timeout=30.0)
+            bot_stats = [task.result() for task in done]
+        else:
+            bot_stats = []
+            for _ in workers:
+                try:
+                    bot_stats.append(await loop.run_in_executor(None, results_queue.get, True, 30.0))
+                except Exception:
+                    break
+    finally:
+        if stop is not None:
+            stop.set()  # run_bots waits for it on an executor thread
+        for worker in workers:
+            if isinstance(worker, asyncio.Task):
+                worker.cancel()
+            elif worker.is_alive():
+                worker.terminate()
+        if server_process is not None:
+            server_process.send_signal(signal.SIGINT)
+            try:
+                server_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server_process.kill()
+
+    turnarounds = [t for stats in bot_stats for at, t in stats["turnarounds"] if window_start <= at <= window_end]
+    rounds_played = metric_total(final, "agt_rounds_total")
+    window = window_end - window_start
+    return {
+        "game": game,
+        "clients": clients,
+        "processes": processes,
+        "think_time": think,
+        "connected": connected,
+        "connect_seconds": connect_time,
+        "played": sum(stats["played"] for stats in bot_stats),
+        "window_seconds": window,
+        "games": metric_total(final, "agt_games_completed_total"),
+        "rounds": rounds_played,
+        "rounds_per_second": rounds_played / max(window, 1e-9),
+        "action_latency_p50": histogram_quantile(final, "agt_action_latency_seconds", 0.50),
+        "action_latency_p99": histogram_quantile(final, "agt_action_latency_seconds", 0.99),
+        "action_timeouts": metric_total(final, "agt_action_timeouts_total"),
+        "turnaround_p50": percentile(turnarounds, 0.50),
+        "turnaround_p99": percentile(turnarounds, 0.99),
+        "server_cpu_percent": server_cpu["average_percent"],
+        "server_cpu_peak_percent": server_cpu["peak_percent"],
+        "event_loop_lag_p99": histogram_quantile(final, "agt_event_loop_lag_seconds", 0.99),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    def ms(value):
+        return "n/a" if value is None else f"{value * 1000:.1f} ms"
+
+    def pct(value):
+        return "n/a" if value is None else f"{value:.0f}%"
+
+    return "\n".join([
+        "=" * 50,
+        f"SWARM REPORT - {report['game']}",
+        "=" * 50,
+        f"bots:               {report['connected']}/{report['clients']} connected in {report['connect_seconds']:.1f}s"
+        f" ({report['processes']} process{'es' if report['processes'] != 1 else ''}, think {report['think_time']})",
+        f"window:             {report['window_seconds']:.1f}s, {report['games']:.0f} games, {report['rounds']:.0f} rounds,"
+        f" {report['played']} bots played",
+        f"rounds/s:           {report['rounds_per_second']:.1f}",
+        f"action latency:     p50 {ms(report['action_latency_p50'])}, p99 {ms(report['action_latency_p99'])}"
+        f" ({report['action_timeouts']:.0f} timeouts)",
+        f"bot turnaround:     p50 {ms(report['turnaround_p50'])}, p99 {ms(report['turnaround_p99'])}",
+        f"server cpu:         avg {pct(report['server_cpu_percent'])}, peak {pct(report['server_cpu_peak_percent'])}",
+        f"event loop lag p99: {ms(report['event_loop_lag_p99'])}",
+        "=" * 50,
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the AGT server with a swarm of bot clients on localhost')
+    parser.add_argument('--game', type=str, required=True, choices=sorted(SWARM_AGENTS), help='Game type to play')
+    parser.add_argument('--clients', type=int, default=100, help='Number of bot clients')
+    parser.add_argument('--processes', type=int, default=1, help='Processes to spread the bots over')
+    parser.add_argument('--think', type=str, default='none',
+                        help='Think time per action: none, const:D, uniform:LO,HI, exp:MEAN, lognormal:MEDIAN,SIGMA (seconds)')
+    parser.add_argument('--ramp', type=float, default=0.0, help='Spread the connections over this many seconds')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to measure for once every bot is connected')
+    parser.add_argument('--port', type=int, default=None, help='Use a --ladder server already running on this localhost port')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Metrics port of that server')
+    parser.add_argument('--server-pid', type=int, default=None, help='Pid of that server, for cpu')
+    parser.add_argument('--connect-timeout', type=float, default=60.0, help='Seconds to wait for all bots to connect')
+    parser.add_argument('--json', type=str, default=None, help='Also write the report to this file')
+    args = parser.parse_args()
+
+    # the bots print their results to stdout, keep the report readable
+    setup_logging("warning", {"swarm": "info"}, stream=sys.stderr)
+    report = asyncio.run(run_swarm(
+        args.game, args.clients, args.processes, args.think, args.ramp, args.port, args.metrics_port,
+        args.server_pid, args.connect_timeout, args.duration,
+    ))
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+buffered message transport for server connections.
+
+every json message used to be written and drained on its own, one syscall and one
+scheduler hop per message. MessageTransport collects the messages of a round and
+writes them in a single call when the engine flushes, and only waits on drain()
+when the socket's write buffer is above the high-water mark, so a slow client no
+longer stalls the fast ones.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List
+
+
+DEFAULT_HIGH_WATER = 64 * 1024
+
+# messages kept for replay while a resumable connection is down
+DEFAULT_MAX_BACKLOG = 2000
+
+
+class MessageTransport:
+    """buffers outgoing newline-delimited json messages for one connection."""
+
+    def __init__(self, writer: asyncio.StreamWriter, high_water: int = DEFAULT_HIGH_WATER,
+                 max_backlog: int = DEFAULT_MAX_BACKLOG, metrics=None):
+        self.writer = writer
+        self.metrics = metrics  # optional ServerMetrics, told about every flush
+        self.high_water = high_water
+        self.max_backlog = max_backlog
+        self._buffer: List[bytes] = []
+        self._buffered_bytes = 0
+
+        # counters for monitoring
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.flushes = 0
+        self.messages_dropped = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """number of messages waiting for the next flush."""
+        return len(self._buffer)
+
+    @property
+    def buffered_bytes(self) -> int:
+        """bytes waiting for the next flush."""
+        return self._buffered_bytes
+
+    @property
+    def write_buffer_size(self) -> int:
+        """bytes written to the socket transport but not yet sent by the kernel."""
+        if self.is_closing:
+            return 0
+        return self.writer.transport.get_write_buffer_size()
+
+    def queue(self, message: Dict[str, Any]) -> bool:
+        """
+        queue a message for the next flush.
+
+        returns True once the buffer is above the high-water mark and should be flushed.
+        """
+        return self.queue_encoded(json.dumps(message).encode() + b'\n')
+
+    def queue_encoded(self, data: bytes) -> bool:
+        """queue an already encoded message (json plus newline), e.g. one payload shared by a broadcast."""
+        self._buffer.append(data)
+        self._buffered_bytes += len(data)
+        return self._buffered_bytes >= self.high_water
+
+    async def send(self, message: Dict[str, Any]):
+        """queue a message, flushing early only if the buffer grew past the high-water mark."""
+        if self.queue(message):
+            await self.flush()
+
+    async def send_now(self, message: Dict[str, Any]):
+        """queue a message and flush everything pending."""
+        self.queue(message)
+        await self.flush()
+
+    @property
+    def is_closing(self) -> bool:
+        """True once the connection is closed or being closed."""
+        transport = self.writer.transport
+        return transport is None or transport.is_closing()
+
+    def attach(self, writer: asyncio.StreamWriter):
+        """switch to a new connection, the next flush replays whatever is still queued."""
+        self.writer = writer
+
+    async def flush(self, drain: bool = False):
+        """
+        write all pending messages in one call, respecting backpressure above the high-water mark.
+
+        with drain=True always wait until the socket has taken everything, callers put a deadline on it.
+        """
+        if self.is_closing:
+            # peer is gone, keep the newest messages in case the session is resumed on a new connection
+            overflow = len(self._buffer) - self.max_backlog
+            if overflow > 0:
+                self.messages_dropped += overflow
+                del self._buffer[:overflow]
+                self._buffered_bytes = sum(len(data) for data in self._buffer)
+            return
+
+        if self._buffer:
+            data = self._buffer[0] if len(self._buffer) == 1 else b"".join(self._buffer)
+            messages = len(self._buffer)
+            self.messages_sent += messages
+            self.bytes_sent += len(data)
+            self.flushes += 1
+            self._buffer.clear()
+            self._buffered_bytes = 0
+            self.writer.write(data)
+            if self.metrics is not None:
+                self.metrics.record_sent(messages, len(data))
+
+        if drain or self.write_buffer_size > self.high_water:
+            await self.writer.drain()
+
+    def stats(self) -> Dict[str, int]:
+        """per-connection queue depth and traffic counters."""
+        return {
+            "queued_messages": self.queue_depth,
+            "buffered_bytes": self.buffered_bytes,
+            "write_buffer_size": self.write_buffer_size,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "flushes": self.flushes,
+            "messages_dropped": self.messages_dropped,
+        }
+
+
+
+class TaggedTransport:
+    """
+    one logical player's view of a multiplexed connection.
+
+    several players can share a connection (see MultiplexedClient). their messages all
+    go through the connection's MessageTransport, each tagged with the player id so the
+    client can route it. everything else (flushing, backlog, stats) is the shared
+    transport's.
+    """
+
+    def __init__(self, shared: MessageTransport, tag: str):
+        self.shared = shared
+        self.tag = tag
+        self._suffix = b',"player":' + json.dumps(tag).encode() + b'}\n'
+
+    def queue(self, message: Dict[str, Any]) -> bool:
+        return self.queue_encoded(json.dumps(message).encode() + b'\n')
+
+    def queue_encoded(self, data: bytes) -> bool:
+        # add the tag to the encoded object, so a broadcast is still encoded only once
+        if data[-3:-2] == b'{':
+            tagged = data[:-2] + self._suffix[1:]
+        else:
+            tagged = data[:-2] + self._suffix
+        return self.shared.queue_encoded(tagged)
+
+    async def send(self, message: Dict[str, Any]):
+        if self.queue(message):
+            await self.shared.flush()
+
+    async def send_now(self, message: Dict[str, Any]):
+        self.queue(message)
+        await self.shared.flush()
+
+    async def flush(self, drain: bool = False):
+        await self.shared.flush(drain)
+
+    def attach(self, writer: asyncio.StreamWriter):
+        self.shared.attach(writer)
+
+    @property
+    def is_closing(self) -> bool:
+        return self.shared.is_closing
+
+    def __getattr__(self, name):
+        # queue_depth, write_buffer_size, stats(), counters, ...
+        return getattr(self.shared, name)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+helpers for the tests that run an AGTServer on localhost and talk to it over raw sockets.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from server import AGTServer
+
+
+async def start_server(config, heartbeat: bool = False):
+    """serve config on a free localhost port, returns (server, listener, port)."""
+    server = AGTServer(config, "127.0.0.1", 0)
+    listener = await asyncio.start_server(server.handle_new_client_connection, "127.0.0.1", 0)
+    if heartbeat:
+        server.start_heartbeat()
+    return server, listener, listener.sockets[0].getsockname()[1]
+
+
+def client_info(name: str, device_id=None, **extra) -> bytes:
+    """the provide_client_info line of an rps player, the device id defaults to the name."""
+    return json.dumps({
+        "message": "provide_client_info",
+        "device_id": device_id or name,
+        "player_name": name,
+        "game_type": "rps",
+        **extra,
+    }).encode() + b"\n"
+
+
+async def handshake(port: int, name: str, device_id=None, limit: int = 2 ** 16, **extra):
+    """connect and answer request_client_info, returns (reader, writer) before the server replies."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=limit)
+    await reader.readline()  # request_client_info
+    writer.write(client_info(name, device_id, **extra))
+    await writer.drain()
+    return reader, writer
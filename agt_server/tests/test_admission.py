@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+tests for admission control in the server: handshake deadlines, the max_players
+wait queue and unique name assignment.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from server import AGTServer
+from tests.server_helpers import handshake, start_server
+
+
+ADMISSION_CONFIG = {
+    "game_title": "rps",
+    "max_players": 1,
+    "handshake_timeout": 0.3,
+    "heartbeat_interval": 0.1,
+    "heartbeat_timeout": 5.0,
+    "session_grace": 0,
+}
+
+
+async def _next_message(reader):
+    return json.loads(await asyncio.wait_for(reader.readline(), timeout=2.0))
+
+
+def test_silent_handshake_times_out(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(ADMISSION_CONFIG)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await reader.readline()  # request_client_info, never answered
+
+        # the server gives up and closes the connection well before the old 300s
+        assert await asyncio.wait_for(reader.read(), timeout=2.0) == b""
+        assert not server.players
+
+        writer.close()
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_full_lobby_queues_until_a_seat_frees(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(ADMISSION_CONFIG)
+        first_reader, first_writer = await handshake(port, "first")
+        assert (await _next_message(first_reader))["message"] == "connection_established"
+
+        second_reader, second_writer = await handshake(port, "second")
+        third_reader, third_writer = await handshake(port, "third")
+        queued = await _next_message(second_reader)
+        assert queued["message"] == "queued" and queued["position"] == 1
+        queued = await _next_message(third_reader)
+        assert queued["message"] == "queued" and queued["position"] == 2
+        assert list(server.players) == ["first"]
+
+        # first player leaves, the oldest queued connection takes the seat
+        await server.evict_player(server.players["first"], "test")
+        message = await _next_message(second_reader)
+        while message["message"] == "queued":
+            message = await _next_message(second_reader)
+        assert message["message"] == "connection_established"
+        assert message["assigned_name"] == "second"
+
+        message = await _next_message(third_reader)
+        while message["message"] == "queued" and message["position"] != 1:
+            message = await _next_message(third_reader)
+        assert message["position"] == 1
+        assert list(server.players) == ["second"]
+
+        for writer in (first_writer, second_writer, third_writer):
+            writer.close()
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_unique_names(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = AGTServer({"game_title": "rps"}, "127.0.0.1", 0)
+
+    names = []
+    for _ in range(4):
+        name = server._unique_name("bot")
+        names.append(name)
+        server.players[name] = object()
+
+    assert names == ["bot", "bot_1", "bot_2", "bot_3"]
+
+    # freed names are reused for the base name, suffixes keep counting up
+    del server.players["bot"]
+    assert server._unique_name("bot") == "bot"
+    assert server._unique_name("bot_1") == "bot_1_1"
+
+
+class _QueueWriter:
+    """stands in for a queued connection's writer, the server only sends it positions."""
+    transport = type("Transport", (), {"get_write_buffer_size": staticmethod(lambda: 0)})()
+
+    def write(self, data):
+        pass
+
+
+class _IdleReader:
+    async def readline(self):
+        await asyncio.Event().wait()
+
+
+class _SeatFreedOnCancelReader(_IdleReader):
+    """a client giving up at the very moment the lobby frees a seat for it."""
+
+    def __init__(self, server):
+        self.server = server
+
+    async def readline(self):
+        try:
+            await super().readline()
+        except asyncio.CancelledError:
+            del self.server.players["first"]
+            await self.server._admit_waiting()
+            raise
+
+
+def test_seat_freed_while_giving_up_goes_to_the_next_in_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server = AGTServer(ADMISSION_CONFIG, "127.0.0.1", 0)
+        server.players["first"] = object()
+        leaving = asyncio.ensure_future(server._wait_for_seat(_SeatFreedOnCancelReader(server), _QueueWriter()))
+        waiting = asyncio.ensure_future(server._wait_for_seat(_IdleReader(), _QueueWriter()))
+        await asyncio.sleep(0.05)
+        assert len(server.wait_queue) == 2
+
+        leaving.cancel()
+        assert await asyncio.wait_for(waiting, timeout=2.0)
+        assert leaving.cancelled()
+        assert server._reserved_seats == 1 and not server.wait_queue
+
+    asyncio.run(run())
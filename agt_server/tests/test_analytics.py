@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+tests for the exact matrix game payoffs.
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.analytics import (expected_payoff, markov_payoff, population_payoffs, joint_chain,
+                            long_run_distribution, mixed_strategy)
+from core.engine import Engine
+from core.policy import TablePolicy
+from core.game.BOSGame import BOSGame
+from core.game.BOSIIGame import BOSIIGame
+from core.game.PDGame import PDGame
+from core.game.RPSGame import RPSGame
+
+BOS = [[0, 1], [0, 1]]
+PUNITIVE = TablePolicy.from_spec({
+    "initial": "stubborn",
+    "states": {
+        "stubborn": {"action": 1, "next": {"1": "compromise_1"}},
+        "compromise_1": {"action": 0, "next": {"1": "compromise_2", "0": "stubborn"}},
+        "compromise_2": {"action": 0, "next": {"1": "punish", "0": "stubborn"}},
+        "punish": {"action": 1},
+    },
+}, BOS)
+TIT_FOR_TAT = TablePolicy.from_spec({"states": {"c": {"action": 0, "next": {"1": "d"}},
+                                                "d": {"action": 1, "next": {"0": "c"}}}}, BOS)
+ALTERNATE = TablePolicy.from_spec({"states": {"a": {"action": 0, "next": {"*": "b"}},
+                                              "b": {"action": 1, "next": {"*": "a"}}}}, BOS)
+NOISY = TablePolicy.from_spec({"states": {"calm": {"action": {"0": 0.8, "1": 0.2}, "next": {"1": "angry"}},
+                                          "angry": {"action": 1, "next": {"0": "calm"}}}}, BOS)
+
+
+def test_stationary_strategies():
+    uniform = [1 / 3, 1 / 3, 1 / 3]
+    for strategy in (0, {1: 1.0}, {"0": 0.5, "2": 0.5}, [0.2, 0.3, 0.5]):
+        assert expected_payoff(RPSGame(), strategy, uniform) == pytest.approx((0.0, 0.0))
+    assert expected_payoff(RPSGame(), 1, 0) == (1.0, -1.0)
+    # bos: x compromise against y compromise
+    x, y = 0.3, 0.6
+    r0, r1 = expected_payoff(BOSGame(), [x, 1 - x], [y, 1 - y])
+    assert r0 == pytest.approx(3 * x * (1 - y) + 7 * (1 - x) * y)
+    assert r1 == pytest.approx(7 * x * (1 - y) + 3 * (1 - x) * y)
+
+
+def test_bosii_averages_over_moods():
+    game = BOSIIGame()
+    assert expected_payoff(game, 1, 1) == pytest.approx((0.0, 7 / 3))
+    # a column player who compromises in a good mood and goes stubborn in a bad one
+    assert expected_payoff(game, 1, [{0: 1.0}, {1: 1.0}]) == pytest.approx((2 / 3 * 7, 2 / 3 * 3 + 1 / 3 * 7))
+
+
+@pytest.mark.parametrize("strategy", [3, -1, {0: 0.5}, [0.5, 0.6, -0.1], [0.5, 0.5]])
+def test_invalid_strategies(strategy):
+    with pytest.raises(ValueError):
+        mixed_strategy(strategy, 3)
+
+
+@pytest.mark.parametrize("game_class", [BOSGame, PDGame])
+@pytest.mark.parametrize("row, col", [(PUNITIVE, ALTERNATE), (PUNITIVE, TIT_FOR_TAT), (TIT_FOR_TAT, ALTERNATE), (ALTERNATE, 1)])
+def test_deterministic_markov_matches_the_engine(game_class, row, col):
+    opponent = col if isinstance(col, TablePolicy) else TablePolicy.from_spec({"action": col}, BOS)
+    rewards = Engine(game_class(rounds=500), [row.agent("row"), opponent.agent("col")], rounds=500).run(500)
+    assert markov_payoff(game_class(), row, col, rounds=500) == pytest.approx(tuple(rewards))
+
+
+def test_random_markov_matches_simulation():
+    rounds, games = 50, 400
+    expected = markov_payoff(BOSGame(), NOISY, PUNITIVE, rounds=rounds)
+    totals = np.zeros(2)
+    for seed in range(games):
+        agents = [NOISY.agent("noisy"), PUNITIVE.agent("punitive")]
+        agents[0].rng = random.Random(seed)
+        totals += Engine(BOSGame(rounds=rounds), agents, rounds=rounds).run(rounds)
+    assert totals / games == pytest.approx(expected, rel=0.05)
+
+
+def test_long_run_payoffs():
+    # alternating against a stubborn opponent: half the rounds compromise (3), half clash (0)
+    assert markov_payoff(BOSGame(), ALTERNATE, 1) == pytest.approx((1.5, 3.5))
+    # punitive never forgives a coin flipper: always stubborn against a fair coin
+    assert markov_payoff(BOSGame(), PUNITIVE, {0: 0.5, 1: 0.5}) == pytest.approx((3.5, 1.5))
+    # long run matches the average over a long game
+    assert markov_payoff(BOSGame(), NOISY, TIT_FOR_TAT) == (0.0, 0.0)  # both end up stubborn for good
+    total = markov_payoff(BOSGame(), NOISY, ALTERNATE, rounds=20000)
+    assert markov_payoff(BOSGame(), NOISY, ALTERNATE) == pytest.approx(np.array(total) / 20000, rel=1e-2)
+
+
+def test_long_run_distribution_of_a_reducible_chain():
+    # 0 -> 1 or 2 evenly, 1 is absorbing, 2 <-> 3 alternate
+    transitions = np.array([[0, 0.5, 0.5, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]], dtype=float)
+    assert long_run_distribution(transitions, 0) == pytest.approx([0, 0.5, 0.25, 0.25])
+    assert long_run_distribution(transitions, 2) == pytest.approx([0, 0, 0.5, 0.5])
+
+
+def test_joint_chain_rows_are_distributions():
+    transitions, rewards, start = joint_chain(BOSIIGame(), NOISY, PUNITIVE)
+    assert transitions.shape == (8, 8) and rewards.shape == (8, 2)
+    assert transitions.sum(axis=1) == pytest.approx(np.ones(8))
+    assert start == 0
+
+
+def test_population_payoffs():
+    strategies = [0, 1, 2, [1 / 3, 1 / 3, 1 / 3]]
+    table = population_payoffs(RPSGame(), strategies)
+    assert table.shape == (4, 4, 2)
+    assert table[1, 0] == pytest.approx([1, -1]) and table[3].sum() == pytest.approx(0)
+    assert table[..., 0] == pytest.approx(-table[..., 0].T)
+
+    rng = np.random.default_rng(1)
+    rows, cols = rng.dirichlet(np.ones(2), 50), rng.dirichlet(np.ones(2), 30)
+    table = population_payoffs(BOSGame(), list(rows), list(cols), rounds=10)
+    assert table[7, 11] == pytest.approx(np.array(expected_payoff(BOSGame(), rows[7], cols[11])) * 10)
+
+    # markov strategies go pair by pair
+    table = population_payoffs(BOSGame(), [PUNITIVE, ALTERNATE], [1, TIT_FOR_TAT], rounds=100)
+    assert table[0, 1] == pytest.approx(markov_payoff(BOSGame(), PUNITIVE, TIT_FOR_TAT, rounds=100))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+tests for concurrent broadcasts with per-client deadlines.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from tests.server_helpers import client_info, handshake, start_server
+
+
+BROADCAST_CONFIG = {
+    "game_title": "rps",
+    "broadcast_timeout": 0.5,
+    "session_grace": 0,
+}
+
+
+async def _join(port: int, name: str):
+    reader, writer = await handshake(port, name, limit=16 * 1024 * 1024)
+    await reader.readline()  # connection_established
+    await reader.readline()  # waiting_for_tournament
+    return reader, writer
+
+
+async def _join_stalled(port: int, name: str) -> socket.socket:
+    """handshake on a raw socket with a tiny receive buffer, then never read again."""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await loop.sock_connect(sock, ("127.0.0.1", port))
+    await loop.sock_recv(sock, 4096)  # request_client_info
+    await loop.sock_sendall(sock, client_info(name))
+    return sock
+
+
+def test_stalled_client_does_not_delay_others(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(BROADCAST_CONFIG)
+        # the stalled client never reads, so a big payload fills its socket buffers
+        stalled = await _join_stalled(port, "stalled")
+        fast_reader, fast_writer = await _join(port, "fast")
+        await asyncio.sleep(0.05)
+
+        results = {"tournament_results": [], "padding": "x" * (8 * 1024 * 1024)}
+        fast_got = asyncio.create_task(fast_reader.readline())
+        start = time.monotonic()
+        dropped = await server.broadcast(list(server.players.values()),
+                                         {"message": "tournament_complete", "results": results})
+
+        message = json.loads(await asyncio.wait_for(fast_got, timeout=5.0))
+        assert message["message"] == "tournament_complete"
+        assert [player.name for player in dropped] == ["stalled"]
+        assert "stalled" not in server.players and "fast" in server.players
+        assert time.monotonic() - start < 3.0
+
+        stalled.close()
+        fast_writer.close()
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_broadcast_encodes_once_and_keeps_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(BROADCAST_CONFIG)
+        connections = [await _join(port, f"p{i}") for i in range(3)]
+        readers = [reader for reader, _ in connections]
+        await asyncio.sleep(0.05)
+
+        # something already queued for a player goes out before the broadcast
+        server.players["p0"].transport.queue({"message": "round_result", "round": 1})
+        queued = []
+        for player in server.players.values():
+            original = player.transport.queue_encoded
+            player.transport.queue_encoded = lambda data, original=original: queued.append(data) or original(data)
+
+        dropped = await server.broadcast(list(server.players.values()), {"message": "tournament_error", "error": "x"})
+        assert dropped == []
+        assert len(queued) == 3 and all(data is queued[0] for data in queued)
+
+        assert json.loads(await readers[0].readline())["message"] == "round_result"
+        for reader in readers:
+            assert json.loads(await reader.readline())["message"] == "tournament_error"
+
+        listener.close()
+
+    asyncio.run(run())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+tests for running client agent callbacks off the event loop.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from server import AGTServer
+from client import AGTClient
+from core.engine import Engine
+from core.game.RPSGame import RPSGame
+from core.agents.lab01.random_agent import RandomAgent
+
+
+class SlowAgent(RandomAgent):
+    """thinks for longer than the heartbeat timeout, without yielding."""
+
+    def get_action(self, obs=None):
+        time.sleep(0.7)
+        return super().get_action(obs)
+
+
+class CountingAgent(RandomAgent):
+    def __init__(self, name):
+        super().__init__(name)
+        self.calls = 0
+
+    def get_action(self, obs=None):
+        self.calls += 1
+        return os.getpid(), self.calls
+
+
+def _run_clients_in_thread(agents, port, offload):
+    """the clients get their own event loop, so a blocking agent can't stall the server's."""
+    clients = []
+
+    async def play():
+        for agent in agents:
+            agent.game_title = "rps"
+            client = AGTClient(agent, "127.0.0.1", port, offload=offload)
+            await client.connect()
+            clients.append(client)
+        await asyncio.gather(*(client.run() for client in clients))
+
+    thread = threading.Thread(target=asyncio.run, args=(play(),), daemon=True)
+    thread.start()
+    return thread, clients
+
+
+async def _play_with_slow_agent(offload):
+    server = AGTServer({"game_title": "rps", "heartbeat_interval": 0.1, "heartbeat_timeout": 0.5,
+                        "session_grace": 0}, "127.0.0.1", 0)
+    listener = await asyncio.start_server(server.handle_new_client_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    server.start_heartbeat()
+
+    thread, clients = _run_clients_in_thread([SlowAgent("slow"), RandomAgent("fast")], port, offload)
+    for _ in range(50):
+        if len(server.players) == 2:
+            break
+        await asyncio.sleep(0.05)
+
+    players = [server.players["slow"], server.players["fast"]]
+    engine = Engine(RPSGame(rounds=2), players, rounds=2, game_title="rps", metrics=server.metrics)
+    await engine.run_async(2)
+
+    for client in clients:
+        client.should_exit = True
+    alive = players[0].alive
+    for player in players:
+        await server.evict_player(player, "test over")
+    listener.close()
+    await asyncio.get_running_loop().run_in_executor(None, thread.join, 5)
+    return server, players, engine, alive
+
+
+def test_slow_agent_keeps_answering_heartbeats(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server, players, engine, alive = asyncio.run(_play_with_slow_agent("thread"))
+
+    # the slow player answered every ping while its agent was busy and wasn't evicted
+    assert alive and not engine.forfeited
+    assert server.metrics.action_timeouts.get(game="rps") == 0
+    # and the server can tell the thinking apart from the network
+    assert server.metrics.decision_time.count(game="rps") == 4
+    assert server.metrics.network_time.count(game="rps") == 4
+    assert players[0].decision_time >= 0.7
+    assert players[0].client_time >= players[0].decision_time
+
+
+def test_blocking_agent_on_the_event_loop_gets_evicted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server, players, engine, alive = asyncio.run(_play_with_slow_agent("none"))
+    assert not alive
+    assert 0 in engine.forfeited  # the blocked loop starves the other client on it too
+
+
+def test_process_offload_keeps_agent_state_in_the_worker():
+    async def run():
+        client = AGTClient(CountingAgent("counter"), offload="process")
+        try:
+            first_pid, first = await client.call_agent("get_action", {})
+            second_pid, second = await client.call_agent("get_action", {})
+        finally:
+            client.close_executor()
+        assert first_pid == second_pid != os.getpid()
+        assert (first, second) == (1, 2)
+
+    asyncio.run(run())
+
+
+def test_unknown_offload_mode():
+    with pytest.raises(ValueError):
+        AGTClient(RandomAgent("x"), offload="gpu")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+tests for cycle-detection fast-forward.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.engine import Engine
+from core.policy import TablePolicy
+from core.game.BOSGame import BOSGame
+from core.game.PDGame import PDGame
+from core.game.RPSGame import RPSGame
+
+BOS = [[0, 1], [0, 1]]
+RPS = [[0, 1, 2], [0, 1, 2]]
+
+PUNITIVE = {
+    "initial": "stubborn",
+    "states": {
+        "stubborn": {"action": 1, "next": {"1": "compromise_1"}},
+        "compromise_1": {"action": 0, "next": {"1": "compromise_2", "0": "stubborn"}},
+        "compromise_2": {"action": 0, "next": {"1": "punish", "0": "stubborn"}},
+        "punish": {"action": 1},
+    },
+}
+TIT_FOR_TAT = {"states": {"c": {"action": 0, "next": {"1": "d"}}, "d": {"action": 1, "next": {"0": "c"}}}}
+ALTERNATE = {"states": {"a": {"action": 0, "next": {"*": "b"}}, "b": {"action": 1, "next": {"*": "a"}}}}
+CYCLE_RPS = {"states": {"r": {"action": 0, "next": {"*": "p"}}, "p": {"action": 1, "next": {"*": "s"}},
+                        "s": {"action": 2, "next": {"*": "r"}}}}
+
+
+def play(game_class, specs, actions, rounds, fast_forward, run_async=False):
+    agents = [TablePolicy.from_spec(spec, actions).agent(f"p{i}") for i, spec in enumerate(specs)]
+    game = game_class(rounds=rounds)
+    engine = Engine(game, agents, rounds=rounds, fast_forward=fast_forward)
+    if run_async:
+        rewards = asyncio.run(engine.run_async(rounds))
+    else:
+        rewards = engine.run(rounds)
+    return engine, game, rewards
+
+
+@pytest.mark.parametrize("game_class, specs, actions", [
+    (BOSGame, [PUNITIVE, ALTERNATE], BOS),
+    (BOSGame, [PUNITIVE, TIT_FOR_TAT], BOS),
+    (PDGame, [TIT_FOR_TAT, ALTERNATE], BOS),
+    (RPSGame, [CYCLE_RPS, {"action": 1}], RPS),
+])
+@pytest.mark.parametrize("rounds", [1, 2, 7, 1000])
+def test_fast_forward_matches_playing_every_round(game_class, specs, actions, rounds):
+    slow, slow_game, slow_rewards = play(game_class, specs, actions, rounds, fast_forward=False)
+    fast, fast_game, fast_rewards = play(game_class, specs, actions, rounds, fast_forward=True)
+    assert fast_rewards == pytest.approx(slow_rewards)
+    assert fast_game.cumulative_rewards == pytest.approx(slow_game.cumulative_rewards)
+    assert fast_game.t == slow_game.t == rounds
+    if rounds == 1000:
+        assert fast.cycles.skip is not None
+        assert len(fast.agents[0].reward_history) < 20  # the skipped rounds never reached the agents
+
+    # the skipped rounds can still be replayed from the cycle
+    history = list(fast.round_history())
+    assert [r for r, _, _ in history] == list(range(rounds))
+    assert sum(rewards[0] for _, _, rewards in history) == pytest.approx(fast_rewards[0])
+
+
+def test_round_history_matches_the_played_rounds():
+    fast, _, _ = play(BOSGame, [PUNITIVE, ALTERNATE], BOS, 100, fast_forward=True)
+    agents = [TablePolicy.from_spec(spec, BOS).agent(f"p{i}") for i, spec in enumerate([PUNITIVE, ALTERNATE])]
+    game = BOSGame(rounds=100)
+    game.reset()
+    for agent in agents:
+        agent.reset()
+    expected = []
+    for round_num in range(100):
+        actions = {i: agent.get_action() for i, agent in enumerate(agents)}
+        _, rewards, _, _ = game.step(actions)
+        for i, agent in enumerate(agents):
+            agent.observe_actions(i, actions)
+        expected.append((round_num, actions, rewards))
+    assert list(fast.round_history()) == expected
+
+
+def test_async_runs_fast_forward_too():
+    fast, _, rewards = play(BOSGame, [PUNITIVE, TIT_FOR_TAT], BOS, 1000, fast_forward=True, run_async=True)
+    _, _, expected = play(BOSGame, [PUNITIVE, TIT_FOR_TAT], BOS, 1000, fast_forward=False, run_async=True)
+    assert fast.cycles.skip is not None
+    assert rewards == pytest.approx(expected)
+
+
+def test_random_states_are_never_skipped():
+    fast, game, _ = play(RPSGame, [{"action": {"0": 0.5, "1": 0.5}}, {"action": 2}], RPS, 200, fast_forward=True)
+    assert fast.cycles.skip is None and len(list(fast.round_history())) == 200
+    assert len(fast.agents[0].reward_history) == 200
+
+    # detection picks up again once the random part is over
+    settles = {"states": {"coin": {"action": {"0": 0.5, "1": 0.5}, "next": {"*": "rock"}}, "rock": {"action": 0}}}
+    fast, _, rewards = play(RPSGame, [settles, {"action": 2}], RPS, 200, fast_forward=True)
+    assert fast.cycles.skip is not None and fast.cycles.skip[1] >= 1
+    assert sum(r[0] for _, _, r in fast.round_history()) == pytest.approx(rewards[0])
+
+
+def test_off_by_default_and_without_declared_state():
+    engine, _, _ = play(RPSGame, [{"action": 0}, {"action": 1}], RPS, 50, fast_forward=False)
+    assert engine.cycles is None
+    with pytest.raises(RuntimeError):
+        engine.round_history()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+tests for heartbeats and dead-peer eviction in the server.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from client import AGTClient
+from core.agents.lab01.random_agent import RandomAgent
+from tests.server_helpers import handshake, start_server
+
+
+HEARTBEAT_CONFIG = {
+    "game_title": "rps",
+    "heartbeat_interval": 0.1,
+    "heartbeat_timeout": 0.5,
+    "session_grace": 0,  # evict straight away instead of holding the session open
+}
+
+
+async def _silent_client(port: int, name: str, heartbeat: bool = True):
+    """do the handshake by hand, then never answer again."""
+    reader, writer = await handshake(port, name, **({"heartbeat": True} if heartbeat else {}))
+    await reader.readline()  # connection_established
+    return reader, writer
+
+
+def test_silent_player_is_evicted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(HEARTBEAT_CONFIG, heartbeat=True)
+        reader, writer = await _silent_client(port, "sleepy")
+        await asyncio.sleep(0.05)
+        assert "sleepy" in server.players
+        player = server.players["sleepy"]
+
+        await asyncio.sleep(1.0)
+        assert "sleepy" not in server.players
+        assert not player.alive
+
+        # the silent client still got pinged before it was dropped
+        data = await reader.read()
+        assert b'"ping"' in data
+
+        writer.close()
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_clients_without_heartbeats_are_not_evicted_for_silence(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(HEARTBEAT_CONFIG, heartbeat=True)
+        # an older client, it never said it answers pings
+        reader, writer = await _silent_client(port, "old", heartbeat=False)
+        await asyncio.sleep(1.0)
+        player = server.players["old"]
+        assert player.alive
+        assert player.last_ping == 0.0  # nor is it pinged
+
+        # a closed connection still takes it out
+        writer.close()
+        await asyncio.sleep(0.1)
+        assert "old" not in server.players
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_responsive_player_survives(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(HEARTBEAT_CONFIG, heartbeat=True)
+        agent = RandomAgent("awake")
+        agent.game_title = "rps"
+        client = AGTClient(agent, "127.0.0.1", port)
+        await client.connect()
+        run_task = asyncio.create_task(client.run())
+
+        await asyncio.sleep(1.0)
+        assert "awake" in server.players
+
+        client.should_exit = True
+        run_task.cancel()
+        await client.disconnect()
+        listener.close()
+
+    asyncio.run(run())
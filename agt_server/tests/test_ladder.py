@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+tests for ladder mode: elo ratings, matchmaking and continuous games on the server.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from server import AGTServer
+from client import AGTClient
+from ladder import Ladder, DEFAULT_RATING
+from core.agents.lab01.random_agent import RandomAgent
+
+
+def test_ratings_move_towards_the_winner():
+    ladder = Ladder(2)
+    changes = ladder.record_game(["alice", "bob"], [10.0, -10.0])
+    assert changes["alice"] > 0 > changes["bob"]
+    assert abs(changes["alice"] + changes["bob"]) < 1e-9
+    assert ladder.entry("alice").wins == 1 and ladder.entry("bob").losses == 1
+
+    # a draw between equal ratings changes nothing
+    ladder.record_game(["carol", "dave"], [3.0, 3.0])
+    assert ladder.entry("carol").rating == DEFAULT_RATING
+    assert ladder.entry("carol").ties == 1
+
+    # beating a stronger player is worth more than beating a weaker one
+    upset = Ladder(2).expected_score(1400, 1600)
+    assert upset < 0.5
+
+
+def test_forfeit_loses_to_everyone():
+    ladder = Ladder(3)
+    changes = ladder.record_game(["a", "b", "c"], [5.0, 1.0, 0.0], forfeited={0})
+    assert changes["a"] < 0
+    assert ladder.entry("a").forfeits == 1
+    assert ladder.entry("a").games == 0  # doesn't count towards the score
+    assert ladder.entry("b").wins == 1 and ladder.entry("c").losses == 1
+
+
+def test_matchmaking_prefers_close_ratings_and_new_opponents():
+    ladder = Ladder(2)
+    for name, rating in [("low", 1200), ("mid", 1500), ("high", 1800), ("mid2", 1520)]:
+        ladder.entry(name).rating = rating
+        ladder.mark_idle(name)
+        time.sleep(0.001)
+
+    assert ladder.pick_match(["low"]) is None
+    # low waited longest, so it anchors; mid is the closest rating
+    assert ladder.pick_match(["low", "mid", "high", "mid2"]) == ["low", "mid"]
+
+    # mid and mid2 just played each other, so mid2 goes for the next closest instead
+    ladder.record_game(["mid", "mid2"], [1.0, 0.0])
+    ladder.mark_idle("mid2")
+    assert ladder.pick_match(["mid", "mid2", "high"])[0] == "mid"
+    assert ladder.pick_match(["mid", "mid2", "high"]) == ["mid", "high"]
+
+    board = ladder.leaderboard()
+    assert [entry["rank"] for entry in board] == [1, 2, 3, 4]
+    assert board[0]["agent"] == "high"
+    assert ladder.rank("high") == 1
+
+
+def test_ladder_server_keeps_players_busy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server = AGTServer({"game_title": "rps", "mode": "ladder"}, "127.0.0.1", 0)
+        server.game_config["num_rounds"] = 2
+        listener = await asyncio.start_server(server.handle_new_client_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        server.start_ladder()
+
+        updates = []
+        clients, tasks = [], []
+        for i in range(4):
+            agent = RandomAgent(f"bot{i}")
+            agent.game_title = "rps"
+            client = AGTClient(agent, "127.0.0.1", port)
+
+            async def handle(message, client=client, original=client.handle_message):
+                if message.get("message") == "ladder_update":
+                    updates.append(message)
+                return await original(message)
+
+            client.handle_message = handle
+            await client.connect()
+            clients.append(client)
+            tasks.append(asyncio.create_task(client.run()))
+
+        for _ in range(200):
+            if server.ladder.games_played >= 6:
+                break
+            await asyncio.sleep(0.05)
+        assert server.ladder.games_played >= 6
+
+        # every player has played, with their finished games rated
+        board = server.ladder.leaderboard()
+        assert len(board) == 4
+        assert all(entry["games"] > 0 for entry in board)
+        assert len(server.in_game) <= 4
+        assert updates and {"rating", "rank", "leaderboard"} <= set(updates[0])
+
+        for client in clients:
+            client.should_exit = True
+        for task in tasks:
+            task.cancel()
+        for client in clients:
+            await client.disconnect()
+        listener.close()
+
+        server.save_results()
+        assert any(name.startswith("agt_ladder_rps_") for name in os.listdir("results"))
+
+    asyncio.run(run())
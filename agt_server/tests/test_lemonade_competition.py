@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+tests for playing lemonade competitions on a pool of worker processes.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server', 'lemonade_server'))
+
+from lemonade_competition import LemonadeCompetition
+
+RANDOM_AGENT = '''
+import random
+import numpy as np
+from core.agents.common.base_agent import BaseAgent
+
+class Agent(BaseAgent):
+    def get_action(self, observation=None):
+        return (random.randrange(12) + int(np.random.randint(2))) % 12
+
+    def update(self, reward, info=None):
+        self.reward_history.append(reward)
+
+agent_submission = Agent("{name}")
+'''
+
+FIXED_AGENT = '''
+from core.agents.common.base_agent import BaseAgent
+
+class Agent(BaseAgent):
+    def get_action(self, observation=None):
+        return {position}
+
+    def update(self, reward, info=None):
+        pass
+
+agent_submission = Agent("{name}")
+'''
+
+
+@pytest.fixture
+def agents_dir(tmp_path):
+    for student in ("ann", "ben", "cat"):
+        (tmp_path / f"{student}_random_{student}.py").write_text(RANDOM_AGENT.format(name=student.title() + "Random"))
+    for student, position in (("dan", 0), ("eva", 6)):
+        (tmp_path / f"{student}_fixed_{student}.py").write_text(FIXED_AGENT.format(name=student.title() + "Fixed", position=position))
+    return str(tmp_path)
+
+
+def run(agents_dir, **kwargs):
+    competition = LemonadeCompetition(agents_dir)
+    results = competition.run_tournament(num_competitions=12, rounds_per_comp=30, **kwargs)
+    return competition, results
+
+
+def test_workers_reproduce_the_sequential_tournament(agents_dir):
+    sequential, expected = run(agents_dir, seed=3)
+    parallel, results = run(agents_dir, seed=3, workers=3)
+    assert results["scores"] == expected["scores"]
+    assert results["rankings"] == expected["rankings"]
+    assert results["metadata"] == expected["metadata"]
+
+    # every game is logged once, whatever order they finished in
+    logs = sorted(parallel.game_log, key=lambda info: info["game_number"])
+    assert [info["game_number"] for info in logs] == list(range(1, 13))
+    assert logs == sequential.game_log
+
+    _, other = run(agents_dir, seed=4, workers=3)
+    assert other["scores"] != expected["scores"]
+
+
+def test_unseeded_tournaments_record_their_seed(agents_dir):
+    _, results = run(agents_dir)
+    _, again = run(agents_dir, seed=results["metadata"]["seed"])
+    assert again["scores"] == results["scores"]
+
+
+def test_game_numbers_keep_counting(agents_dir):
+    competition = LemonadeCompetition(agents_dir)
+    competition.run_tournament(num_competitions=3, rounds_per_comp=5, seed=1)
+    competition.run_tournament(num_competitions=3, rounds_per_comp=5, seed=1, workers=2)
+    assert sorted(info["game_number"] for info in competition.game_log) == list(range(1, 7))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+tests for lemonade's precomputed payoff table and batch evaluation.
+"""
+
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.policy import action_space
+from core.game import LemonadeGame as lemonade
+from core.game.LemonadeGame import LemonadeGame, joint_utils, payoff_table
+
+
+def reference_utils(positions, num_positions):
+    # the rules one beachgoer at a time, as the game used to compute them
+    utils = [0.0] * len(positions)
+    for beachgoer in range(num_positions):
+        dists = [min((beachgoer - p) % num_positions, (p - beachgoer) % num_positions) for p in positions]
+        closest = [i for i, d in enumerate(dists) if d == min(dists)]
+        for i in closest:
+            utils[i] += 2.0 / len(closest)
+    return utils
+
+
+def test_table_matches_the_rules():
+    game = LemonadeGame()
+    for joint in itertools.product(range(12), repeat=3):
+        assert game.calculate_utils(list(joint)) == reference_utils(joint, 12)
+    assert game.calculate_utils([5, 5, 5]) == [8.0, 8.0, 8.0]
+    assert game.calculate_utils([0, 4, 8]) == [8.0, 8.0, 8.0]
+
+
+@pytest.mark.parametrize("num_players, num_positions", [(2, 6), (4, 8), (3, 7)])
+def test_other_sizes(num_players, num_positions):
+    table = payoff_table(num_players, num_positions)
+    assert table.shape == (num_positions,) * num_players + (num_players,)
+    for joint in itertools.product(range(num_positions), repeat=num_players):
+        assert list(table[joint]) == reference_utils(joint, num_positions)
+    # every beachgoer buys two cups from someone
+    assert np.allclose(table.sum(axis=-1), 2.0 * num_positions)
+
+
+def test_table_is_shared_and_read_only():
+    assert LemonadeGame().payoff_table is LemonadeGame(rounds=5).payoff_table is payoff_table()
+    with pytest.raises(ValueError):
+        payoff_table()[0, 0, 0, 0] = 1.0
+
+
+def test_invalid_actions_forfeit():
+    game = LemonadeGame()
+    assert game.calculate_utils([-1, 20, "x"]) == [0.0, 0.0, 0.0]
+    assert game.calculate_utils([None, 3, 12]) == [0.0, 24.0, 0.0]
+    assert game.calculate_utils([1, 2.5, 7]) == [12.0, 0.0, 12.0]
+    assert game.calculate_utils([1.0, np.int64(2), 7]) == game.calculate_utils([1, 2, 7])
+    with pytest.raises(ValueError):
+        game.calculate_utils([1, 2])
+
+
+def test_batch_matches_single_calls():
+    game = LemonadeGame()
+    rng = np.random.default_rng(0)
+    for actions in (rng.integers(0, 12, size=(500, 3)), rng.integers(-2, 14, size=(500, 3)),
+                    rng.integers(0, 24, size=(500, 3)) / 2):
+        utils = game.calculate_utils_batch(actions)
+        assert utils.shape == (500, 3)
+        for joint, row in zip(actions.tolist(), utils.tolist()):
+            assert row == game.calculate_utils(joint)
+    with pytest.raises(ValueError):
+        game.calculate_utils_batch([[1, 2]])
+
+
+def test_more_players():
+    game = LemonadeGame(rounds=20, num_players=4, num_positions=8)
+    assert action_space(game) == [list(range(8))] * 4
+    game.reset()
+    # evenly spread stands split the beach
+    _, rewards, done, _ = game.step({0: 0, 1: 2, 2: 4, 3: 6})
+    assert rewards == dict.fromkeys(range(4), 4.0) and not done
+    # 9 is off the beach, the others split all sixteen cups
+    assert game.step({0: 0, 1: 0, 2: 0, 3: 9})[1] == {0: 16 / 3, 1: 16 / 3, 2: 16 / 3, 3: 0.0}
+
+
+def test_games_over_the_table_limit_compute_utilities(monkeypatch):
+    # 8 ** 4 = 4096 joint positions, over a lowered limit the game plays without a table
+    monkeypatch.setattr(lemonade, "TABLE_LIMIT", 1000)
+    game = LemonadeGame(num_players=4, num_positions=8)
+    assert game.payoff_table is None
+    with pytest.raises(ValueError, match="limit"):
+        payoff_table(4, 8)
+    rng = np.random.default_rng(1)
+    actions = rng.integers(-1, 9, size=(300, 4))
+    utils = game.calculate_utils_batch(actions)
+    for joint, row in zip(actions.tolist(), utils.tolist()):
+        assert row == game.calculate_utils(joint)
+        if all(0 <= p < 8 for p in joint):
+            assert row == reference_utils(joint, 8)
+
+
+def test_joint_utils_in_chunks():
+    joints = np.random.default_rng(2).integers(0, 12, size=(10000, 3))
+    assert (joint_utils(joints, 12) == LemonadeGame().calculate_utils_batch(joints)).all()
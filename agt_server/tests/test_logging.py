@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+tests for the queued, per-component logging in core/log.py.
+"""
+
+import io
+import logging
+import os
+import queue
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.log import setup_logging, flush_logging, get_logger, parse_levels, dashboard_event, _DeferredQueueHandler
+
+
+class _Probe:
+    """records which thread formatted it."""
+
+    def __init__(self):
+        self.formatted_on = []
+
+    def __str__(self):
+        self.formatted_on.append(threading.current_thread())
+        return "probe"
+
+
+@pytest.fixture
+def captured():
+    out = io.StringIO()
+    setup_logging("info", {"engine": "warning"}, stream=out)
+    yield out
+    # back to the default pipeline with default levels
+    flush_logging()
+    logging.getLogger("agt.engine").setLevel(logging.NOTSET)
+    setup_logging("info")
+
+
+def test_parse_levels():
+    assert parse_levels("server=debug, engine=WARNING") == {"server": "DEBUG", "engine": "WARNING"}
+    assert parse_levels("") == {}
+    with pytest.raises(ValueError):
+        parse_levels("server")
+    with pytest.raises(ValueError):
+        parse_levels("server=loud")
+
+
+def test_records_are_formatted_off_the_caller_thread(captured):
+    # the queue handler hands the record over untouched...
+    probe = _Probe()
+    record = logging.LogRecord("agt.server", logging.INFO, __file__, 0, "value: %s", (probe,), None)
+    assert _DeferredQueueHandler(queue.SimpleQueue()).prepare(record) is record
+    assert probe.formatted_on == []
+
+    # ...and the writer thread formats it
+    get_logger("server").info("value: %s", probe)
+    flush_logging()
+
+    assert "agt.server - value: probe" in captured.getvalue()
+    assert any(thread is not threading.main_thread() for thread in probe.formatted_on)
+
+
+def test_gated_messages_are_never_formatted(captured):
+    probe = _Probe()
+    get_logger("server").debug("value: %s", probe)
+    get_logger("engine").info("value: %s", probe)
+    get_logger("engine").warning("engine warning")
+    flush_logging()
+
+    assert probe.formatted_on == []
+    assert "engine warning" in captured.getvalue()
+    assert "value" not in captured.getvalue()
+
+
+def test_dashboard_lines_are_written_raw(captured):
+    logging.getLogger("agt").setLevel(logging.ERROR)
+    dashboard_event("encoded:0011")
+    flush_logging()
+
+    assert "encoded:0011\n" in captured.getvalue().splitlines(keepends=True)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+tests for the matrix game fast path.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.game.RPSGame import RPSGame
+from core.game.BOSGame import BOSGame
+from core.game.PDGame import PDGame
+from core.game.ChickenGame import ChickenGame
+from core.stage.MatrixStage import MatrixStage
+
+GAMES = [RPSGame, BOSGame, PDGame, ChickenGame]
+
+
+@pytest.mark.parametrize("game_class", GAMES)
+def test_rewards_match_the_payoff_tensor(game_class):
+    game = game_class(rounds=50)
+    game.reset()
+    stage = game.stage
+    n = game.payoff_tensor.shape[1]
+    totals = [0.0, 0.0]
+    for t in range(50):
+        a0, a1 = t % n, (t // n) % n
+        obs, rewards, done, info = game.step({0: a0, 1: a1})
+        expected = game.payoff_tensor[0, a0, a1]
+        assert rewards == {0: float(expected[0]), 1: float(expected[1])}
+        assert all(type(r) is float for r in rewards.values())
+        totals[0] += rewards[0]
+        totals[1] += rewards[1]
+        if t < 49:
+            assert obs == {0: {"round": t + 1, "opponent_last_action": a1},
+                           1: {"round": t + 1, "opponent_last_action": a0}}
+    assert done and obs[0] == {"round_complete": True}
+    assert game.cumulative_rewards == {0: totals[0], 1: totals[1]}
+
+    # one stage for the whole game, kept across resets
+    game.reset()
+    assert game.stage is stage and game.t == 0 and game.last_actions == {0: None, 1: None}
+
+
+def test_observations_are_not_shared_between_rounds():
+    game = RPSGame(rounds=10)
+    game.reset()
+    first, _, _, _ = game.step({0: 0, 1: 1})
+    game.step({0: 2, 1: 2})
+    assert first[0] == {"round": 1, "opponent_last_action": 1}
+
+
+@pytest.mark.parametrize("actions", [{0: 3, 1: 0}, {0: 0}, {0: 0, 1: 1, 2: 1}, {0: "rock", 1: 0}])
+def test_illegal_actions_raise(actions):
+    game = RPSGame(rounds=10)
+    game.reset()
+    with pytest.raises(ValueError):
+        game.step(actions)
+
+
+def test_stage_rejects_tensors_that_arent_two_player_matrices():
+    with pytest.raises(ValueError):
+        MatrixStage(RPSGame().payoff_tensor[0])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+tests for the server's prometheus metrics endpoint.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from metrics import ServerMetrics
+from core.engine import Engine
+from core.policy import TablePolicy
+from core.game.RPSGame import RPSGame
+from tests.server_helpers import handshake, start_server
+
+
+def test_render_text_format():
+    metrics = ServerMetrics("rps", players=lambda: 3)
+    metrics.record_action(0.02)
+    metrics.record_action(0.3)
+    metrics.record_action(None, defaulted=True, timed_out=True)
+    metrics.round_played()
+    text = metrics.render()
+
+    assert '# TYPE agt_connected_players gauge' in text
+    assert 'agt_connected_players{game="rps"} 3' in text
+    assert '# TYPE agt_action_latency_seconds histogram' in text
+    assert 'agt_action_latency_seconds_bucket{game="rps",le="0.025"} 1' in text
+    assert 'agt_action_latency_seconds_bucket{game="rps",le="0.5"} 2' in text
+    assert 'agt_action_latency_seconds_bucket{game="rps",le="+Inf"} 2' in text
+    assert 'agt_action_latency_seconds_count{game="rps"} 2' in text
+    assert 'agt_action_timeouts_total{game="rps"} 1' in text
+    assert 'agt_default_actions_total{game="rps"} 1' in text
+    assert 'agt_rounds_total{game="rps"} 1' in text
+    assert text.endswith("\n")
+
+
+def test_games_are_counted_by_outcome():
+    metrics = ServerMetrics("rps")
+    for outcome in ("completed", "completed", "forfeited", "aborted"):
+        metrics.game_started()
+        metrics.game_finished(outcome)
+    text = metrics.render()
+
+    assert 'agt_games_completed_total{game="rps"} 2' in text
+    assert 'agt_games_forfeited_total{game="rps"} 1' in text
+    assert 'agt_games_aborted_total{game="rps"} 1' in text
+    assert 'agt_active_games{game="rps"} 0' in text
+
+
+def test_engine_reports_forfeited_games():
+    metrics = ServerMetrics("rps")
+    rock = TablePolicy.from_spec({"action": 0}, [[0, 1, 2], [0, 1, 2]])
+    left = type("Owner", (), {"alive": False})()
+    for owner in (None, left):
+        agents = [rock.agent("a"), rock.agent("b", owner=owner)]
+        asyncio.run(Engine(RPSGame(rounds=10), agents, rounds=10, metrics=metrics).run_async(10))
+    text = metrics.render()
+
+    assert 'agt_games_completed_total{game="rps"} 1' in text
+    assert 'agt_games_forfeited_total{game="rps"} 1' in text
+
+
+def test_metrics_endpoint_serves_traffic_counters(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server({"game_title": "rps", "metrics_port": 0})
+        await server.start_metrics()
+
+        # one player does the handshake
+        reader, writer = await handshake(port, "alice", "d1")
+        await reader.readline()
+        await reader.readline()
+
+        http_reader, http_writer = await asyncio.open_connection("127.0.0.1", server.metrics_server.port)
+        http_writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await http_writer.drain()
+        response = (await http_reader.read()).decode()
+
+        assert response.startswith("HTTP/1.1 200 OK")
+        assert "text/plain; version=0.0.4" in response
+        assert 'agt_connected_players{game="rps"} 1' in response
+        assert 'agt_messages_received_total{game="rps"} 1' in response
+        assert 'agt_messages_sent_total{game="rps"} 3' in response
+
+        writer.close()
+        http_writer.close()
+        server.metrics_server.close()
+        listener.close()
+
+    asyncio.run(run())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+tests for multiplexing several players over one client connection.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from mux_client import MultiplexedClient
+from transport import MessageTransport, TaggedTransport
+from core.agents.lab01.random_agent import RandomAgent
+from tests.server_helpers import start_server
+
+
+def _agents(count):
+    agents = [RandomAgent(f"bot_{i}") for i in range(count)]
+    for agent in agents:
+        agent.game_title = "rps"
+    return agents
+
+
+async def _wait_for(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.02)):
+        if condition():
+            return True
+        await asyncio.sleep(0.02)
+    return False
+
+
+def test_tagged_transport_adds_the_player_id():
+    async def run():
+        accepted = asyncio.get_running_loop().create_future()
+        listener = await asyncio.start_server(lambda r, w: accepted.set_result(w), "127.0.0.1", 0)
+        reader, client_writer = await asyncio.open_connection("127.0.0.1", listener.sockets[0].getsockname()[1])
+        shared = MessageTransport(await accepted)
+
+        await TaggedTransport(shared, "3").send({"message": "ping"})
+        await TaggedTransport(shared, "4").send({})
+        assert shared.queue_depth == 2  # buffered on the shared transport until the flush
+        await shared.flush()
+        lines = [json.loads(await reader.readline()) for _ in range(2)]
+        assert lines == [{"message": "ping", "player": "3"}, {"player": "4"}]
+
+        client_writer.close()
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_tournament_over_one_connection(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server({"game_title": "rps"})
+        server.game_config["num_rounds"] = 3
+        client = MultiplexedClient(_agents(4), "127.0.0.1", port)
+        await client.connect()
+        assert client.connected
+        assert await _wait_for(lambda: len(server.players) == 4)
+
+        # four players, one socket
+        assert len({player.writer for player in server.players.values()}) == 1
+        assert sorted(player.mux_tag for player in server.players.values()) == ["0", "1", "2", "3"]
+        assert all(player.session_token for player in client.players.values())
+
+        playing = asyncio.create_task(client.run())
+        await server.run_tournament()
+        await asyncio.wait_for(playing, timeout=10)
+
+        # every player played everyone else and heard the tournament was over
+        assert all(player.tournament_finished for player in client.players.values())
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_evicting_one_player_keeps_the_connection_for_the_others(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server({"game_title": "rps"})
+        client = MultiplexedClient(_agents(3), "127.0.0.1", port)
+        await client.connect()
+        playing = asyncio.create_task(client.run())
+        assert await _wait_for(lambda: len(server.players) == 3)
+
+        await server.evict_player(server.players["bot_1"], "kicked")
+        assert await _wait_for(lambda: client.players["1"].should_exit)
+        assert not client.players["0"].should_exit and not client.players["2"].should_exit
+        assert sorted(server.players) == ["bot_0", "bot_2"]
+        assert not server.players["bot_0"].writer.is_closing()
+
+        # closing the connection drops everyone left on it
+        await client.disconnect()
+        assert await _wait_for(lambda: not server.players)
+        await asyncio.wait_for(playing, timeout=5)
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_bad_player_list_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server({"game_title": "rps"})
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await reader.readline()
+        writer.write(json.dumps({"message": "provide_client_info", "game_type": "rps",
+                                 "players": [{"player": "a", "player_name": "x"},
+                                             {"player": "a", "player_name": "y"}]}).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await asyncio.wait_for(reader.readline(), timeout=5))
+        assert reply["message"] == "error"
+        assert not server.players
+        writer.close()
+        listener.close()
+
+    asyncio.run(run())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+tests for the n player normal form game.
+"""
+
+import asyncio
+import itertools
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.engine import Engine
+from core.policy import TablePolicy, action_space
+from core.game.NormalFormGame import NormalFormGame
+from core.game.LemonadeGame import LemonadeGame
+from core.game.RPSGame import RPSGame
+from core.stage.NormalFormStage import NormalFormStage
+
+
+def test_two_players_match_the_matrix_game():
+    tensor = RPSGame().payoff_tensor
+    general, matrix = NormalFormGame(tensor, rounds=30), RPSGame(rounds=30)
+    assert general.reset() == {0: {"round": 0, "last_actions": None}, 1: {"round": 0, "last_actions": None}}
+    matrix.reset()
+    for t in range(30):
+        actions = {0: t % 3, 1: (t // 3) % 3}
+        obs, rewards, done, _ = general.step(actions)
+        assert rewards == matrix.step(actions)[1]
+        if not done:
+            assert obs[1] == {"round": t + 1, "last_actions": (actions[0], actions[1])}
+    assert done and obs[0] == {"round_complete": True}
+    assert general.cumulative_rewards == matrix.cumulative_rewards
+
+
+def test_lemonade_as_a_tensor():
+    lemonade = LemonadeGame()
+    tensor = np.zeros((1, 12, 12, 12, 3))
+    for joint in itertools.product(range(12), repeat=3):
+        tensor[(0,) + joint] = lemonade.calculate_utils(list(joint))
+    game = NormalFormGame(tensor, rounds=1000)
+    game.reset()
+    rng = random.Random(0)
+    for _ in range(200):
+        joint = [rng.randrange(12) for _ in range(3)]
+        _, rewards, _, _ = game.step(dict(enumerate(joint)))
+        assert [rewards[i] for i in range(3)] == pytest.approx(lemonade.calculate_utils(joint))
+    assert game.num_players() == 3 and action_space(game) == [list(range(12))] * 3
+
+
+def test_flat_indexing():
+    stage = NormalFormStage(np.zeros((1, 2, 3, 4, 3)))
+    assert stage.strides == (12, 4, 1) and stage.size == 24
+    for flat in range(stage.size):
+        assert stage.flat_index(stage.joint_action(flat)) == flat
+    assert stage.flat_index((1, 2, 3)) == np.ravel_multi_index((1, 2, 3), (2, 3, 4))
+
+
+def test_sparse_payoffs_for_large_games():
+    # ten players with ten actions each, 10^10 joint actions, only a few of them pay
+    jackpot = tuple(range(10))
+    game = NormalFormGame(sparse_payoffs={jackpot: [1.0] * 10, (0,) * 10: range(10)}, num_actions=[10] * 10,
+                          default_payoff=-1.0, rounds=5)
+    game.reset()
+    assert game.step(dict(enumerate(jackpot)))[1] == dict.fromkeys(range(10), 1.0)
+    assert game.step(dict.fromkeys(range(10), 0))[1] == {i: float(i) for i in range(10)}
+    assert game.step(dict.fromkeys(range(10), 9))[1] == dict.fromkeys(range(10), -1.0)
+    assert len(game.stage.payoffs) == 2
+
+
+@pytest.mark.parametrize("actions", [{0: 0, 1: 0}, {0: 0, 1: 0, 2: 2}, {0: 0, 1: 0, 2: "a"},
+                                     {0: 0, 1: 0, 2: 0, 3: 0}, {0: 0, 1: 0, 3: 0}])
+def test_illegal_actions_raise(actions):
+    game = NormalFormGame(np.zeros((1, 2, 2, 2, 3)))
+    game.reset()
+    with pytest.raises(ValueError):
+        game.step(actions)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"payoff_tensor": np.zeros((1, 2, 2, 3))},
+                                    {"sparse_payoffs": {(0, 0): (1, 1)}},
+                                    {"sparse_payoffs": {(0, 0): (1, 1, 1)}, "num_actions": [2, 2]}])
+def test_invalid_games(kwargs):
+    with pytest.raises(ValueError):
+        NormalFormGame(**kwargs)
+
+
+def test_engine_plays_many_players():
+    # five players, twelve actions, each player gets their own action as payoff
+    n, actions = 5, 12
+    tensor = np.zeros((1,) + (actions,) * n + (n,))
+    for i in range(n):
+        shape = [1] * (n + 1)
+        shape[i + 1] = actions
+        tensor[..., i] = np.arange(actions).reshape(shape)
+    game = NormalFormGame(tensor, rounds=200)
+    agents = [TablePolicy.from_spec({"action": i}, action_space(game)).agent(f"p{i}") for i in range(n)]
+    rewards = asyncio.run(Engine(game, agents, rounds=200).run_async(200))
+    assert rewards == [200.0 * i for i in range(n)]
+
+    engine = Engine(NormalFormGame(tensor, rounds=200), agents, rounds=200, fast_forward=True)
+    assert engine.run(200) == rewards and engine.cycles.skip is not None
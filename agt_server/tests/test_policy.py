@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+tests for uploaded table policies.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from server import AGTServer
+from client import AGTClient
+from core.engine import Engine
+from core.policy import TablePolicy, PolicyError, action_space
+from core.game.BOSGame import BOSGame
+from core.game.RPSGame import RPSGame
+from core.game.LemonadeGame import LemonadeGame
+from core.agents.lab01.random_agent import RandomAgent
+from core.agents.lab02.bos_punitive_agent import BOSPunitiveAgent
+
+RPS = [[0, 1, 2], [0, 1, 2]]
+BOS = [[0, 1], [0, 1]]
+
+# lab02's punitive agent with its break counter unrolled into the states
+PUNITIVE = {
+    "initial": "stubborn",
+    "states": {
+        "stubborn": {"action": 1, "next": {"1": "compromise_1"}},
+        "compromise_1": {"action": 0, "next": {"1": "compromise_2", "0": "stubborn"}},
+        "compromise_2": {"action": 0, "next": {"1": "punish", "0": "stubborn"}},
+        "punish": {"action": 1},
+    },
+}
+
+
+@pytest.mark.parametrize("spec, error", [
+    ({}, "needs"),
+    ({"states": {"a": {"action": 3}}}, "not one of the actions"),
+    ({"states": {"a": {"action": {"0": 0.5, "1": 0.4}}}}, "sum to"),
+    ({"states": {"a": {"action": 0, "next": {"1": "b"}}}}, "doesn't exist"),
+    ({"states": {"a": {"action": 0, "next": {"1,2": "a"}}}}, "1 other player"),
+    ({"initial": "z", "states": {"a": {"action": 0}}}, "initial state"),
+])
+def test_invalid_policies_are_rejected(spec, error):
+    with pytest.raises(PolicyError, match=error):
+        TablePolicy.from_spec(spec, RPS)
+
+
+def test_action_spaces():
+    assert action_space(RPSGame()) == RPS
+    assert action_space(BOSGame()) == BOS
+    assert action_space(LemonadeGame()) == [list(range(12))] * 3
+    assert action_space(object()) is None
+
+    # lemonade transitions list both other players
+    policy = TablePolicy.from_spec({"states": {"a": {"action": 0, "next": {"3,7": "b"}}, "b": {"action": 6}}},
+                                   action_space(LemonadeGame()))
+    agent = policy.agent("x")
+    agent.observe_actions(1, {0: 3, 1: 0, 2: 7})
+    assert agent.get_action() == 6
+
+
+def test_punitive_table_plays_like_the_lab_agent():
+    payoff = {(0, 0): 0, (0, 1): 3, (1, 0): 7, (1, 1): 0}  # row player's bos payoffs
+    table = TablePolicy.from_spec(PUNITIVE, BOS).agent("table")
+    lab = BOSPunitiveAgent()
+    rng = random.Random(7)
+    for _ in range(200):
+        opponent = rng.choice([0, 1, 1])
+        action = lab.get_action({})
+        assert table.get_action() == action
+        lab.action_history.append(action)
+        lab.update(payoff[(action, opponent)])
+        table.observe_actions(0, {0: action, 1: opponent})
+
+
+def test_stationary_mixed_strategy():
+    policy = TablePolicy.from_spec({"action": {"0": 0.5, "2": 0.5}}, RPS)
+    agent = policy.agent("mixed")
+    counts = [0, 0, 0]
+    for _ in range(2000):
+        counts[agent.get_action()] += 1
+    assert counts[1] == 0 and 800 < counts[0] < 1200
+
+
+def test_mixed_policies_follow_the_game_seed():
+    def play(seed):
+        mixed = TablePolicy.from_spec({"action": {"0": 0.4, "1": 0.3, "2": 0.3}}, RPS)
+        agents = [mixed.agent("a"), mixed.agent("b")]
+        engine = Engine(RPSGame(rounds=200), agents, rounds=200, seed=seed)
+        asyncio.run(engine.run_async(200))
+        return [agent.action_history for agent in agents]
+
+    assert play(5) == play(5)
+    assert play(5) != play(6)
+
+
+def test_engine_plays_two_policies_locally():
+    rock = TablePolicy.from_spec({"action": 0}, RPS).agent("rock")
+    paper = TablePolicy.from_spec({"action": 1}, RPS).agent("paper")
+    started = time.perf_counter()
+    rewards = asyncio.run(Engine(RPSGame(rounds=1000), [rock, paper], rounds=1000).run_async(1000))
+    assert rewards == [-1000, 1000]
+    assert time.perf_counter() - started < 2
+
+
+def test_uploaded_policies_play_without_round_trips(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server = AGTServer({"game_title": "rps"}, "127.0.0.1", 0)
+        server.game_config["num_rounds"] = 1000
+        listener = await asyncio.start_server(server.handle_new_client_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+
+        clients = []
+        for name, policy in (("rock", {"action": 0}), ("paper", {"action": 1}), ("broken", {"action": 9})):
+            agent = RandomAgent(name)
+            agent.game_title = "rps"
+            client = AGTClient(agent, "127.0.0.1", port, policy=policy)
+            await client.connect()
+            clients.append(client)
+        playing = [asyncio.create_task(client.run()) for client in clients]
+        for _ in range(100):
+            if all(player.policy is not None for name, player in server.players.items() if name != "broken"):
+                break
+            await asyncio.sleep(0.02)
+        assert server.players["rock"].policy and server.players["paper"].policy
+        assert server.players["broken"].policy is None  # rejected, its agent would play over the network
+        clients[2].should_exit = True
+        await server.evict_player(server.players["broken"], "not in this test")
+
+        started = time.perf_counter()
+        await server.run_tournament()
+        elapsed = time.perf_counter() - started
+        await asyncio.wait_for(asyncio.gather(*playing), timeout=10)
+        listener.close()
+
+        # ten games of 1000 rounds without a single action request
+        assert server.metrics.action_latency.count(game="rps") == 0
+        assert elapsed < 5
+
+    asyncio.run(run())
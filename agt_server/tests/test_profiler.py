@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+tests for the client self-profiler.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from server import AGTServer
+from client import AGTClient
+from profiler import ClientProfiler, format_summary
+from core.agents.lab01.random_agent import RandomAgent
+
+
+class SlowAgent(RandomAgent):
+    def get_action(self, obs=None):
+        time.sleep(0.05)
+        return super().get_action(obs)
+
+
+def test_decision_and_wait_are_split_at_the_action():
+    now = [0.0]
+    profiler = ClientProfiler(clock=lambda: now[0])
+
+    for start in (1.0, 2.0):
+        profiler.received("request_action", 100, at=start)
+        profiler.sent("action", 40, at=start + 0.25)  # our agent
+        profiler.received("round_result", 60, at=start + 0.5)
+    profiler.received("request_action", 100, at=3.0)
+    profiler.sent("pong", 10, at=3.1)  # doesn't count as an answer
+
+    now[0] = 4.0
+    summary = profiler.summary()
+    assert summary["decision"]["count"] == 2 and summary["decision"]["max"] == 0.25
+    # from our action to the next request, the round result in between included
+    assert summary["wait"]["count"] == 2 and summary["wait"]["p50"] == 0.75
+    assert summary["messages"]["request_action"] == {
+        "received": 3, "sent": 0, "bytes_in": 300, "bytes_out": 0, "gap_mean": 0.5, "gap_max": 0.5,
+    }
+    assert summary["messages"]["action"]["bytes_out"] == 80
+    assert summary["messages"]["pong"]["sent"] == 1
+
+    text = format_summary(summary, "alice")
+    assert "CLIENT PROFILE - alice" in text
+    assert "25% of the time went to your agent" in text
+
+
+def test_summary_without_actions():
+    summary = ClientProfiler().summary()
+    assert summary["decision"]["count"] == 0 and summary["wait"]["max"] == 0.0
+    assert "went to your agent" not in format_summary(summary)
+
+
+def test_profile_reaches_the_server(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server = AGTServer({"game_title": "rps"}, "127.0.0.1", 0)
+        server.game_config["num_rounds"] = 5
+        listener = await asyncio.start_server(server.handle_new_client_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+
+        clients = []
+        for agent, report in ((SlowAgent("slow"), True), (RandomAgent("quiet"), False)):
+            agent.game_title = "rps"
+            client = AGTClient(agent, "127.0.0.1", port, profile=True, report_profile=report)
+            await client.connect()
+            clients.append(client)
+        slow, quiet = server.players["slow"], server.players["quiet"]
+        assert slow.report_profile and not quiet.report_profile
+        playing = [asyncio.create_task(client.run()) for client in clients]
+        await server.run_tournament()
+
+        # the server held the connection open until the profile came in
+        profile = slow.client_profile
+        assert profile["decision"]["count"] == profile["messages"]["request_action"]["received"] >= 5
+        assert profile["decision"]["p50"] >= 0.05
+        assert profile["messages"]["request_action"]["bytes_in"] > 0
+        assert quiet.client_profile is None
+        await asyncio.wait_for(asyncio.gather(*playing), timeout=5)
+        listener.close()
+
+    asyncio.run(run())
+    assert capsys.readouterr().out.count("CLIENT PROFILE") == 2
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+tests for the per-game random streams in core/rng.py.
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.rng import SeedBank, BlockSampler, make_rng, player_sequences, sample, choice, shuffled
+from core.local_arena import LocalArena
+from core.policy import TablePolicy
+from core.game.AuctionGame import AuctionGame
+from core.game.AdxOneDayGame import AdxOneDayGame
+from core.game.BOSIIGame import BOSIIGame
+from core.stage.AdxTwoDayStage import AdxTwoDayStage
+
+
+def test_seed_bank_streams_depend_only_on_the_game_id():
+    bank = SeedBank(1234)
+    first = bank.generator(5).random(10)
+    # building other games' streams first changes nothing
+    for game_id in range(20):
+        bank.generator(game_id).random(100)
+    assert (SeedBank(1234).generator(5).random(10) == first).all()
+    assert not (bank.generator(6).random(10) == first).all()
+    assert not (SeedBank(1235).generator(5).random(10) == first).all()
+
+    # an unseeded bank keeps its entropy, which reproduces it
+    unseeded = SeedBank()
+    assert (SeedBank(unseeded.entropy).generator(3).random(5) == unseeded.generator(3).random(5)).all()
+
+
+def test_make_rng():
+    rng = np.random.default_rng(0)
+    assert make_rng(rng) is rng
+    assert make_rng(7).random() == make_rng(7).random()
+    assert make_rng(SeedBank(1).sequence(2)).random() == SeedBank(1).generator(2).random()
+    random.seed(11)
+    value = make_rng(None).random()
+    random.seed(11)
+    assert make_rng(None).random() == value
+
+
+def test_block_sampler_matches_direct_draws():
+    direct = np.random.default_rng(3).random(25).tolist()
+    rng = np.random.default_rng(3)
+    draw = BlockSampler(rng.random, block=10)
+    assert [draw() for _ in range(25)] == direct
+
+
+def test_helpers():
+    rng = np.random.default_rng(0)
+    population = list("abcdefgh")
+    picked = sample(rng, population, 3)
+    assert len(set(picked)) == 3 and set(picked) <= set(population)
+    assert choice(rng, population) in population
+    assert sorted(shuffled(rng, population)) == population
+
+
+def test_auction_valuations_are_reproducible():
+    def valuations(seed):
+        game = AuctionGame(goods={"c", "a", "b"}, player_names=["x", "y"], num_rounds=5)
+        game.reset(seed=seed)
+        rounds = []
+        for _ in range(5):
+            game.generate_valuations_for_round()
+            rounds.append({p: list(v) for p, v in game.current_valuations.items()})
+        return rounds
+
+    assert valuations(4) == valuations(4)
+    assert valuations(4) != valuations(5)
+
+
+def test_adx_one_day_is_reproducible():
+    def draw(seed):
+        game = AdxOneDayGame(num_agents=3)
+        game.reset(seed=seed)
+        campaigns = [(c.market_segment, c.reach) for c in game.agent_campaigns.values()]
+        return campaigns, list(game.user_arrivals[:50])
+
+    assert draw(9) == draw(9)
+    assert draw(9) != draw(10)
+
+
+def test_adx_two_day_rival_prices_are_reproducible():
+    prices = [[AdxTwoDayStage(num_players=2, rng=np.random.default_rng(seed))._rival_prices() for _ in range(50)]
+              for seed in (1, 1, 2)]
+    assert prices[0] == prices[1] != prices[2]
+    assert all(0.0 <= p <= 10.0 for p in prices[0])
+
+
+def _bosii_arena(seed):
+    # agents that play the same action every round, so the score only depends on the moods
+    specs = [{"action": 0}, {"action": 1}, {"action": 1}, {"action": 0}]
+    agents = [TablePolicy.from_spec(spec, [[0, 1], [0, 1]]).agent(f"p{i}") for i, spec in enumerate(specs)]
+    arena = LocalArena("BOSII", BOSIIGame, agents, num_agents_per_game=2, num_rounds=50, verbose=False, save_results=False,
+                       seed=seed)
+    arena.run_tournament()
+    return arena.game_results
+
+
+def test_seeded_tournaments_repeat():
+    assert _bosii_arena(21) == _bosii_arena(21)
+    assert _bosii_arena(21) != _bosii_arena(22)
+
+
+def test_player_sequences():
+    seed = SeedBank(3).sequence(4)
+    players = player_sequences(seed, 3)
+    # the children spawn would give, without touching the game's own sequence
+    assert [p.spawn_key for p in players] == [c.spawn_key for c in SeedBank(3).sequence(4).spawn(3)]
+    assert seed.n_children_spawned == 0
+    assert player_sequences(seed, 3)[1].generate_state(2).tolist() == players[1].generate_state(2).tolist()
+    assert player_sequences(None, 3) == [] and player_sequences(np.random.default_rng(0), 3) == []
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+tests for resuming a dropped player session with its device id and session token.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from client import AGTClient
+from core.agents.lab01.random_agent import RandomAgent
+from tests.server_helpers import handshake, start_server
+
+
+SESSION_CONFIG = {
+    "game_title": "rps",
+    "heartbeat_interval": 0.1,
+    "heartbeat_timeout": 5.0,
+    "session_grace": 0.5,
+}
+
+
+async def _handshake(port: int, device_id: str, name: str, session_token=None):
+    reader, writer = await handshake(port, name, device_id, **({"session_token": session_token} if session_token else {}))
+    established = json.loads(await reader.readline())
+    return reader, writer, established
+
+
+def test_dropped_player_resumes_with_token(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(SESSION_CONFIG, heartbeat=True)
+        reader, writer, established = await _handshake(port, "dev-1", "alice")
+        token = established["session_token"]
+        assert token
+        await reader.readline()  # waiting_for_tournament
+        player = server.players["alice"]
+
+        # drop the connection, the seat is held open
+        writer.close()
+        await asyncio.sleep(0.1)
+        assert server.players.get("alice") is player
+        assert not player.connected
+
+        # messages sent while away are replayed after resuming
+        await player.transport.send_now({"message": "round_result", "round": 1})
+        assert player.transport.queue_depth >= 1
+
+        reader, writer, established = await _handshake(port, "dev-1", "alice", token)
+        assert established["resumed"] is True
+        assert established["assigned_name"] == "alice"
+        replayed = json.loads(await reader.readline())
+        while replayed["message"] == "ping":  # heartbeats queued around the drop are replayed too
+            replayed = json.loads(await reader.readline())
+        assert replayed["message"] == "round_result"
+        assert server.players["alice"] is player
+        assert player.connected
+        assert len(server.players) == 1
+
+        writer.close()
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_wrong_token_gets_new_seat(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server, listener, port = await start_server(SESSION_CONFIG, heartbeat=True)
+        _, writer, _ = await _handshake(port, "dev-1", "alice")
+        writer.close()
+        await asyncio.sleep(0.1)
+
+        _, writer2, established = await _handshake(port, "dev-1", "alice", "not-the-token")
+        assert "resumed" not in established
+        assert established["assigned_name"] == "alice_1"
+
+        # the abandoned session expires after the grace period
+        await asyncio.sleep(0.8)
+        assert "alice" not in server.players
+        assert "alice_1" in server.players
+
+        writer2.close()
+        listener.close()
+
+    asyncio.run(run())
+
+
+def test_client_only_reconnects_when_the_stream_ends():
+    async def run():
+        client = AGTClient(RandomAgent("alice"), "127.0.0.1", 0)
+        client.reader = asyncio.StreamReader()
+        # a malformed frame and a quiet spell aren't a dropped connection
+        client.reader.feed_data(b"{not json\n\n[1, 2]\n")
+        inbox: asyncio.Queue = asyncio.Queue()
+        reader_task = asyncio.create_task(client._read_loop(inbox))
+        await asyncio.sleep(0.1)
+        assert inbox.empty() and not reader_task.done()
+
+        client.reader.feed_data(json.dumps({"message": "round_result"}).encode() + b"\n")
+        _, message = await asyncio.wait_for(inbox.get(), timeout=2.0)
+        assert message["message"] == "round_result"
+
+        # the end of the stream is
+        client.reader.feed_eof()
+        _, message = await asyncio.wait_for(inbox.get(), timeout=2.0)
+        assert message is None
+        await reader_task
+
+    asyncio.run(run())
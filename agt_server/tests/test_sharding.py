@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+tests for the sharded server mode.
+
+these start real shard processes on localhost, so they only run on linux.
+"""
+
+import asyncio
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+import sharding
+from sharding import ShardCoordinator, ShardHandle, merge_shard_results
+from client import AGTClient
+from core.agents.lab01.random_agent import RandomAgent
+
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="sharding tests need linux")
+
+
+def get_free_port() -> int:
+    """get a free port for the server."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
+
+def test_merge_shard_results_tags_and_sorts():
+    shard_results = {
+        0: {"tournament_results": [{"agent": "alice", "total score": 3.0}]},
+        1: {"tournament_results": [{"agent": "alice", "total score": 5.0}, {"agent": "bob", "total score": -1.0}]},
+        2: None,
+    }
+    merged = merge_shard_results(shard_results, "rps")
+    assert [(r["agent"], r["shard"]) for r in merged["tournament_results"]] == [("alice", 1), ("alice", 0), ("bob", 1)]
+    assert merged["summary"]["num_shards"] == 3
+    # one leaderboard entry per player, the summary doesn't pass that off as a game count
+    assert merged["summary"]["total_players"] == 3 and "total_games" not in merged["summary"]
+
+
+def test_shard_loads_are_summarized_not_logged_per_join(monkeypatch):
+    monkeypatch.setattr(sharding, "LOAD_SUMMARY_INTERVAL", 0.05)
+    coordinator = ShardCoordinator({"game_title": "rps"}, num_shards=2)
+    coordinator.shards = [ShardHandle(shard_id=i, process=None, conn=None) for i in range(2)]
+    printed = []
+    monkeypatch.setattr(coordinator, "coordinator_print", printed.append)
+
+    async def run():
+        summary = asyncio.create_task(coordinator._summarize_loads())
+        for players in range(1, 20):
+            coordinator._handle_shard_event(coordinator.shards[players % 2], ("load", players, players))
+        assert printed == []
+        await asyncio.sleep(0.2)
+        summary.cancel()
+
+    asyncio.run(run())
+    # one line for the loads after the joins, nothing more while they stay the same
+    assert printed == ["shard loads: [18, 19]"]
+
+
+@pytest.mark.parametrize("mode", ["handoff", "reuseport"])
+def test_players_spread_over_shards(mode, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        port = get_free_port()
+        coordinator = ShardCoordinator({"game_title": "rps"}, "127.0.0.1", port, num_shards=2, mode=mode)
+        serve_task = asyncio.create_task(coordinator.serve())
+        clients = []
+        try:
+            while len(coordinator.shards) < 2 or not all(s.ready for s in coordinator.shards):
+                await asyncio.sleep(0.05)
+
+            for i in range(4):
+                agent = RandomAgent(f"player{i}")
+                agent.game_title = "rps"
+                client = AGTClient(agent, "127.0.0.1", port)
+                await client.connect()
+                assert client.connected
+                clients.append(client)
+
+            for _ in range(100):
+                if sum(s.num_players for s in coordinator.shards) == 4:
+                    break
+                await asyncio.sleep(0.05)
+            assert sum(s.num_players for s in coordinator.shards) == 4
+            if mode == "handoff":
+                # the coordinator balances, the kernel hash in reuseport mode does not have to
+                assert coordinator.shard_loads() == [2, 2]
+        finally:
+            for client in clients:
+                await client.disconnect()
+            serve_task.cancel()
+            coordinator.shutdown()
+
+    asyncio.run(run())
+
+
+def test_tournament_skips_a_shard_that_exited(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        coordinator = ShardCoordinator({"game_title": "rps"}, "127.0.0.1", get_free_port(), num_shards=2)
+        await coordinator.start()
+        try:
+            dead = coordinator.shards[1]
+            dead.process.kill()
+            dead.process.join(5)
+            for _ in range(100):
+                if dead.exited:
+                    break
+                await asyncio.sleep(0.05)
+            assert dead.exited
+            # the live shard has no players and answers at once, the dead one must not hang or raise
+            return await asyncio.wait_for(coordinator.run_tournament(), timeout=10)
+        finally:
+            coordinator.shutdown()
+
+    merged = asyncio.run(run())
+    assert merged["tournament_results"] == []
+    assert merged["summary"]["num_shards"] == 2
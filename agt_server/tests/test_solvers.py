@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+tests for the matrix game equilibrium and best-response solvers.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core import solvers
+from core.solvers import MatrixSolver, matrix_solver, linprog
+from core.game.BOSGame import BOSGame
+from core.game.ChickenGame import ChickenGame
+from core.game.PDGame import PDGame
+from core.game.RPSGame import RPSGame
+from core.agents.lab01.fictitious_play_agent import FictitiousPlayAgent
+
+
+def strategies(equilibria):
+    return sorted((tuple(np.round(x, 6)), tuple(np.round(y, 6))) for x, y in equilibria)
+
+
+def test_best_responses():
+    solver = matrix_solver(RPSGame())
+    assert solver.best_response([1, 0, 0]) == 1  # paper beats rock
+    assert solver.best_response([0, 0, 1], player=1) == 0  # the column player answers scissors with rock
+    assert list(solver.best_response(np.eye(3))) == [1, 2, 0]
+    assert solver.best_responses([1 / 3, 1 / 3, 1 / 3]) == [0, 1, 2]
+    batch = np.random.default_rng(0).dirichlet(np.ones(3), 100)
+    assert list(solver.best_response(batch)) == [int(np.argmax(solver.A @ y)) for y in batch]
+
+
+def test_solvers_are_cached_by_contents():
+    assert matrix_solver(RPSGame()) is matrix_solver(RPSGame().payoff_tensor)
+    assert matrix_solver(RPSGame()) is not matrix_solver(BOSGame())
+    solver = matrix_solver(BOSGame())
+    assert solver.nash_equilibria() is solver.nash_equilibria()
+
+
+@pytest.mark.parametrize("game, expected", [
+    (RPSGame(), [((1 / 3,) * 3, (1 / 3,) * 3)]),
+    (PDGame(), [((0, 1), (0, 1))]),
+    (BOSGame(), [((1, 0), (0, 1)), ((0, 1), (1, 0)), ((0.3, 0.7), (0.3, 0.7))]),
+    (ChickenGame(), [((1, 0), (0, 1)), ((0, 1), (1, 0)), ((0.8, 0.2), (0.8, 0.2))]),
+])
+def test_nash_equilibria_of_the_lab_games(game, expected):
+    solver = matrix_solver(game)
+    found = solver.nash_equilibria()
+    assert strategies(found) == strategies([(np.array(x), np.array(y)) for x, y in expected])
+    assert all(solver.is_equilibrium(x, y) for x, y in found)
+    assert len(solver.pure_equilibria()) == sum(1 for x, y in found if x.max() == 1 and y.max() == 1)
+
+
+def test_maximin_solves_zero_sum_games():
+    strategy, value = matrix_solver(RPSGame()).maximin()
+    assert strategy == pytest.approx([1 / 3] * 3) and value == pytest.approx(0)
+    # matching pennies with a bias, the row player's value is 1/5 at (2/5, 3/5)
+    A = np.array([[2.0, -1.0], [-1.0, 1.0]])
+    strategy, value = MatrixSolver(A, -A).maximin()
+    assert strategy == pytest.approx([0.4, 0.6]) and value == pytest.approx(0.2)
+
+
+def test_larger_games():
+    rng = np.random.default_rng(3)
+    A = rng.normal(size=(7, 6))
+    solver = MatrixSolver(A, -A)
+    (x, y), = solver.nash_equilibria()
+    assert solver.is_equilibrium(x, y)
+
+    # general sum: lemke-howson finds equilibria, a subset of what support enumeration finds
+    A, B = rng.normal(size=(5, 5)), rng.normal(size=(5, 5))
+    found = MatrixSolver(A, B).nash_equilibria()
+    assert found and all(MatrixSolver(A, B).is_equilibrium(x, y) for x, y in found)
+    limit = solvers.SUPPORT_ENUMERATION_MAX
+    solvers.SUPPORT_ENUMERATION_MAX = 5
+    try:
+        every = strategies(MatrixSolver(A, B).nash_equilibria())
+    finally:
+        solvers.SUPPORT_ENUMERATION_MAX = limit
+    assert set(strategies(found)) <= set(every)
+
+
+def test_correlated_equilibrium():
+    # chicken: no correlated equilibrium does better than 0 in total, the pure ones and the traffic light reach it
+    solver = matrix_solver(ChickenGame())
+    joint = solver.correlated_equilibrium()
+    assert joint.sum() == pytest.approx(1) and (joint >= -1e-9).all()
+    welfare = (joint * (solver.A + solver.B)).sum()
+    assert welfare == pytest.approx(0)
+    # the row player's favourite correlated equilibrium is their favourite pure one
+    assert solver.correlated_equilibrium((1, 0)) == pytest.approx(np.array([[0, 0], [1, 0]]))
+    # nash equilibria are correlated equilibria, so the welfare can't be lower than theirs
+    for x, y in solver.nash_equilibria():
+        assert welfare >= x @ (solver.A + solver.B) @ y - 1e-9
+
+
+@pytest.mark.parametrize("n", [5, 6, 7, 8])
+@pytest.mark.parametrize("integer", [True, False])
+def test_correlated_equilibria_of_random_games(n, integer):
+    # random games are as degenerate as it gets for the simplex: every incentive constraint is tight at 0
+    rng = np.random.default_rng(n)
+    for _ in range(5):
+        if integer:
+            A, B = rng.integers(-10, 11, (2, n, n)).astype(float)
+        else:
+            A, B = rng.normal(size=(n, n)) * 100, rng.normal(size=(n, n)) * 1e-3
+        joint = MatrixSolver(A, B).correlated_equilibrium()
+        assert joint.sum() == pytest.approx(1) and (joint >= -1e-9).all()
+        # told to play i (j), neither player gains by playing k instead
+        for i in range(n):
+            assert (joint[i] @ (A - A[i]).T <= 1e-7 * np.abs(A).max()).all()
+            assert (joint[:, i] @ (B - B[:, [i]]) <= 1e-7 * np.abs(B).max()).all()
+
+
+def test_linprog():
+    # maximize x + y subject to x + 2y <= 4, 3x + y <= 6
+    x, value = linprog([-1, -1], [[1, 2], [3, 1]], [4, 6])
+    assert x == pytest.approx([1.6, 1.2]) and value == pytest.approx(-2.8)
+    with pytest.raises(ValueError, match="infeasible"):
+        linprog([1], A_eq=[[1]], b_eq=[-1])
+    with pytest.raises(ValueError, match="unbounded"):
+        linprog([-1])
+
+
+def test_fictitious_play_uses_the_solver():
+    agent = FictitiousPlayAgent()
+    agent.opponent_action_counts = [5, 1, 1]
+    assert agent.get_action({}) == 1
+    agent.opponent_action_counts = [0, 1, 4]
+    assert agent.get_action({}) == 0
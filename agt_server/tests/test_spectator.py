@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+tests for the live spectator feed.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from spectator import SpectatorHub, SpectatorHTTPServer, Subscriber
+from core.engine import Engine
+from core.game.RPSGame import RPSGame
+from core.agents.lab01.random_agent import RandomAgent
+
+
+async def _subscribe(port: int, query: str = ""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /spectate{query} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return status, reader, writer
+
+
+async def _next_event(reader: asyncio.StreamReader):
+    event, data = None, None
+    while True:
+        line = (await asyncio.wait_for(reader.readline(), timeout=5)).decode().rstrip("\n")
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+        elif line == "" and event is not None:
+            return event, data
+
+
+def test_frames_are_encoded_once_and_slow_queues_skip_rounds():
+    hub = SpectatorHub(max_queue=3)
+
+    async def run():
+        class FakeWriter:
+            def is_closing(self):
+                return False
+
+        watchers = [Subscriber(FakeWriter(), None, 3) for _ in range(5)]
+        hub.subscribers.update(watchers)
+
+        game = hub.game_started("rps", ["a", "b"], 10)
+        for round_num in range(10):
+            hub.round_played(game, round_num, [0, 1], [-1, 1], [-round_num, round_num])
+        hub.game_finished(game, [-10, 10])
+
+        # 12 frames, each encoded once for all five watchers
+        assert hub.frames_encoded == 12
+        for watcher in watchers:
+            assert len(watcher.frames) == 3
+            assert watcher.frames[-1].startswith(b"event: game_end")
+            assert watcher.skipped == 9
+        assert game not in hub.games
+
+    asyncio.run(run())
+
+
+def test_nothing_is_encoded_without_spectators():
+    hub = SpectatorHub()
+    game = hub.game_started("rps", ["a", "b"], 10)
+    hub.round_played(game, 0, [0, 1], [-1, 1], [-1, 1])
+    assert hub.frames_encoded == 0
+    assert hub.games[game]["players"] == ["a", "b"]
+
+
+def test_spectator_watches_a_live_game():
+    async def run():
+        hub = SpectatorHub()
+        server = await SpectatorHTTPServer(hub, "127.0.0.1", 0).start()
+        status, reader, writer = await _subscribe(server.port)
+        assert b"200" in status
+        other_status, other_reader, other_writer = await _subscribe(server.port, "?player=nobody")
+        await asyncio.sleep(0.05)
+        assert len(hub.subscribers) == 2
+
+        agents = [RandomAgent("alice"), RandomAgent("bob")]
+        engine = Engine(RPSGame(rounds=5), agents, rounds=5, game_title="rps", spectator=hub)
+        rewards = await engine.run_async(5)
+
+        event, data = await _next_event(reader)
+        assert event == "game_start" and data["players"] == ["alice", "bob"]
+        rounds = []
+        while True:
+            event, data = await _next_event(reader)
+            if event == "game_end":
+                break
+            rounds.append(data)
+        assert [frame["round"] for frame in rounds] == list(range(5))
+        assert data["totals"] == rewards
+
+        # the filtered spectator saw nothing of it
+        assert await asyncio.wait_for(other_reader.read(4096), timeout=1) == b": connected\n\n"
+
+        writer.close()
+        other_writer.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_slow_spectator_is_dropped_without_stalling_publish():
+    async def run():
+        hub = SpectatorHub(max_queue=8, write_timeout=0.3)
+        server = await SpectatorHTTPServer(hub, "127.0.0.1", 0).start()
+
+        # a raw socket with a tiny receive buffer that never reads
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", server.port))
+        await asyncio.get_running_loop().sock_sendall(sock, b"GET /spectate HTTP/1.1\r\n\r\n")
+        for _ in range(50):
+            if hub.subscribers:
+                break
+            await asyncio.sleep(0.02)
+
+        big = ["x" * 50000, "y" * 50000]
+        game = hub.game_started("rps", ["a", "b"], 1000)
+        for round_num in range(400):
+            hub.round_played(game, round_num, big, [0, 0], [0, 0])  # never blocks
+            await asyncio.sleep(0)
+        for _ in range(100):
+            if hub.disconnected_slow:
+                break
+            await asyncio.sleep(0.05)
+
+        assert hub.disconnected_slow == 1
+        assert not hub.subscribers
+        sock.close()
+        server.close()
+
+    asyncio.run(run())
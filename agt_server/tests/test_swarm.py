@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+tests for the swarm load generator helpers and a tiny in-process swarm.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from server import AGTServer
+from metrics import ServerMetrics
+from swarm import (histogram_quantile, make_agent, metric_total, metrics_delta, parse_metrics, parse_think_time,
+                   percentile, run_bots, SwarmClient)
+
+
+def test_parse_think_time():
+    assert parse_think_time("none")() == 0.0
+    assert parse_think_time("const:0.25")() == 0.25
+    for _ in range(100):
+        assert 0.1 <= parse_think_time("uniform:0.1,0.2")() <= 0.2
+        assert parse_think_time("exp:0.01")() >= 0.0
+        assert parse_think_time("lognormal:0.01,0.5")() > 0.0
+    for bad in ("const", "uniform:1", "gauss:1,2", "exp:abc"):
+        with pytest.raises(ValueError):
+            parse_think_time(bad)
+
+
+def test_quantiles_from_scraped_metrics():
+    metrics = ServerMetrics("rps")
+    for latency in [0.002] * 90 + [0.3] * 10:
+        metrics.record_action(latency)
+    for _ in range(5):
+        metrics.round_played()
+
+    parsed = parse_metrics(metrics.render())
+    assert parsed["agt_rounds_total"] == [({"game": "rps"}, 5.0)]
+    assert 0.001 <= histogram_quantile(parsed, "agt_action_latency_seconds", 0.5) <= 0.005
+    assert 0.25 <= histogram_quantile(parsed, "agt_action_latency_seconds", 0.99) <= 0.5
+    assert histogram_quantile(parsed, "agt_event_loop_lag_seconds", 0.5) is None
+
+    assert percentile([], 0.5) is None
+    assert percentile([3, 1, 2, 4], 0.5) == 2
+    assert percentile([3, 1, 2, 4], 0.99) == 4
+
+
+def test_old_style_agents_are_adapted():
+    # the lab01 rock agent still has update(reward, info=None)
+    agent = make_agent("rps", "rocky", 1)
+    agent.update({}, 0, 1.0, False, {})
+    assert agent.game_title == "rps"
+
+
+def test_bots_decide_on_the_event_loop():
+    # a worker thread per bot would swamp a swarm of thousands
+    assert SwarmClient(make_agent("rps", "rocky", 1), "127.0.0.1", 0, parse_think_time("none")).offload == "none"
+
+
+def test_metrics_delta():
+    metrics = ServerMetrics("rps")
+    metrics.round_played()
+    metrics.record_action(0.3)
+    before = parse_metrics(metrics.render())
+    for _ in range(4):
+        metrics.round_played()
+        metrics.record_action(0.002)
+
+    delta = metrics_delta(before, parse_metrics(metrics.render()))
+    assert metric_total(delta, "agt_rounds_total") == 4
+    # the slow action before the window doesn't count
+    assert histogram_quantile(delta, "agt_action_latency_seconds", 0.99) <= 0.005
+
+
+def test_small_swarm_plays_ladder_games(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    async def run():
+        server = AGTServer({"game_title": "rps", "mode": "ladder"}, "127.0.0.1", 0)
+        server.game_config["num_rounds"] = 3
+        listener = await asyncio.start_server(server.handle_new_client_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        server.start_ladder()
+
+        stop = threading.Event()
+        bots = asyncio.create_task(run_bots(0, 4, "rps", "127.0.0.1", port, "const:0.001", 0.0, stop))
+        try:
+            # four bots make two games at a time, keep going until a few have been played
+            for _ in range(200):
+                if server.ladder.games_played >= 4:
+                    break
+                await asyncio.sleep(0.05)
+            assert server.ladder.games_played >= 4
+        finally:
+            stop.set()
+        stats = await asyncio.wait_for(bots, timeout=30)
+        listener.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["connected"] == 4
+    assert stats["played"] == 4
+    assert stats["requests"] > 0
+    assert stats["turnarounds"]
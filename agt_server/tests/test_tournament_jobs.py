@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+tests for the lemonade web server's background tournament jobs.
+"""
+
+import importlib
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server', 'lemonade_server'))
+
+from lemonade_competition import LemonadeCompetition
+from tournament_jobs import JobQueue, DONE, FAILED, CANCELLED, QUEUED
+
+AGENT = '''
+import random
+import time
+from core.agents.common.base_agent import BaseAgent
+
+class Agent(BaseAgent):
+    def get_action(self, observation=None):
+        time.sleep({delay})
+        return random.randrange(12)
+
+    def update(self, reward, info=None):
+        pass
+
+agent_submission = Agent("{name}")
+'''
+
+
+def write_agents(agents_dir, delay=0.0, students=("ann", "ben", "cat", "dan")):
+    for student in students:
+        (agents_dir / f"{student}_agent_{student}.py").write_text(AGENT.format(name=student, delay=delay))
+
+
+@pytest.fixture
+def agents_dir(tmp_path):
+    write_agents(tmp_path)
+    return tmp_path
+
+
+def test_jobs_play_in_the_background(agents_dir):
+    finished = []
+    jobs = JobQueue(LemonadeCompetition(str(agents_dir)), on_done=finished.append)
+    job, created = jobs.submit(num_competitions=6, rounds_per_comp=20, workers=1, seed=5)
+    assert created and job.wait(timeout=30)
+    assert job.status == DONE and finished == [job]
+    assert (job.games_done, job.games_total) == (6, 6) and job.eta() is None
+    expected = LemonadeCompetition(str(agents_dir)).run_tournament(num_competitions=6, rounds_per_comp=20, seed=5)
+    assert job.results["scores"] == expected["scores"]
+    assert jobs.snapshots()[0]["status"] == DONE
+
+
+def test_duplicate_submissions_are_coalesced(agents_dir):
+    write_agents(agents_dir, delay=0.001)
+    jobs = JobQueue(LemonadeCompetition(str(agents_dir)))
+    first, _ = jobs.submit(num_competitions=4, rounds_per_comp=50, workers=1, seed=1)
+    again, created = jobs.submit(num_competitions=4, rounds_per_comp=50, workers=1, seed=1)
+    assert again is first and not created
+    other, created = jobs.submit(num_competitions=4, rounds_per_comp=50, workers=1, seed=2)
+    assert other is not first and created
+
+    # a new agent makes it a different tournament
+    time.sleep(0.01)
+    write_agents(agents_dir, delay=0.001, students=("eva",))
+    changed, created = jobs.submit(num_competitions=4, rounds_per_comp=50, workers=1, seed=1)
+    assert changed is not first and created
+
+    for job in (first, other, changed):
+        assert job.wait(timeout=60) and job.status == DONE
+    # finished jobs aren't reused
+    assert jobs.submit(num_competitions=4, rounds_per_comp=50, workers=1, seed=1)[1]
+
+
+def test_cancel(agents_dir):
+    write_agents(agents_dir, delay=0.002)
+    jobs = JobQueue(LemonadeCompetition(str(agents_dir)))
+    running, _ = jobs.submit(num_competitions=50, rounds_per_comp=50, workers=1, seed=1)
+    queued, _ = jobs.submit(num_competitions=2, rounds_per_comp=5, workers=1, seed=1)
+    assert queued.status == QUEUED
+
+    # a queued job is dropped straight away
+    assert jobs.cancel(queued.id) is queued and queued.status == CANCELLED and queued.wait(0)
+
+    deadline = time.time() + 30
+    while running.games_done < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    jobs.cancel(running.id)
+    assert running.wait(timeout=30) and running.status == CANCELLED
+    assert 1 <= running.games_done < 50 and running.results is None
+    assert jobs.cancel("nope") is None
+
+
+def test_too_few_agents_fail(tmp_path):
+    write_agents(tmp_path, students=("ann", "ben"))
+    jobs = JobQueue(LemonadeCompetition(str(tmp_path)))
+    job, _ = jobs.submit(num_competitions=2, rounds_per_comp=5, workers=1)
+    assert job.wait(timeout=30) and job.status == FAILED and "3 agents" in job.error
+
+
+def test_failed_save_keeps_the_job_done(agents_dir):
+    def save(job):
+        raise OSError("disk full")
+
+    jobs = JobQueue(LemonadeCompetition(str(agents_dir)), on_done=save)
+    job, _ = jobs.submit(num_competitions=2, rounds_per_comp=5, workers=1)
+    assert job.wait(timeout=30)
+    assert job.status == DONE and job.results and job.error is None
+    assert job.snapshot()["save_error"] == "OSError: disk full"
+
+
+def test_web_routes(agents_dir, monkeypatch):
+    pytest.importorskip("flask")
+    pytest.importorskip("requests")
+    monkeypatch.chdir(agents_dir.parent)  # the module makes agents/ where it's imported, and saves results/ there
+    web = importlib.import_module("lemonade_web")
+    competition = LemonadeCompetition(str(agents_dir))
+    monkeypatch.setattr(web, "competition", competition)
+    monkeypatch.setattr(web, "jobs", JobQueue(competition))
+    client = web.app.test_client()
+
+    assert client.post("/run_tournament?competitions=lots").status_code == 400
+    assert client.post("/run_tournament?workers=-1").status_code == 400
+    # starting a tournament is an action too, the index link is a form
+    assert client.get("/run_tournament").status_code == 405
+    assert 'method="post" action="/run_tournament"' in client.get("/").get_data(as_text=True)
+
+    response = client.post("/run_tournament?competitions=3&rounds=10&workers=1&seed=7")
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job["params"] == {"num_competitions": 3, "rounds_per_comp": 10, "workers": 1, "seed": 7}
+
+    events = client.get(f"/jobs/{job['id']}/events?interval=0.1").get_data(as_text=True)
+    last = events.strip().split("\n\n")[-1].split("\n")
+    assert last[0] == "event: done" and json.loads(last[1][len("data: "):])["games_done"] == 3
+
+    assert client.get(f"/jobs/{job['id']}").get_json()["status"] == DONE
+    assert client.get(f"/jobs/{job['id']}/results").get_json()["metadata"]["seed"] == 7
+    assert [j["id"] for j in client.get("/jobs").get_json()] == [job["id"]]
+    assert client.get("/jobs/nope").status_code == 404
+    # cancelling changes state, a link prefetch or crawler can't do it
+    assert client.get(f"/jobs/{job['id']}/cancel").status_code == 405
+    assert client.post("/jobs/nope/cancel").status_code == 404
+    assert client.get("/").status_code == 200
+
+    # small tournaments play in order unless told otherwise
+    small = client.post("/run_tournament?competitions=2&rounds=5&seed=8").get_json()
+    assert small["params"]["workers"] == 1
+    big = client.post(f"/run_tournament?competitions={web.PARALLEL_MIN_COMPETITIONS}&rounds=1&seed=9").get_json()
+    assert big["params"]["workers"] == 0
+    client.post(f"/jobs/{big['id']}/cancel")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+tests for the buffered server transport.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from transport import MessageTransport
+
+
+async def _connected_pair():
+    """return (server-side writer, client-side reader) for a localhost connection."""
+    accepted = asyncio.get_running_loop().create_future()
+
+    async def on_connect(reader, writer):
+        accepted.set_result(writer)
+
+    server = await asyncio.start_server(on_connect, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client_reader, client_writer = await asyncio.open_connection("127.0.0.1", port)
+    server_writer = await accepted
+    return server, server_writer, client_reader, client_writer
+
+
+def test_messages_are_coalesced_into_one_write():
+    async def run():
+        server, writer, reader, client_writer = await _connected_pair()
+        transport = MessageTransport(writer)
+
+        for i in range(3):
+            await transport.send({"message": "agent_update", "round": i})
+        assert transport.queue_depth == 3
+        assert transport.flushes == 0
+
+        await transport.flush()
+        assert transport.queue_depth == 0
+        assert transport.flushes == 1
+        assert transport.messages_sent == 3
+
+        lines = [json.loads(await reader.readline()) for _ in range(3)]
+        assert [line["round"] for line in lines] == [0, 1, 2]
+
+        client_writer.close()
+        writer.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_high_water_mark_flushes_early():
+    async def run():
+        server, writer, reader, client_writer = await _connected_pair()
+        transport = MessageTransport(writer, high_water=64)
+
+        await transport.send({"message": "small"})
+        assert transport.flushes == 0
+        await transport.send({"message": "large", "payload": "x" * 100})
+        assert transport.flushes == 1
+        assert transport.stats()["queued_messages"] == 0
+
+        client_writer.close()
+        writer.close()
+        server.close()
+
+    asyncio.run(run())